@@ -0,0 +1,221 @@
+# benchmarks/fake_hl_server.py
+"""
+שרת מקומי שמחקה את POST /info של Hyperliquid עבור userFillsByTime, לבדיקות עומס end-to-end.
+
+- היסטוריה סינתטית דטרמיניסטית לכל wallet (benchmarks.synthetic.raw_rows, seed לפי הכתובת)
+- page_cap (ברירת מחדל 2000) ו-endTime כולל, כמו בשרת האמיתי
+- latency (ממוצע + jitter) לכל בקשה
+- הזרקת 429 / 5xx בהסתברות נתונה (seeded)
+- weight לכל IP: 20 לבקשה + 1 לכל 20 פריטים, דלי של weight_per_min לדקה → 429 כשנגמר
+
+    PYTHONPATH=src python -m benchmarks.fake_hl_server --port 8787 --latency-ms 80 --p429 0.02
+"""
+import argparse, hashlib, json, random, threading, time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from . import synthetic
+
+USER_FILLS_WEIGHT = 20
+ITEMS_PER_WEIGHT = 20
+
+class _History:
+    """fills לכל wallet, נוצרים בגישה הראשונה; time ממוין לחיפוש חלון ב-bisect."""
+    def __init__(self, fills_per_wallet: int, sizes: Optional[Dict[str, int]] = None):
+        self._n = fills_per_wallet
+        self._sizes = {k.lower(): v for k, v in (sizes or {}).items()}
+        self._rows: Dict[str, Tuple[List[int], List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def rows(self, wallet: str) -> Tuple[List[int], List[Dict[str, Any]]]:
+        wallet = wallet.lower()
+        with self._lock:
+            got = self._rows.get(wallet)
+            if got is None:
+                seed = int(hashlib.sha1(wallet.encode()).hexdigest()[:8], 16)
+                rows = synthetic.raw_rows(self._sizes.get(wallet, self._n), seed=seed)
+                got = self._rows[wallet] = ([r["time"] for r in rows], rows)
+            return got
+
+    def page(self, wallet: str, start_ms: int, end_ms: Optional[int], cap: int) -> List[Dict[str, Any]]:
+        times, rows = self.rows(wallet)
+        lo = bisect_left(times, start_ms)
+        hi = bisect_right(times, end_ms) if end_ms is not None else len(times)
+        return rows[lo:min(hi, lo + cap)]
+
+class _WeightBuckets:
+    def __init__(self, weight_per_min: float):
+        self._rate = weight_per_min / 60.0
+        self._cap = weight_per_min
+        self._state: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def try_take(self, ip: str, weight: float) -> bool:
+        if self._cap <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._state.get(ip, (self._cap, now))
+            tokens = min(self._cap, tokens + (now - last) * self._rate)
+            ok = tokens >= weight
+            self._state[ip] = (tokens - weight if ok else tokens, now)
+            return ok
+
+    def charge(self, ip: str, weight: float) -> None:
+        """weight לפי גודל התשובה – נגבה אחרי, ויכול להכניס את הדלי למינוס."""
+        if self._cap <= 0 or weight <= 0:
+            return
+        with self._lock:
+            tokens, last = self._state[ip]
+            self._state[ip] = (tokens - weight, last)
+
+class FakeHLServer:
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        fills_per_wallet: int = 5000,
+        wallet_sizes: Optional[Dict[str, int]] = None,
+        page_cap: int = 2000,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        p429: float = 0.0,
+        p5xx: float = 0.0,
+        weight_per_min: float = 1200.0,
+        seed: int = 7,
+    ):
+        self.history = _History(fills_per_wallet, wallet_sizes)
+        self.page_cap = page_cap
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.p429 = p429
+        self.p5xx = p5xx
+        self.weights = _WeightBuckets(weight_per_min)
+        self._rnd = random.Random(seed)
+        self._rnd_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.statuses: Counter = Counter()
+        self.latencies_ms: List[float] = []
+        self.items_served = 0
+        self.peers: Counter = Counter()   # (ip, port) → בקשות; חיבור keep-alive = peer אחד
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/info"
+
+    def start(self) -> "FakeHLServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-hl", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self): return self.start()
+    def __exit__(self, exc_type, exc, tb): self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            lat = sorted(self.latencies_ms)
+            return {"requests": sum(self.statuses.values()),
+                    "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+                    "items_served": self.items_served, "connections": len(self.peers),
+                    "server_p50_ms": _pct(lat, 0.50), "server_p99_ms": _pct(lat, 0.99)}
+
+    # ---------- request handling ----------
+    def _roll(self) -> Optional[int]:
+        with self._rnd_lock:
+            r = self._rnd.random()
+            delay = self.latency + (self._rnd.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+            status = self._rnd.choice((500, 502, 503)) if self.p429 <= r < self.p429 + self.p5xx else None
+        if r < self.p429:
+            status = 429
+        if delay > 0:
+            time.sleep(delay)
+        return status
+
+    def _respond(self, ip: str, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        if payload.get("type") != "userFillsByTime":
+            return 400, {"error": f"unsupported type {payload.get('type')!r}"}
+        if not self.weights.try_take(ip, USER_FILLS_WEIGHT):
+            return 429, None
+        injected = self._roll()
+        if injected is not None:
+            return injected, None
+        end = payload.get("endTime")
+        rows = self.history.page(payload["user"], int(payload.get("startTime", 0)),
+                                 int(end) if end is not None else None, self.page_cap)
+        self.weights.charge(ip, len(rows) // ITEMS_PER_WEIGHT)
+        return 200, rows
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, כמו httpx מול השרת האמיתי
+
+            def do_POST(self):
+                t0 = time.perf_counter()
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                try:
+                    status, data = server._respond(self.client_address[0], json.loads(body or b"{}"))
+                except (ValueError, KeyError) as e:
+                    status, data = 400, {"error": str(e)}
+                out = json.dumps(data).encode() if data is not None else b"null"
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+                with server._stats_lock:
+                    server.statuses[status] += 1
+                    server.peers[self.client_address[:2]] += 1
+                    server.latencies_ms.append((time.perf_counter() - t0) * 1000)
+                    if status == 200:
+                        server.items_served += len(data)
+
+            def log_message(self, *args):  # שקט – אלפי בקשות לשנייה
+                pass
+
+        return Handler
+
+def _pct(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return round(sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))], 2)
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="fake Hyperliquid /info (userFillsByTime)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8787)
+    p.add_argument("--fills-per-wallet", type=int, default=5000)
+    p.add_argument("--page-cap", type=int, default=2000)
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--jitter-ms", type=float, default=0.0)
+    p.add_argument("--p429", type=float, default=0.0)
+    p.add_argument("--p5xx", type=float, default=0.0)
+    p.add_argument("--weight-per-min", type=float, default=1200.0, help="per-IP budget, 0 = unlimited")
+    args = p.parse_args()
+    srv = FakeHLServer(host=args.host, port=args.port, fills_per_wallet=args.fills_per_wallet,
+                       page_cap=args.page_cap, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                       p429=args.p429, p5xx=args.p5xx, weight_per_min=args.weight_per_min)
+    print(f"serving {srv.url}", flush=True)
+    try:
+        srv._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv._httpd.server_close()
+        print(json.dumps(srv.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/fill_batch.py
+"""
+זיכרון וזמן match: list[Fill] מול FillBatch (הנתיב העמודתי, opt-in – run() לא משתמש בו).
+
+    PYTHONPATH=src python -m benchmarks.fill_batch --n 200000
+
+throughput של match_batches נמדד גם ב-benchmarks.run (case "match_batches").
+"""
+import argparse, gc, json, time, tracemalloc
+from decimal import Decimal
+
+from hl_verify_wallet.domain.models import Fill
+from hl_verify_wallet.domain.fill_batch import FillBatch
+from hl_verify_wallet.services.matching.default_matcher import DefaultMatchStrategy
+from hl_verify_wallet.services.normalize.trade_row import _compute_trade_id, _q6
+
+COINS = ["BTC", "ETH", "SOL", "HYPE", "ARB"]
+
+def synthetic_fills(n: int, seed_shift: int = 0):
+    for i in range(n):
+        px = Decimal(30000 + (i * 7919) % 5000) / 10
+        sz = Decimal(1 + (i * 104729) % 9999) / 1000
+        side = "A" if i % 2 else "B"
+        tid = 10 ** 14 + i
+        yield Fill(
+            wallet="0x" + "ab" * 20, coin=COINS[i % len(COINS)], side=side,
+            px=px, sz=sz, ts_ms=1_700_000_000_000 + i * 250 + seed_shift,
+            hash="0x" + f"{i // 3:064x}", base_tid=tid, role="taker" if i % 3 else "maker",
+            trade_id=_compute_trade_id(tid, side), notional_usd=_q6(px * sz),
+        )
+
+def measure(fn):
+    # זמן בלי tracemalloc (שמאט פי כמה), ואז peak בריצה נפרדת
+    gc.collect()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    tracemalloc.start()
+    out = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+def main():
+    p = argparse.ArgumentParser(description="Memory / compare-time: list[Fill] vs FillBatch")
+    p.add_argument("--n", type=int, default=200_000)
+    args = p.parse_args()
+
+    rows, t_rows, m_rows = measure(lambda: list(synthetic_fills(args.n)))
+    batch, t_batch, m_batch = measure(lambda: FillBatch.from_fills(synthetic_fills(args.n)))
+
+    m = DefaultMatchStrategy(Decimal("0.000001"), Decimal("0.00000001"), 2000)
+    hl_rows = list(synthetic_fills(args.n, seed_shift=3))
+    hl_batch = FillBatch.from_fills(hl_rows)
+    t0 = time.perf_counter(); r1 = m.match(rows, hl_rows); t_match = time.perf_counter() - t0
+    t0 = time.perf_counter(); r2 = m.match_batches(batch, hl_batch); t_match_b = time.perf_counter() - t0
+    assert len(r1.pairs) == len(r2.pairs)
+
+    print(json.dumps({
+        "fills": args.n,
+        "list_fill": {"peak_mb": round(m_rows / 2 ** 20, 1), "build_s": round(t_rows, 3), "match_s": round(t_match, 3)},
+        "fill_batch": {"peak_mb": round(m_batch / 2 ** 20, 1), "build_s": round(t_batch, 3), "match_s": round(t_match_b, 3),
+                       "column_bytes_mb": round(batch.nbytes() / 2 ** 20, 1)},
+        "matched": len(r2.pairs),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# benchmarks/load_driver.py
+"""
+Load driver: מריץ HyperliquidInfoProvider (או lambda_handler כולו) מול FakeHLServer במקביל,
+ומדווח throughput, tail latency לארנק ו-retry amplification (בקשות לשרת / עמודים שהצליחו).
+
+    PYTHONPATH=src python -m benchmarks.load_driver --wallets 32 --concurrency 8 --latency-ms 80 --p429 0.02
+    PYTHONPATH=src python -m benchmarks.load_driver --mode lambda --wallets 8 --concurrency 4
+    PYTHONPATH=src python -m benchmarks.load_driver --url http://127.0.0.1:8787/info   # שרת שכבר רץ
+
+במצב lambda צד ה-US (Redshift) מוחלף בספק סינתטי עם אותה היסטוריה – הוא לא מה שנבדק כאן.
+"""
+import argparse, hashlib, json, os, threading, time
+os.environ.setdefault("METRICS_EMF", "0")   # שורת EMF לכל invocation הייתה מציפה את הפלט
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+from hl_verify_wallet import app
+from hl_verify_wallet.adapters.hyperliquid_info_provider import HyperliquidInfoProvider
+from hl_verify_wallet.adapters.token_bucket_rate_limiter import AdaptiveTokenBucket
+from hl_verify_wallet.domain.models import Fill
+from hl_verify_wallet.domain.time_window import TimeWindow
+from hl_verify_wallet.ports.fill_provider import FillProvider
+from hl_verify_wallet.services.backfill.hl_backfill import HLBackfillService
+from . import synthetic
+from .fake_hl_server import FakeHLServer, _pct
+
+END_MS = 4_102_444_800_000   # 2100 – כל ההיסטוריה הסינתטית
+
+def wallet_address(i: int) -> str:
+    return "0x" + hashlib.sha1(f"load-{i}".encode()).hexdigest()[:40]
+
+class SyntheticUsProvider(FillProvider):
+    """צד US עם אותה היסטוריה שהשרת המזויף מגיש (אותו seed), כך ש-compare אמור להתאים הכל."""
+    def __init__(self, fills_per_wallet: int):
+        self._n = fills_per_wallet
+        self._svc = HLBackfillService(client=None)
+
+    def fetch_fills(self, wallet: str, window: TimeWindow, coin: Optional[str] = None) -> Iterable[Fill]:
+        seed = int(hashlib.sha1(wallet.lower().encode()).hexdigest()[:8], 16)
+        rows = [r for r in synthetic.raw_rows(self._n, seed=seed)
+                if window.start_ms <= r["time"] <= window.end_ms and (not coin or r["coin"] == coin)]
+        return self._svc._parse_page(wallet, rows)
+
+def _provider(args, url: str, limiter) -> HyperliquidInfoProvider:
+    return HyperliquidInfoProvider(base_url=url, timeout_sec=args.timeout, retries=args.retries,
+                                   shards=args.shards, max_concurrency=args.shard_concurrency,
+                                   rate_limiter=limiter, pipeline_depth=args.pipeline_depth,
+                                   page_cap=args.page_cap)
+
+def drive(args, url: str) -> Dict[str, Any]:
+    limiter = (AdaptiveTokenBucket(args.rate_weight_per_sec, args.rate_burst, min_rate=2.0)
+               if args.rate_weight_per_sec > 0 else None)
+    latencies: List[float] = []
+    fills = 0
+    errors = 0
+    mismatches = 0
+    lock = threading.Lock()
+
+    # provider אחד לכל הריצה, כמו ב-Lambda חמה: pool חיבורים משותף לכל הארנקים
+    hl = _provider(args, url, limiter)
+    if args.mode == "lambda":
+        us = SyntheticUsProvider(args.fills_per_wallet)
+        app._build_providers = lambda cfg: (us, hl)
+
+    def one(i: int) -> None:
+        nonlocal fills, errors, mismatches
+        wallet = wallet_address(i)
+        t0 = time.perf_counter()
+        n, bad, err = 0, 0, 0
+        try:
+            if args.mode == "lambda":
+                out = app.lambda_handler({"wallet": wallet, "start_ms": 0, "end_ms": END_MS})
+                summary = json.loads(out["body"])["summary"]
+                n = summary["hl"]
+                bad = summary["missing_in_us"] + summary["missing_in_hl"]
+            else:
+                n = len(list(hl.fetch_fills(wallet, TimeWindow(0, END_MS))))
+        except Exception:  # נספר ומדווח – ריצת עומס לא נעצרת על ארנק אחד
+            err = 1
+        dt = (time.perf_counter() - t0) * 1000
+        with lock:
+            latencies.append(dt)
+            fills += n
+            mismatches += bad
+            errors += err
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as ex:
+        list(ex.map(one, range(args.wallets)))
+    elapsed = time.perf_counter() - t0
+    hl.close()
+    lat = sorted(latencies)
+    return {
+        "mode": args.mode, "wallets": args.wallets, "concurrency": args.concurrency,
+        "elapsed_sec": round(elapsed, 3),
+        "fills": fills, "fills_per_sec": round(fills / elapsed, 1),
+        "wallet_p50_ms": _pct(lat, 0.50), "wallet_p95_ms": _pct(lat, 0.95), "wallet_p99_ms": _pct(lat, 0.99),
+        "errors": errors, "mismatches": mismatches,
+        "limiter": limiter.snapshot() if limiter is not None else None,
+    }
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="end-to-end load against a fake HL /info")
+    p.add_argument("--mode", choices=("provider", "lambda"), default="provider")
+    p.add_argument("--url", default=None, help="existing server; default = start an embedded FakeHLServer")
+    p.add_argument("--wallets", type=int, default=16)
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--fills-per-wallet", type=int, default=5000)
+    p.add_argument("--page-cap", type=int, default=2000)
+    p.add_argument("--latency-ms", type=float, default=50.0)
+    p.add_argument("--jitter-ms", type=float, default=20.0)
+    p.add_argument("--p429", type=float, default=0.0)
+    p.add_argument("--p5xx", type=float, default=0.0)
+    p.add_argument("--weight-per-min", type=float, default=0.0, help="server per-IP budget, 0 = unlimited")
+    p.add_argument("--rate-weight-per-sec", type=float, default=0.0, help="client AIMD limiter, 0 = off")
+    p.add_argument("--rate-burst", type=float, default=1200.0)
+    p.add_argument("--retries", type=int, default=5)
+    p.add_argument("--timeout", type=float, default=15.0)
+    p.add_argument("--shards", type=int, default=1)
+    p.add_argument("--shard-concurrency", type=int, default=4)
+    p.add_argument("--pipeline-depth", type=int, default=0)
+    args = p.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = FakeHLServer(fills_per_wallet=args.fills_per_wallet, page_cap=args.page_cap,
+                              latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, p429=args.p429,
+                              p5xx=args.p5xx, weight_per_min=args.weight_per_min).start()
+        url = server.url
+    try:
+        report = drive(args, url)
+    finally:
+        if server is not None:
+            server.stop()
+    if server is not None:
+        st = server.stats()
+        ok = st["statuses"].get("200", 0)
+        report["server"] = st
+        report["retry_amplification"] = round(st["requests"] / ok, 3) if ok else None
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# benchmarks/run.py
+"""
+Micro-benchmarks לנתיבים החמים: parse, normalize, matching ו-compare.
+
+    PYTHONPATH=src python -m benchmarks.run                         # 10k + 100k, הדפסה
+    PYTHONPATH=src python -m benchmarks.run --sizes 10000,100000,1000000 --no-memory
+    PYTHONPATH=src python -m benchmarks.run --save                  # כתיבת baseline.json
+    PYTHONPATH=src python -m benchmarks.run --check --threshold 0.3
+
+--check נכשל (exit 1) אם throughput ירד או peak memory עלה ביותר מ-threshold מול ה-baseline.
+ה-baseline תלוי מכונה: שומרים אותו מחדש על המכונה שבה מריצים --check.
+"""
+import argparse, gc, json, os, platform, sys, time, tracemalloc
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Tuple
+
+from hl_verify_wallet.domain.fill_batch import FillBatch
+from hl_verify_wallet.services.backfill.hl_backfill import HLBackfillService
+from hl_verify_wallet.services.compare_service import compare
+from hl_verify_wallet.services.grouped_compare import compare_grouped
+from hl_verify_wallet.services.matching.default_matcher import DefaultMatchStrategy
+from hl_verify_wallet.services.matching.hash_coin_side_matcher import HashCoinSideMatchStrategy
+from hl_verify_wallet.services.normalize.trade_row import _q6, to_trade_row_from_fill
+from . import synthetic
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+PAGE = 2000
+MEM_SLACK_MB = 0.5   # רעש של allocator בבדיקות קטנות
+MIN_SAMPLE_SEC = 0.2  # cases קצרים רצים בלולאה עד לפחות כך (כמו timeit.autorange)
+
+def _default_matcher() -> DefaultMatchStrategy:
+    return DefaultMatchStrategy(Decimal("0.000001"), Decimal("0.00000001"), 2000)
+
+def _hash_matcher() -> HashCoinSideMatchStrategy:
+    return HashCoinSideMatchStrategy(Decimal("0"), Decimal("0"), 2000)
+
+# כל case: setup(n) → (fn, items). רק fn נמדד; items = מספר היחידות לחישוב throughput.
+def _parse_fill(n):
+    rows = synthetic.raw_rows(n)
+    svc = HLBackfillService(client=None)
+    return (lambda: [svc._parse_fill(synthetic.WALLET, r) for r in rows]), n
+
+def _parse_page(n):
+    rows = synthetic.raw_rows(n)
+    pages = [rows[i:i + PAGE] for i in range(0, n, PAGE)]
+    svc = HLBackfillService(client=None)
+    return (lambda: [svc._parse_page(synthetic.WALLET, p) for p in pages]), n
+
+def _to_trade_row(n):
+    fills = synthetic.fills(n)
+    return (lambda: [to_trade_row_from_fill(f) for f in fills]), len(fills)
+
+def _q6_case(n):
+    values = [f.px * f.sz for f in synthetic.fills(n)]
+    return (lambda: [_q6(v) for v in values]), len(values)
+
+def _match_default(n):
+    us, hl = synthetic.us_hl_pair(n)
+    m = _default_matcher()
+    return (lambda: m.match(us, hl)), len(us) + len(hl)
+
+def _match_batches(n):
+    us, hl = synthetic.us_hl_pair(n)
+    us_b, hl_b = FillBatch.from_fills(us), FillBatch.from_fills(hl)
+    m = _default_matcher()
+    return (lambda: m.match_batches(us_b, hl_b)), len(us) + len(hl)
+
+def _compare_with(matcher_factory):
+    def setup(n):
+        us, hl = synthetic.us_hl_pair(n)
+        m = matcher_factory()
+        return (lambda: compare(us, hl, m)), len(us) + len(hl)
+    return setup
+
+def _compare_grouped(n):
+    us, hl = synthetic.us_hl_pair(n)
+    m = _hash_matcher()
+    return (lambda: compare_grouped(us, hl, m)), len(us) + len(hl)
+
+CASES: Dict[str, Callable[[int], Tuple[Callable[[], Any], int]]] = {
+    "parse_fill": _parse_fill,
+    "parse_page": _parse_page,
+    "to_trade_row_from_fill": _to_trade_row,
+    "q6": _q6_case,
+    "match_default": _match_default,
+    "match_batches": _match_batches,
+    "compare_default": _compare_with(_default_matcher),
+    "compare_hash_coin_side": _compare_with(_hash_matcher),
+    "compare_grouped": _compare_grouped,
+}
+
+def measure(fn: Callable[[], Any], repeat: int, memory: bool) -> Tuple[float, float]:
+    """(הזמן הטוב ביותר לריצה מתוך repeat, peak MB). peak נמדד בריצה נפרדת – tracemalloc מאט פי כמה."""
+    loops = 1
+    while True:
+        gc.collect()
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= MIN_SAMPLE_SEC:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        gc.collect()
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / loops)
+    peak = 0.0
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return best, peak
+
+def run(sizes: List[int], cases: List[str], repeat: int, memory: bool) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for n in sizes:
+        for name in cases:
+            fn, items = CASES[name](n)
+            sec, peak = measure(fn, repeat, memory)
+            key = f"{name}@{n}"
+            results[key] = {"items": items, "sec": round(sec, 4),
+                            "items_per_sec": round(items / sec, 1), "peak_mb": round(peak, 2)}
+            print(f"{key:<36} {items / sec:>14,.0f}/s {sec:>9.3f}s {peak:>9.1f} MB", file=sys.stderr)
+            del fn
+    return results
+
+def regressions(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                threshold: float) -> List[str]:
+    out = []
+    for key, cur in current.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if cur["items_per_sec"] < base["items_per_sec"] * (1 - threshold):
+            out.append(f"{key}: throughput {cur['items_per_sec']:,.0f}/s < baseline {base['items_per_sec']:,.0f}/s")
+        if base.get("peak_mb") and cur["peak_mb"] > base["peak_mb"] * (1 + threshold) + MEM_SLACK_MB:
+            out.append(f"{key}: peak {cur['peak_mb']} MB > baseline {base['peak_mb']} MB")
+    return out
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="hot-path micro-benchmarks")
+    p.add_argument("--sizes", default="10000,100000", help="comma separated (e.g. 10000,100000,1000000)")
+    p.add_argument("--cases", default=",".join(CASES), help="comma separated subset of: " + ", ".join(CASES))
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak run")
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--save", action="store_true", help="write results as the new baseline")
+    p.add_argument("--check", action="store_true", help="exit 1 on regression vs baseline")
+    p.add_argument("--threshold", type=float, default=0.3, help="allowed relative regression")
+    args = p.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        p.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    results = run(sizes, cases, args.repeat, not args.no_memory)
+    report = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "platform": platform.platform(), "repeat": args.repeat},
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.save:
+        with open(args.baseline, "w") as fh:
+            json.dump(report, fh, indent=2)
+            fh.write("\n")
+    if args.check:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+        bad = regressions(results, baseline, args.threshold)
+        for line in bad:
+            print("REGRESSION " + line, file=sys.stderr)
+        return 1 if bad else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+# benchmarks/synthetic.py
+"""ארנקים סינתטיים דטרמיניסטיים (בלי רשת) לבנצ'מרקים: שורות HL גולמיות ו-Fill מנורמלים."""
+import random
+from typing import Any, Dict, List, Tuple
+from hl_verify_wallet.domain.models import Fill
+from hl_verify_wallet.services.backfill.hl_backfill import HLBackfillService
+
+WALLET = "0x" + "ab" * 20
+COINS = ["BTC", "ETH", "SOL", "HYPE", "ARB", "DOGE", "WIF", "kPEPE"]
+T0 = 1_700_000_000_000
+
+def raw_rows(n: int, seed: int = 1, spot_ratio: float = 0.05) -> List[Dict[str, Any]]:
+    """שורות בפורמט userFillsByTime, ממוינות לפי time; spot_ratio מהן ספוט (מסוננות ב-parse)."""
+    rnd = random.Random(seed)
+    rows = []
+    ts = T0
+    for i in range(n):
+        ts += rnd.choice((0, 0, 1, 40, 250, 1500))   # התפרצויות עם אותו ms, כמו fills של הזמנה אחת
+        coin = f"@{rnd.randrange(200)}" if rnd.random() < spot_ratio else rnd.choice(COINS)
+        px = rnd.randrange(1, 10 ** 7) / 10 ** rnd.choice((1, 2, 4))
+        rows.append({
+            "coin": coin,
+            "side": rnd.choice("AB"),
+            "px": f"{px}",
+            "sz": f"{rnd.randrange(1, 10 ** 6) / 10 ** 4}",
+            "time": ts,
+            "tid": 10 ** 14 + i,
+            "hash": "0x%064x" % (i // 3),
+            "crossed": rnd.random() < 0.6,
+            "oid": 10 ** 10 + i // 3,
+            "fee": "0.01",
+            "feeToken": "USDC",
+        })
+    return rows
+
+def fills(n: int, seed: int = 1) -> List[Fill]:
+    svc = HLBackfillService(client=None)   # רק ה-parser, בלי HTTP
+    return svc._parse_page(WALLET, raw_rows(n, seed))
+
+def us_hl_pair(n: int, seed: int = 1, drop_every: int = 997) -> Tuple[List[Fill], List[Fill]]:
+    """
+    צד US וצד HL שמתאימים כמעט לגמרי: בכל צד חסר fill אחד מכל drop_every
+    (בהיסט שונה), כך ש-compare עובד גם על התאמות וגם על חסרים.
+    """
+    hl = fills(n, seed)
+    us = [f for i, f in enumerate(hl) if i % drop_every != drop_every // 2]
+    hl = [f for i, f in enumerate(hl) if i % drop_every != 0]
+    return us, hl
@@ -3,6 +3,7 @@ import argparse, time, json
 from collections import defaultdict
 
 from hl_verify_wallet.adapters.hyperliquid_client import HLClient
+from hl_verify_wallet.adapters.hl_page_cache import HLPageCache, CachingHLClient
 from hl_verify_wallet.services.backfill.hl_backfill import HLBackfillService
 from hl_verify_wallet.adapters.sinks.memory_sink import MemorySink
 from hl_verify_wallet.domain.time_window import TimeWindow
@@ -28,15 +29,28 @@ def main():
     p.add_argument("--timeout", type=float, default=15.0)
     p.add_argument("--retries", type=int, default=5)
     p.add_argument("--sample", type=int, default=3, help="How many sample rows to print from head/tail")
+    p.add_argument("--cache-dir", default=None, help="On-disk page cache dir (re-runs fetch only the new tail)")
+    p.add_argument("--cache-max-mb", type=int, default=256)
+    p.add_argument("--shard-ms", type=int, default=86_400_000, help="Aligned shard width when caching (ms)")
+    p.add_argument("--ahead-safety-ms", type=int, default=300_000, help="Never cache pages this close to now")
     args = p.parse_args()
 
     end_ms = args.end_ms or int(time.time() * 1000)
     print(f"[i] Fetching fills for wallet={args.wallet}, window=[{args.start_ms}, {end_ms}]")
 
-    with HLClient(args.base_url, timeout=args.timeout) as client:
+    client = HLClient(args.base_url, timeout=args.timeout)
+    if args.cache_dir:
+        cache = HLPageCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+        client = CachingHLClient(client, cache, ahead_safety_ms=args.ahead_safety_ms)
+    with client:
         svc = HLBackfillService(client, retries=args.retries, timeout_sec=args.timeout)
         sink = MemorySink(batch_size=1000)
-        svc.process_wallet(args.wallet, TimeWindow(args.start_ms, end_ms), sink)
+        window = TimeWindow(args.start_ms, end_ms)
+        if args.cache_dir:
+            svc.process_wallet_sharded(args.wallet, window, sink, shard_ms=args.shard_ms)
+            print(f"[i] page cache: hits={client.hits} misses={client.misses}")
+        else:
+            svc.process_wallet(args.wallet, window, sink)
 
     rows = sink.rows
 
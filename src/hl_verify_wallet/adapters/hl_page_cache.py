@@ -0,0 +1,132 @@
+# src/hl_verify_wallet/adapters/hl_page_cache.py
+import hashlib, os, tempfile, threading, time, zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from .hyperliquid_client import HLClient
+from .powertools_logger import metrics
+
+class HLPageCache:
+    """
+    Cache על דיסק לעמודי userFillsByTime: מפתח (wallet, startTime, endTime) → payload דחוס (zlib).
+    LRU מוגבל בגודל (max_bytes); זמן הגישה נשמר ב-mtime כדי שהסדר ישרוד בין תהליכים.
+    """
+    _SUFFIX = ".z"
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, level: int = 6):
+        self._dir = directory
+        self._max = max_bytes
+        self._level = level
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()   # name → size, מהישן לחדש
+        self._bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for e in os.scandir(directory):
+            if e.is_file() and e.name.endswith(self._SUFFIX):
+                st = e.stat()
+                entries.append((st.st_mtime, e.name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._bytes += size
+
+    @staticmethod
+    def _name(wallet: str, start_ms: int, end_ms: int) -> str:
+        raw = f"{wallet.lower()}:{int(start_ms)}:{int(end_ms)}".encode()
+        return hashlib.sha1(raw).hexdigest() + HLPageCache._SUFFIX
+
+    def get(self, wallet: str, start_ms: int, end_ms: int) -> Optional[str]:
+        name = self._name(wallet, start_ms, end_ms)
+        path = os.path.join(self._dir, name)
+        with self._lock:
+            if name not in self._index:
+                return None
+            try:
+                with open(path, "rb") as fh:
+                    blob = fh.read()
+                os.utime(path)
+            except FileNotFoundError:
+                self._bytes -= self._index.pop(name)
+                return None
+            self._index.move_to_end(name)
+        return zlib.decompress(blob).decode("utf-8")
+
+    def put(self, wallet: str, start_ms: int, end_ms: int, text: str) -> None:
+        name = self._name(wallet, start_ms, end_ms)
+        blob = zlib.compress(text.encode("utf-8"), self._level)
+        if len(blob) > self._max:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(blob)
+        with self._lock:
+            os.replace(tmp, os.path.join(self._dir, name))   # אטומי – אין קבצים חצויים
+            self._bytes += len(blob) - self._index.pop(name, 0)
+            self._index[name] = len(blob)
+            while self._bytes > self._max and self._index:
+                old, size = self._index.popitem(last=False)
+                self._bytes -= size
+                try:
+                    os.remove(os.path.join(self._dir, old))
+                except FileNotFoundError:
+                    pass
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+class _CachedResponse:
+    __slots__ = ("status_code", "text")
+
+    def __init__(self, text: str):
+        self.status_code = 200
+        self.text = text
+
+class CachingHLClient(HLClient):
+    """
+    עוטף HLClient ושם HLPageCache לפני request_info. cached() חושף את ה-lookup בלבד, כדי
+    ש-HLBackfillService יבדוק אותו לפני ה-rate limiter – hit לא צורך משקל.
+    רק עמודים שה-endTime שלהם ישן מ-ahead_safety_ms נשמרים/נקראים – fills ישנים לא משתנים,
+    אבל הזנב הקרוב להווה עדיין יכול להתעדכן.
+    """
+    def __init__(self, inner: HLClient, cache: HLPageCache, *, ahead_safety_ms: int,
+                 now_ms_provider: Callable[[], int] = lambda: int(time.time() * 1000)):
+        self._inner = inner
+        self._cache = cache
+        self._safety = ahead_safety_ms
+        self._now = now_ms_provider
+        self.hits = 0
+        self.misses = 0
+
+    def _cacheable(self, payload: Dict[str, Any]) -> bool:
+        return (payload.get("type") == "userFillsByTime"
+                and payload.get("endTime") is not None
+                and int(payload["endTime"]) < self._now() - self._safety)
+
+    def cached(self, payload: Dict[str, Any]) -> Optional[_CachedResponse]:
+        if not self._cacheable(payload):
+            return None
+        text = self._cache.get(payload["user"], payload["startTime"], payload["endTime"])
+        if text is None:
+            return None
+        self.hits += 1
+        metrics.incr("hl.cache_hits")
+        return _CachedResponse(text)
+
+    def request_info(self, payload: Dict[str, Any], timeout: Optional[float] = None):
+        if not self._cacheable(payload):
+            return self._inner.request_info(payload, timeout=timeout)
+        hit = self.cached(payload)
+        if hit is not None:
+            return hit
+        self.misses += 1
+        metrics.incr("hl.cache_misses")
+        r = self._inner.request_info(payload, timeout=timeout)
+        if getattr(r, "status_code", None) == 200:
+            self._cache.put(payload["user"], payload["startTime"], payload["endTime"], r.text)
+        return r
+
+    def close(self) -> None:
+        self._inner.close()
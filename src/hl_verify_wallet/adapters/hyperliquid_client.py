@@ -1,19 +1,127 @@
 # src/hl_verify_wallet/adapters/hyperliquid_client.py
-from typing import Dict, Any, Optional
+import threading, time
+from typing import Callable, Dict, Any, Optional
 import httpx
+from .powertools_logger import metrics
+
+try:  # HTTP/2 דורש את h2 (pip install httpx[http2]); בלעדיו – HTTP/1.1 keep-alive
+    import h2  # noqa: F401
+    _HAS_H2 = True
+except ImportError:  # pragma: no cover
+    _HAS_H2 = False
+
+# שגיאות transport שמעידות על חיבור מת (NAT/LB סגר אותו בזמן שה-Lambda היה קפוא)
+_STALE_ERRORS = (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError, httpx.ConnectError)
+
+class _Generation:
+    """httpx.Client אחד + מספר הבקשות שרצות עליו כרגע; retired → נסגר כשהאחרונה מסתיימת."""
+    __slots__ = ("client", "users", "retired")
+
+    def __init__(self, client: httpx.Client):
+        self.client = client
+        self.users = 0
+        self.retired = False
 
 class HLClient:
-    """לקוח מינימלי ל-/info של Hyperliquid (POST JSON)."""
-    def __init__(self, base_url: str, timeout: float = 15.0):
+    """
+    לקוח מינימלי ל-/info של Hyperliquid (POST JSON).
+    מיועד לחיות לאורך invocations "חמות": connection pool עם keep-alive, HTTP/2 כשאפשר, gzip.
+    חיבור שלא היה בשימוש יותר מ-max_idle_sec נבנה מחדש לפני הבקשה הבאה (ה-socket כנראה מת),
+    ושגיאת transport על חיבור ישן גורמת ל-rebuild וניסיון חוזר אחד.
+    Thread-safe: כל בקשה מחזיקה את ה-generation שלה, ו-rebuild סוגר את הלקוח הישן רק אחרי
+    שכל הבקשות שרצות עליו הסתיימו.
+    """
+    def __init__(self, base_url: str, timeout: float = 15.0, *, http2: bool = True,
+                 max_connections: int = 16, keepalive_expiry_sec: float = 60.0,
+                 max_idle_sec: float = 240.0, clock: Callable[[], float] = time.monotonic):
         self._base = base_url.rstrip("/")
-        self._client = httpx.Client(timeout=timeout)
+        self._timeout = timeout
+        self._http2 = http2 and _HAS_H2
+        self._limits = httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections,
+                                    keepalive_expiry=keepalive_expiry_sec)
+        self._max_idle = max_idle_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._gen = _Generation(self._new_client())
+        self._last_used = clock()
+        self.rebuilds = 0
+
+    def _new_client(self) -> httpx.Client:
+        return httpx.Client(timeout=self._timeout, http2=self._http2, limits=self._limits,
+                            headers={"Accept-Encoding": "gzip"})
+
+    def _retire_locked(self) -> Optional[httpx.Client]:
+        """מחליף generation (תחת self._lock). מחזיר את הלקוח הישן אם אפשר לסגור אותו מיד."""
+        old = self._gen
+        self._gen = _Generation(self._new_client())
+        self.rebuilds += 1
+        metrics.incr("hl.client_rebuilds")
+        old.retired = True
+        return old.client if old.users == 0 else None
+
+    def _rebuild(self, stale: _Generation) -> None:
+        with self._lock:
+            if self._gen is not stale:
+                return   # thread אחר כבר בנה מחדש
+            to_close = self._retire_locked()
+        if to_close is not None:
+            to_close.close()
+
+    def _acquire(self) -> _Generation:
+        to_close = None
+        with self._lock:
+            now = self._clock()
+            if now - self._last_used > self._max_idle:
+                to_close = self._retire_locked()
+            self._last_used = now
+            gen = self._gen
+            gen.users += 1
+        if to_close is not None:
+            to_close.close()
+        return gen
+
+    def _release(self, gen: _Generation) -> None:
+        with self._lock:
+            gen.users -= 1
+            close = gen.retired and gen.users == 0
+        if close:
+            gen.client.close()
+
+    def cached(self, payload: Dict[str, Any]) -> Optional[Any]:
+        """תשובה מקומית בלי רשת (למשל מ-CachingHLClient), או None. הלקוח הבסיסי לא שומר כלום."""
+        return None
 
     def request_info(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> httpx.Response:
         # הדוקס: POST https://api.hyperliquid.xyz/info עם JSON בגוף.  :contentReference[oaicite:5]{index=5}
-        return self._client.post(self._base, json=payload, timeout=timeout)
+        with metrics.timer("hl.request_ms"):
+            gen = self._acquire()
+            try:
+                r = gen.client.post(self._base, json=payload, timeout=timeout)
+            except _STALE_ERRORS:
+                self._rebuild(gen)
+                stale, gen = gen, None
+                self._release(stale)
+                gen = self._acquire()
+                r = gen.client.post(self._base, json=payload, timeout=timeout)
+            finally:
+                if gen is not None:
+                    self._release(gen)
+        metrics.incr("hl.requests")
+        metrics.incr("hl.bytes", int(r.headers.get("content-length") or len(r.content)))
+        if r.status_code == 429:
+            metrics.incr("hl.throttled")
+        elif r.status_code >= 500:
+            metrics.incr("hl.server_errors")
+        return r
 
     def close(self) -> None:
-        self._client.close()
+        with self._lock:
+            gen = self._gen
+            gen.retired = True
+            close = gen.users == 0
+        if close:
+            gen.client.close()
 
     def __enter__(self): return self
     def __exit__(self, exc_type, exc, tb): self.close()
@@ -1,27 +1,133 @@
 # src/hl_verify_wallet/adapters/hyperliquid_info_provider.py
-from typing import Iterable, Optional
+import queue, threading
+from typing import Iterable, Iterator, List, Optional
 from decimal import Decimal
 from ..ports.fill_provider import FillProvider
 from ..domain.models import Fill
 from ..domain.time_window import TimeWindow
+from ..domain.digest import DAY_MS
 from .hyperliquid_client import HLClient
-from ..services.backfill.hl_backfill import HLBackfillService
-from .sinks.memory_sink import MemorySink
+from .hl_page_cache import HLPageCache, CachingHLClient
+from ..ports.rate_limiter import RateLimiter
+from ..services.backfill.hl_backfill import HLBackfillService, PAGE_CAP
+from .sinks.queue_sink import QueueSink
+from .sinks.batch_sink import BatchSink
+from ..domain.fill_batch import FillBatch
+from ..errors import HLCancelledError
+
+# רשימות (כל אחת עד עמוד) שה-backfill יכול להקדים את הצרכן של fetch_fills
+_QUEUE_BATCHES = 4
 
 class HyperliquidInfoProvider(FillProvider):
-    def __init__(self, base_url: str, timeout_sec: float = 15.0, retries: int = 5):
+    def __init__(self, base_url: str, timeout_sec: float = 15.0, retries: int = 5,
+                 shards: int = 1, max_concurrency: int = 4,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 shard_ms: Optional[int] = None,
+                 page_cache: Optional[HLPageCache] = None, ahead_safety_ms: int = 300_000,
+                 pipeline_depth: int = 0, http2: bool = True, client: Optional[HLClient] = None,
+                 page_cap: int = PAGE_CAP):
         self._base = base_url.rstrip("/")
         self._timeout = timeout_sec
         self._retries = retries
+        self._shards = shards
+        self._max_concurrency = max_concurrency
+        self._rate_limiter = rate_limiter
+        # עם page cache – תמיד shards מיושרים: process_wallet מפתח כל עמוד לפי ה-end_ms של הבקשה,
+        # ואז ריצה חוזרת עם end_ms מאוחר יותר לא פוגעת באף עמוד
+        self._shard_ms = shard_ms or (DAY_MS if page_cache is not None else None)
+        self._cache = page_cache
+        self._ahead_safety_ms = ahead_safety_ms
+        self._pipeline_depth = pipeline_depth
+        self._http2 = http2
+        self._page_cap = page_cap
+        # לקוח אחד לכל חיי ה-provider (ב-Lambda: לאורך invocations חמות) – בלי TLS handshake לכל קריאה
+        if client is not None and page_cache is not None:
+            client = CachingHLClient(client, page_cache, ahead_safety_ms=ahead_safety_ms)
+        self._client = client
+        self._client_lock = threading.Lock()
+
+    def _http(self) -> HLClient:
+        with self._client_lock:
+            if self._client is None:
+                client = HLClient(self._base, timeout=self._timeout, http2=self._http2,
+                                  max_connections=max(self._max_concurrency, 4))
+                if self._cache is not None:
+                    client = CachingHLClient(client, self._cache, ahead_safety_ms=self._ahead_safety_ms)
+                self._client = client
+            return self._client
+
+    def close(self) -> None:
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def _backfill(self, wallet: str, window: TimeWindow, sink,
+                  cancel: Optional[threading.Event] = None) -> int:
+        svc = HLBackfillService(self._http(), retries=self._retries, timeout_sec=self._timeout,
+                                rate_limiter=self._rate_limiter, page_cap=self._page_cap,
+                                cancel=cancel)
+        if self._shards > 1 or self._shard_ms:
+            return svc.process_wallet_sharded(wallet, window, sink,
+                                              shards=self._shards,
+                                              max_concurrency=self._max_concurrency,
+                                              shard_ms=self._shard_ms)
+        if self._pipeline_depth > 0:
+            return svc.process_wallet_pipelined(wallet, window, sink, queue_pages=self._pipeline_depth)
+        return svc.process_wallet(wallet, window, sink)
 
     def fetch_fills(self, wallet: str, window: TimeWindow, coin: Optional[str] = None) -> Iterable[Fill]:
+        return self._fetch(wallet, window, coin, None)
+
+    def fetch_fills_cancellable(self, wallet: str, window: TimeWindow, coin: Optional[str] = None,
+                                *, cancel: threading.Event) -> Iterable[Fill]:
+        # cancel מגיע עד fetch_page: אחרי ביטול לא יוצאות עוד בקשות ולא נצרך עוד משקל מהדלי
+        return self._fetch(wallet, window, coin, cancel)
+
+    def _fetch(self, wallet: str, window: TimeWindow, coin: Optional[str],
+               cancel: Optional[threading.Event]) -> Iterator[Fill]:
+        """
+        generator: ה-backfill רץ ב-thread משלו וכותב ל-QueueSink חסום, וה-fills נפלטים תוך כדי
+        הדפדוף – בזיכרון לכל היותר _QUEUE_BATCHES עמודים (ובנתיב ה-sharded גם ה-shards שבדרך).
+        סגירת ה-generator או cancel עוצרים את ה-backfill בבקשה הבאה שלו.
+        """
         # הערה: userFillsByTime לא תומך בפרמטר 'n' — ההחזר מוגבל ע"י השרת.  :contentReference[oaicite:13]{index=13}
-        with HLClient(self._base, timeout=self._timeout) as client:
-            svc = HLBackfillService(client, retries=self._retries, timeout_sec=self._timeout)
-            sink = MemorySink()
-            total = svc.process_wallet(wallet, window, sink)
-            # סינון coin אם התבקש
-            rows = sink.rows
-            if coin:
-                rows = [r for r in rows if r.coin == coin]
-            return rows
+        stop = threading.Event()
+        q: "queue.Queue" = queue.Queue(maxsize=_QUEUE_BATCHES)
+        sink = QueueSink(q, stop, batch_size=self._page_cap)
+        errors: List[BaseException] = []
+
+        def backfill() -> None:
+            try:
+                self._backfill(wallet, window, sink, stop)
+            except BaseException as e:  # noqa: BLE001 – נזרק מה-generator אחרי ה-fills שכבר נמסרו
+                errors.append(e)
+            finally:
+                sink.close()
+
+        threading.Thread(target=backfill, name=f"hl-fills-{wallet[:10]}", daemon=True).start()
+        try:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise HLCancelledError("fetch_fills cancelled")
+                try:
+                    rows = q.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if rows is QueueSink.END:
+                    break
+                # סינון coin אם התבקש
+                for r in rows:
+                    if not coin or r.coin == coin:
+                        yield r
+        finally:
+            stop.set()   # אחרי END ה-thread כבר סיים; אחרת (close/cancel/שגיאה) – עוצר אותו
+        if errors:
+            raise errors[0]
+
+    def fetch_fill_batch(self, wallet: str, window: TimeWindow, coin: Optional[str] = None) -> FillBatch:
+        sink = BatchSink()
+        self._backfill(wallet, window, sink)
+        if not coin:
+            return sink.batch
+        return FillBatch.from_fills(f for f in sink.batch if f.coin == coin)
@@ -0,0 +1,156 @@
+# src/hl_verify_wallet/adapters/powertools_logger.py
+import json, sys, threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+# גבולות עליונים (ms) לדליי ההיסטוגרמה; האחרון פתוח
+_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+class _Histogram:
+    __slots__ = ("count", "sum", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(_BOUNDS_MS) + 1)
+
+    def add(self, v: float) -> None:
+        self.count += 1
+        self.sum += v
+        self.min = min(self.min, v)
+        self.max = max(self.max, v)
+        self.buckets[bisect_left(_BOUNDS_MS, v)] += 1
+
+    def quantile(self, q: float) -> float:
+        """הערכה לפי הגבול העליון של הדלי (ולא יותר מה-max שנצפה)."""
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.buckets):
+            seen += c
+            if c and seen >= rank:
+                return min(self.max, _BOUNDS_MS[i]) if i < len(_BOUNDS_MS) else self.max
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": round(self.sum, 3),
+                "min": round(self.min, 3) if self.count else 0.0, "max": round(self.max, 3),
+                "p50": round(self.quantile(0.5), 3), "p99": round(self.quantile(0.99), 3)}
+
+class Metrics:
+    """
+    מדדים לשלבי האימות (בלי תלות ב-aws-lambda-powertools):
+    - timer/observe: היסטוגרמות latency ב-ms (Unit=Milliseconds)
+    - incr: counters (בקשות, bytes, retries, 429, שורות לכל שלב)
+    snapshot() ל-JSON של ה-response; emit() כותב שורת EMF אחת ל-stdout, ש-CloudWatch Logs
+    הופך למדדים. thread-safe – נאסף גם מ-threads של shards/pipeline/prefetch.
+    """
+    def __init__(self, namespace: str = "hl-verify-wallet", service: str = "verify-wallet"):
+        self.namespace = namespace
+        self.service = service
+        self._lock = threading.Lock()
+        self._hist: Dict[str, _Histogram] = {}
+        self._counters: Dict[str, float] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+
+    def observe(self, name: str, ms: float) -> None:
+        with self._lock:
+            h = self._hist.get(name)
+            if h is None:
+                h = self._hist[name] = _Histogram()
+            h.add(ms)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - t0) * 1000)
+
+    def metered(self, stage: str, fetch: Callable[[], Iterable]) -> "_Metered":
+        """
+        מריץ fetch() ועוטף את ה-iterator שחזר: הזמן של הקריאה עצמה ושל כל next()
+        (משיכה + פענוח של הספק) נצבר ל-<stage>.fetch_ms, ומספר השורות ל-<stage>.rows.
+        מה שהצרכן עושה בין השורות לא נספר – כך רואים כמה מזמן ה-compare הוא המתנה לספק.
+        """
+        return _Metered(self, stage, fetch)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"timers_ms": {k: h.as_dict() for k, h in sorted(self._hist.items())},
+                    "counters": dict(sorted(self._counters.items()))}
+
+    def to_emf(self, dimensions: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        dims = {"service": self.service, **(dimensions or {})}
+        defs: List[Dict[str, str]] = []
+        doc: Dict[str, Any] = dict(dims)
+        with self._lock:
+            for name, h in sorted(self._hist.items()):
+                values, counts = _emf_distribution(h)
+                defs.append({"Name": name, "Unit": "Milliseconds"})
+                doc[name] = {"Values": values, "Counts": counts}
+            for name, v in sorted(self._counters.items()):
+                defs.append({"Name": name, "Unit": "Bytes" if name.endswith("bytes") else "Count"})
+                doc[name] = v
+        doc["_aws"] = {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{"Namespace": self.namespace,
+                                   "Dimensions": [sorted(dims)], "Metrics": defs}],
+        }
+        return doc
+
+    def emit(self, dimensions: Optional[Dict[str, str]] = None, stream: Optional[IO[str]] = None) -> None:
+        out = stream or sys.stdout
+        out.write(json.dumps(self.to_emf(dimensions), separators=(",", ":")) + "\n")
+        out.flush()
+
+def _emf_distribution(h: _Histogram) -> Tuple[List[float], List[int]]:
+    """EMF Values/Counts: נציג לכל דלי לא ריק (הגבול העליון, או ה-max לדלי הפתוח)."""
+    values, counts = [], []
+    for i, c in enumerate(h.buckets):
+        if c:
+            values.append(float(_BOUNDS_MS[i]) if i < len(_BOUNDS_MS) else round(h.max, 3))
+            counts.append(c)
+    return values, counts
+
+class _Metered:
+    def __init__(self, m: Metrics, stage: str, fetch: Callable[[], Iterable]):
+        self._m = m
+        self._stage = stage
+        self._fetch = fetch
+        self.seconds = 0.0
+        self.rows = 0
+
+    def __iter__(self) -> Iterator:
+        perf = time.perf_counter
+        t0 = perf()
+        try:
+            it = iter(self._fetch())
+            self.seconds += perf() - t0
+            while True:
+                t0 = perf()
+                try:
+                    r = next(it)
+                except StopIteration:
+                    self.seconds += perf() - t0
+                    return
+                self.seconds += perf() - t0
+                self.rows += 1
+                yield r
+        finally:
+            self._m.observe(f"{self._stage}.fetch_ms", self.seconds * 1000)
+            self._m.incr(f"{self._stage}.rows", self.rows)
+
+# מופע לתהליך: lambda_handler מאפס בתחילת כל invocation ופולט בסופה
+metrics = Metrics()
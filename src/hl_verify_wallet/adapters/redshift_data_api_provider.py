@@ -1,11 +1,18 @@
+import csv, io, time
+from itertools import groupby
+from operator import attrgetter
 import boto3
-from typing import Iterable, Optional, List
+from botocore.config import Config as BotoConfig
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from decimal import Decimal
 from ..ports.fill_provider import FillProvider
 from ..domain.models import Fill
+from ..domain.digest import BucketDigest, BucketKey
 from ..domain.time_window import TimeWindow
+from .powertools_logger import metrics
 
-_SQL = """
+_SELECT = """
 SELECT wallet,
        coin,
        CASE WHEN side='A' THEN 'A' ELSE 'B' END as side,
@@ -19,35 +26,210 @@ SELECT wallet,
        counterparty,
        notional_usd
 FROM {schema}.{table}
-WHERE wallet = :wallet
+"""
+
+_WHERE = """
+WHERE {wallet_filter}
   AND coin NOT LIKE '@%%'
   AND ts >= (TIMESTAMP 'epoch' + (:start_ms/1000.0) * INTERVAL '1 second')
   AND ts <  (TIMESTAMP 'epoch' + (:end_ms/1000.0)   * INTERVAL '1 second')
   {coin_filter}
-ORDER BY ts
 """
 
+_SQL = _SELECT + _WHERE + "ORDER BY ts\n"
+
+# כמה ארנקים ב-statement אחד: wallet IN (...) ממוין לפי (wallet, ts) ומפוצל ל-iterator לכל ארנק
+_SQL_MANY = _SELECT + _WHERE + "ORDER BY wallet, ts\n"
+
+_COUNT_SQL = "SELECT COUNT(*) AS n FROM {schema}.{table}" + _WHERE
+
+# תקציר לכל (coin, דלי): אותו חישוב כמו domain.digest.digest_fills, אבל בתוך Redshift –
+# חוזרת שורה לכל דלי במקום שורה לכל fill
+_DIGEST_SQL = """
+SELECT coin,
+       FLOOR(EXTRACT(EPOCH FROM ts)*1000 / :bucket_ms)::bigint * :bucket_ms AS bucket_ms,
+       COUNT(*) AS n,
+       SUM(sz) AS sz,
+       SUM(notional_usd) AS notional,
+       SUM(STRTOL(LEFT(MD5(trade_id::varchar), 8), 16)) AS id_hash
+FROM {schema}.{table}
+""" + _WHERE + "GROUP BY 1, 2\n"
+
+RESULT_FORMATS = ("json", "csv", "auto")
+
+_RUNNING = ("SUBMITTED", "PICKED", "STARTED")
+
+def _to_str(v: Any) -> str:
+    return v if isinstance(v, str) else str(v)
+
+def _to_int(v: Any) -> int:
+    if isinstance(v, int):
+        return v
+    return int(Decimal(_to_str(v)))
+
+def _to_dec(v: Any) -> Decimal:
+    return Decimal(v) if isinstance(v, str) else Decimal(str(v))
+
+# עמודת SELECT → (שדה ב-Fill, ממיר). הסדר כאן הוא סדר השדות של Fill.
+_FILL_FIELDS: Tuple[Tuple[str, Callable[[Any], Any]], ...] = (
+    ("wallet", _to_str),
+    ("coin", _to_str),
+    ("side", _to_str),
+    ("px", _to_dec),
+    ("sz", _to_dec),
+    ("ts_ms", _to_int),
+    ("hash", _to_str),
+    ("base_tid", _to_int),
+    ("role", _to_str),
+    ("counterparty", _to_str),
+    ("trade_id", _to_int),
+    ("notional_usd", _to_dec),
+)
+
+# ColumnMetadata.typeName → המפתח שבו Data API מחזיר את הערך ב-Field
+_VALUE_KEY_BY_TYPE = {
+    "int2": "longValue", "int4": "longValue", "int8": "longValue",
+    "smallint": "longValue", "integer": "longValue", "bigint": "longValue",
+    "float4": "doubleValue", "float8": "doubleValue", "float": "doubleValue",
+    "double precision": "doubleValue", "real": "doubleValue",
+    "bool": "booleanValue", "boolean": "booleanValue",
+}
+
+def _field_plan(column_metadata: List[Dict[str, Any]]) -> List[Tuple[int, str, Callable[[Any], Any]]]:
+    """
+    מחשב פעם אחת לכל statement: לכל שדה של Fill – אינדקס העמודה, מפתח הערך והממיר.
+    numeric/varchar/timestamp וכו' מגיעים כ-stringValue.
+    """
+    idx = {c["name"].lower(): i for i, c in enumerate(column_metadata)}
+    plan = []
+    for name, conv in _FILL_FIELDS:
+        if name not in idx:
+            raise RuntimeError(f"Redshift result is missing column '{name}'")
+        i = idx[name]
+        type_name = str(column_metadata[i].get("typeName", "")).lower()
+        plan.append((i, _VALUE_KEY_BY_TYPE.get(type_name, "stringValue"), conv))
+    return plan
+
+def _decode(cell: Dict[str, Any], key: str) -> Any:
+    v = cell.get(key)
+    if v is None and cell and not cell.get("isNull"):
+        # טיפוס שלא מופה – לוקחים את הערך היחיד שקיים
+        v = next(iter(cell.values()))
+    return v
+
+class _Lines:
+    """iterator שורות ל-csv.reader ששומר את השורות הגולמיות של הרשומה האחרונה (שדה במרכאות יכול לחצות שורות)."""
+    __slots__ = ("_it", "_raw")
+
+    def __init__(self, text: str):
+        self._it = iter(text.splitlines(keepends=True))
+        self._raw: List[str] = []
+
+    def __iter__(self): return self
+
+    def __next__(self) -> str:
+        line = next(self._it)
+        self._raw.append(line)
+        return line
+
+    def take(self) -> str:
+        raw = "".join(self._raw).rstrip("\r\n")
+        self._raw = []
+        return raw
+
+def _unquoted_empty(raw: str) -> List[bool]:
+    """לכל שדה בשורת CSV גולמית: True אם הוא ריק ובלי מרכאות (NULL), False אחרת (כולל "")."""
+    out: List[bool] = []
+    i, n = 0, len(raw)
+    while True:
+        if i < n and raw[i] == '"':
+            i += 1
+            while True:
+                j = raw.index('"', i)
+                if j + 1 < n and raw[j + 1] == '"':   # "" בתוך שדה במרכאות = מרכאה
+                    i = j + 2
+                    continue
+                i = j + 1
+                break
+            out.append(False)
+        else:
+            j = raw.find(",", i)
+            if j < 0:
+                j = n
+            out.append(j == i)
+            i = j
+        if i >= n:
+            return out
+        i += 1
+
+def _csv_to_fills(text: str, plan: List[Tuple[int, str, Callable[[Any], Any]]],
+                  header: Optional[List[str]] = None) -> Iterator[Fill]:
+    """
+    פענוח bulk של בלוק CSV (csv.reader ב-C). שדה ריק בלי מרכאות = NULL, "" = מחרוזת ריקה.
+    csv.reader מחזיר '' לשניהם, ולכן רק בלוק שמכיל "" עובר למסלול ששומר את השורה הגולמית.
+    """
+    if '""' not in text:
+        for row in csv.reader(io.StringIO(text)):
+            if not row or (header is not None and row == header):
+                continue
+            yield Fill(*[conv(row[i]) if row[i] != "" else None for i, _, conv in plan])
+        return
+    lines = _Lines(text)
+    for row in csv.reader(lines):
+        raw = lines.take()
+        if not row or (header is not None and row == header):
+            continue
+        nulls = None
+        vals = []
+        for i, _, conv in plan:
+            v = row[i]
+            if v != "":
+                vals.append(conv(v))
+            elif conv is _to_str:
+                if nulls is None:
+                    nulls = _unquoted_empty(raw)
+                vals.append(None if nulls[i] else "")
+            else:
+                vals.append(None)
+        yield Fill(*vals)
+
+def _records_to_fills(records: List[List[Dict[str, Any]]],
+                      plan: List[Tuple[int, str, Callable[[Any], Any]]]) -> Iterator[Fill]:
+    for r in records:
+        vals = []
+        for i, key, conv in plan:
+            v = _decode(r[i], key)
+            vals.append(conv(v) if v is not None else None)
+        yield Fill(*vals)
+
+# TCP keep-alive: החיבור ל-Data API שורד בין invocations חמות (ה-provider נשמר ב-app)
+_BOTO_CONFIG = BotoConfig(tcp_keepalive=True, max_pool_connections=4, retries={"mode": "standard"})
+
 class RedshiftDataApiProvider(FillProvider):
     def __init__(self, workgroup_or_cluster: str, database: str, secret_arn: str,
-                 schema: str, table: str):
-        self._client = boto3.client("redshift-data")
+                 schema: str, table: str, *, client=None,
+                 poll_initial_sec: float = 0.05, poll_max_sec: float = 2.0,
+                 max_wait_sec: float = 900.0, sleep: Callable[[float], None] = time.sleep,
+                 result_format: str = "json", csv_row_threshold: int = 200_000,
+                 batch_wallets: int = 100):
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"result_format must be one of {RESULT_FORMATS}")
+        self._client = client if client is not None else boto3.client("redshift-data", config=_BOTO_CONFIG)
         self._wg_or_cluster = workgroup_or_cluster
         self._db = database
         self._secret = secret_arn
         self._schema = schema
         self._table = table
+        self._poll_initial = poll_initial_sec
+        self._poll_max = poll_max_sec
+        self._max_wait = max_wait_sec
+        self._sleep = sleep
+        self._result_format = result_format
+        self._csv_threshold = csv_row_threshold
+        self._batch_wallets = batch_wallets
 
-    def fetch_fills(self, wallet: str, window: TimeWindow, coin: Optional[str]=None) -> Iterable[Fill]:
-        coin_filter = "AND coin = :coin" if coin else ""
-        sql = _SQL.format(schema=self._schema, table=self._table, coin_filter=coin_filter)
-        params = [
-            {"name":"wallet","value":{"stringValue":wallet}},
-            {"name":"start_ms","value":{"longValue":window.start_ms}},
-            {"name":"end_ms","value":{"longValue":window.end_ms}},
-        ]
-        if coin:
-            params.append({"name":"coin","value":{"stringValue":coin}})
-        exec_args = dict(
+    def _exec_args(self, sql: str, params: List[Dict[str, Any]]) -> Dict[str, Any]:
+        exec_args: Dict[str, Any] = dict(
             Database=self._db,
             SecretArn=self._secret,
             Sql=sql,
@@ -59,43 +241,146 @@ class RedshiftDataApiProvider(FillProvider):
             exec_args["WorkgroupName"] = self._wg_or_cluster
         else:
             exec_args["ClusterIdentifier"] = self._wg_or_cluster.replace("cluster:","")
+        return exec_args
 
-        sid = self._client.execute_statement(**exec_args)["Id"]
+    def _wait(self, sid: str) -> Dict[str, Any]:
+        """Polling עם backoff אקספוננציאלי (במקום busy-loop על describe_statement)."""
+        with metrics.timer("us.redshift_wait_ms"):
+            return self._poll(sid)
+
+    def _poll(self, sid: str) -> Dict[str, Any]:
+        delay = self._poll_initial
+        waited = 0.0
         desc = self._client.describe_statement(Id=sid)
-        while desc["Status"] in ("SUBMITTED","PICKED","STARTED"):
+        while desc["Status"] in _RUNNING:
+            if waited >= self._max_wait:
+                raise RuntimeError(f"Redshift Data API timed out after {waited:.1f}s: {sid}")
+            self._sleep(delay)
+            waited += delay
+            delay = min(delay * 2, self._poll_max)
             desc = self._client.describe_statement(Id=sid)
         if desc["Status"] != "FINISHED":
             raise RuntimeError(f"Redshift Data API failed: {desc}")
-        rows = self._client.get_statement_result(Id=sid)["Records"]
-
-        out: List[Fill] = []
-        for r in rows:
-            # הסדר תואם ל-SELECT
-            wallet_v   = list(r[0].values())[0]
-            coin_v     = list(r[1].values())[0]
-            side_v     = list(r[2].values())[0]
-            px_v       = list(r[3].values())[0]
-            sz_v       = list(r[4].values())[0]
-            ts_ms_v    = list(r[5].values())[0]
-            hash_v     = list(r[6].values())[0] if r[6] else None
-            base_tid_v = list(r[7].values())[0] if r[7] else None
-            trade_id_v = list(r[8].values())[0] if r[8] else None
-            role_v     = list(r[9].values())[0] if r[9] else None
-            counter_v  = list(r[10].values())[0] if r[10] else None
-            notional_v = list(r[11].values())[0] if r[11] else None
-
-            out.append(Fill(
-                wallet=wallet_v,
-                coin=coin_v,
-                side=side_v,
-                px=Decimal(str(px_v)),
-                sz=Decimal(str(sz_v)),
-                ts_ms=int(ts_ms_v),
-                hash=hash_v,
-                base_tid=int(base_tid_v) if base_tid_v is not None else None,
-                role=role_v,
-                counterparty=counter_v,
-                trade_id=int(trade_id_v) if trade_id_v is not None else None,
-                notional_usd=Decimal(str(notional_v)) if notional_v is not None else None,
-            ))
+        return desc
+
+    def _iter_result_pages(self, sid: str, get_page=None) -> Iterator[Dict[str, Any]]:
+        """
+        עובר על כל עמודי התוצאה לפי NextToken.
+        העמוד הבא נמשך ברקע בזמן שהצרכן מעבד את העמוד הנוכחי.
+        """
+        get_page = get_page or self._client.get_statement_result
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="rs-page") as ex:
+            fut = ex.submit(get_page, Id=sid)
+            while fut is not None:
+                page = fut.result()
+                token = page.get("NextToken")
+                fut = ex.submit(get_page, Id=sid, NextToken=token) if token else None
+                metrics.incr("us.redshift_pages")
+                yield page
+
+    def _iter_fills(self, sid: str) -> Iterator[Fill]:
+        plan = None
+        for page in self._iter_result_pages(sid):
+            if plan is None:
+                plan = _field_plan(page["ColumnMetadata"])
+            yield from _records_to_fills(page.get("Records", []), plan)
+
+    def _iter_fills_csv(self, sid: str) -> Iterator[Fill]:
+        # GetStatementResultV2: Records = [{"CSVRecords": "..."}], אותה ColumnMetadata
+        plan = header = None
+        for page in self._iter_result_pages(sid, self._client.get_statement_result_v2):
+            if plan is None:
+                plan = _field_plan(page["ColumnMetadata"])
+                header = [c["name"] for c in page["ColumnMetadata"]]
+            for rec in page.get("Records", []):
+                yield from _csv_to_fills(rec.get("CSVRecords", ""), plan, header)
+
+    def _count_rows(self, where_fmt: Dict[str, str], params: List[Dict[str, Any]]) -> int:
+        sql = _COUNT_SQL.format(**where_fmt)
+        sid = self._client.execute_statement(**self._exec_args(sql, params))["Id"]
+        self._wait(sid)
+        records = self._client.get_statement_result(Id=sid)["Records"]
+        return _to_int(_decode(records[0][0], "longValue")) if records else 0
+
+    def _choose_format(self, where_fmt: Dict[str, str], params: List[Dict[str, Any]]) -> str:
+        if self._result_format != "auto":
+            return self._result_format
+        # COUNT(*) זול מול העברת מיליוני רשומות JSON – מחליטים לפי כמות השורות.
+        # זה statement נוסף לכל fetch / batch / טווח reconcile, ולכן auto הוא opt-in ולא ברירת המחדל.
+        return "csv" if self._count_rows(where_fmt, params) >= self._csv_threshold else "json"
+
+    def _where(self, wallet: Union[str, List[str]], window: TimeWindow,
+               coin: Optional[str]) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+        """wallet יחיד → wallet = :wallet; רשימה → wallet IN (:w0, :w1, ...)."""
+        if isinstance(wallet, str):
+            wallet_filter = "wallet = :wallet"
+            params = [{"name":"wallet","value":{"stringValue":wallet}}]
+        else:
+            wallet_filter = "wallet IN (" + ", ".join(f":w{i}" for i in range(len(wallet))) + ")"
+            params = [{"name":f"w{i}","value":{"stringValue":w}} for i, w in enumerate(wallet)]
+        where_fmt = dict(schema=self._schema, table=self._table, wallet_filter=wallet_filter,
+                         coin_filter="AND coin = :coin" if coin else "")
+        params += [
+            {"name":"start_ms","value":{"longValue":window.start_ms}},
+            {"name":"end_ms","value":{"longValue":window.end_ms}},
+        ]
+        if coin:
+            params.append({"name":"coin","value":{"stringValue":coin}})
+        return where_fmt, params
+
+    def fetch_digests(self, wallet: str, window: TimeWindow, bucket_ms: int,
+                      coin: Optional[str] = None) -> Dict[BucketKey, BucketDigest]:
+        """GROUP BY coin, דלי – ה-aggregation רץ ב-Redshift; מועברת שורה אחת לכל דלי."""
+        where_fmt, params = self._where(wallet, window, coin)
+        params.append({"name":"bucket_ms","value":{"longValue":int(bucket_ms)}})
+        sid = self._client.execute_statement(**self._exec_args(_DIGEST_SQL.format(**where_fmt), params))["Id"]
+        self._wait(sid)
+        out: Dict[BucketKey, BucketDigest] = {}
+        keys = None
+        for page in self._iter_result_pages(sid):
+            if keys is None:
+                keys = [_VALUE_KEY_BY_TYPE.get(str(c.get("typeName", "")).lower(), "stringValue")
+                        for c in page["ColumnMetadata"]]
+            for r in page.get("Records", []):
+                coin_v, bucket, n, sz, notional, id_hash = (_decode(c, k) for c, k in zip(r, keys))
+                out[(_to_str(coin_v), _to_int(bucket))] = BucketDigest(
+                    _to_int(n), _to_dec(sz) if sz is not None else Decimal(0),
+                    _to_dec(notional) if notional is not None else Decimal(0),
+                    _to_int(id_hash) if id_hash is not None else 0)
+        metrics.incr("us.digest_buckets", len(out))
         return out
+
+    def _execute_fills(self, sql_template: str, where_fmt: Dict[str, str],
+                       params: List[Dict[str, Any]]) -> Iterator[Fill]:
+        # ה-statement רץ מיד; השורות נמשכות ומפוענחות בזרימה (generator) לפי ה-ORDER BY
+        fmt = self._choose_format(where_fmt, params)
+        exec_args = self._exec_args(sql_template.format(**where_fmt), params)
+        if fmt == "csv":
+            exec_args["ResultFormat"] = "CSV"
+        sid = self._client.execute_statement(**exec_args)["Id"]
+        self._wait(sid)
+        return self._iter_fills_csv(sid) if fmt == "csv" else self._iter_fills(sid)
+
+    def fetch_fills(self, wallet: str, window: TimeWindow, coin: Optional[str]=None) -> Iterable[Fill]:
+        where_fmt, params = self._where(wallet, window, coin)
+        return self._execute_fills(_SQL, where_fmt, params)
+
+    def fetch_fills_many(self, wallets: Sequence[str], window: TimeWindow,
+                         coin: Optional[str] = None) -> Iterator[Tuple[str, Iterator[Fill]]]:
+        """
+        statement אחד לכל batch_wallets ארנקים (wallet IN (...), ORDER BY wallet, ts) במקום statement לארנק –
+        תור ה-WLM וה-compile משולמים פעם אחת ל-batch. הזרם מפוצל ב-groupby ל-(wallet, iterator):
+        כמו ב-groupby, ה-iterator תקף רק עד שמבקשים את הבא. ארנקים בלי שורות מגיעים בסוף ה-batch
+        עם iterator ריק.
+        """
+        wallets = list(dict.fromkeys(wallets))
+        for i in range(0, len(wallets), self._batch_wallets):
+            chunk = wallets[i:i + self._batch_wallets]
+            where_fmt, params = self._where(chunk, window, coin)
+            fills = self._execute_fills(_SQL_MANY, where_fmt, params)
+            metrics.incr("us.batch_statements")
+            pending = {w.lower(): w for w in chunk}
+            for w, group in groupby(fills, key=attrgetter("wallet")):
+                yield pending.pop(w.lower(), w), group
+            for w in pending.values():
+                yield w, iter(())
@@ -0,0 +1,19 @@
+# src/hl_verify_wallet/adapters/sinks/batch_sink.py
+from ...ports.sink import FillSink
+from ...domain.models import Fill
+from ...domain.fill_batch import FillBatch
+
+class BatchSink(FillSink):
+    """כמו MemorySink, אבל שומר לתוך FillBatch עמודתי במקום רשימת Fill."""
+    def __init__(self, batch_size: int = 1000):
+        self.batch = FillBatch()
+        self._batch = batch_size
+
+    def add(self, f: Fill) -> None:
+        self.batch.append(f)
+
+    def should_flush(self) -> bool:
+        return False
+
+    def flush(self) -> None:
+        pass
@@ -0,0 +1,193 @@
+# src/hl_verify_wallet/adapters/sinks/file_sink.py
+import csv, gzip, io, json, os, time
+from abc import abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+from ...ports.sink import FillSink
+from ...domain.models import Fill
+from ...services.normalize.trade_row import fill_to_dict
+
+_COLUMNS = ["wallet", "ts_ms", "coin", "side", "px", "sz", "base_tid", "trade_id", "role", "notional_usd", "hash"]
+
+def _row(f: Fill) -> Dict[str, Any]:
+    return {"wallet": f.wallet, **fill_to_dict(f)}
+
+class _BufferedFileSink(FillSink):
+    """
+    בסיס ל-sinks על קבצים:
+    - מחזיק לכל היותר batch_size שורות בזיכרון; flush כותב את כל ה-batch בבת אחת
+    - roll לקובץ חדש לפי גודל (max_file_bytes) או גיל (max_file_age_sec)
+    - fsync מקובץ: אחד לכל fsync_every flushes (0 = בלי fsync, רק בסגירה)
+    abstract: כל format מממש _write_batch (ואופציונלית את ה-format hooks).
+    """
+    ext = ""
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        prefix: str = "fills",
+        batch_size: int = 10_000,
+        max_file_bytes: int = 256 * 1024 * 1024,
+        max_file_age_sec: Optional[float] = None,
+        compress: bool = False,
+        fsync_every: int = 1,
+        clock: Callable[[], float] = time.time,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        os.makedirs(directory, exist_ok=True)
+        self._dir = directory
+        self._prefix = prefix
+        self._batch = batch_size
+        self._max_bytes = max_file_bytes
+        self._max_age = max_file_age_sec
+        self._compress = compress
+        self._fsync_every = fsync_every
+        self._clock = clock
+        self._buf: List[Fill] = []
+        self._raw = None            # הקובץ הפיזי (ל-tell/fsync)
+        self._opened_at = 0.0
+        self._seq = 0
+        self._flushes = 0
+        self.paths: List[str] = []
+        self.rows_written = 0
+
+    # ---------- FillSink ----------
+    def add(self, f: Fill) -> None:
+        self._buf.append(f)
+
+    def should_flush(self) -> bool:
+        return len(self._buf) >= self._batch
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        if self._raw is None or self._should_roll():
+            self._roll()
+        self._write_batch(self._buf)
+        self.rows_written += len(self._buf)
+        self._buf = []
+        self._flushes += 1
+        self._sync(force=False)
+
+    def close(self) -> None:
+        self.flush()
+        self._close_file()
+
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb): self.close()
+
+    # ---------- files ----------
+    def _should_roll(self) -> bool:
+        if self._raw.tell() >= self._max_bytes:
+            return True
+        return self._max_age is not None and self._clock() - self._opened_at >= self._max_age
+
+    def _roll(self) -> None:
+        self._close_file()
+        self._seq += 1
+        name = f"{self._prefix}-{int(self._clock() * 1000)}-{self._seq:05d}.{self.ext}"
+        if self._compress and self._compression_suffix():
+            name += self._compression_suffix()
+        path = os.path.join(self._dir, name)
+        self._raw = open(path, "wb")
+        self._opened_at = self._clock()
+        self.paths.append(path)
+        self._open_writer(self._raw)
+
+    def _sync(self, force: bool) -> None:
+        self._flush_writer()
+        self._raw.flush()
+        if force or (self._fsync_every and self._flushes % self._fsync_every == 0):
+            os.fsync(self._raw.fileno())
+
+    def _close_file(self) -> None:
+        if self._raw is None:
+            return
+        self._close_writer()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        self._raw = None
+
+    # ---------- format hooks ----------
+    def _compression_suffix(self) -> str:
+        return ".gz"
+
+    def _open_writer(self, raw) -> None:
+        self._out = gzip.GzipFile(fileobj=raw, mode="wb") if self._compress else raw
+
+    def _flush_writer(self) -> None:
+        if self._out is not self._raw:
+            self._out.flush()   # Z_SYNC_FLUSH – מה שנכתב ניתן לקריאה גם אם התהליך נופל
+
+    def _close_writer(self) -> None:
+        if self._out is not self._raw:
+            self._out.close()   # כותב את ה-trailer של gzip; raw נשאר פתוח
+
+    @abstractmethod
+    def _write_batch(self, rows: List[Fill]) -> None:
+        """כותב batch שלם ל-self._out (כל format בדרכו)."""
+
+class JsonlFileSink(_BufferedFileSink):
+    ext = "jsonl"
+
+    def _write_batch(self, rows: List[Fill]) -> None:
+        dumps = json.dumps
+        text = "".join(dumps(_row(f), separators=(",", ":")) + "\n" for f in rows)
+        self._out.write(text.encode("utf-8"))
+
+class CsvFileSink(_BufferedFileSink):
+    ext = "csv"
+
+    def _open_writer(self, raw) -> None:
+        super()._open_writer(raw)
+        self._header_pending = True
+
+    def _write_batch(self, rows: List[Fill]) -> None:
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        if self._header_pending:
+            w.writerow(_COLUMNS)
+            self._header_pending = False
+        for f in rows:
+            d = _row(f)
+            w.writerow(["" if d[c] is None else d[c] for c in _COLUMNS])
+        self._out.write(buf.getvalue().encode("utf-8"))
+
+class ParquetFileSink(_BufferedFileSink):
+    """כל flush = row group אחד. compress → zstd של Parquet עצמו (לא gzip חיצוני)."""
+    ext = "parquet"
+
+    def __init__(self, directory: str, **kwargs: Any):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("ParquetFileSink requires pyarrow (pip install pyarrow)") from e
+        self._pa, self._pq = pa, pq
+        self._schema = pa.schema([
+            ("wallet", pa.string()), ("ts_ms", pa.int64()), ("coin", pa.string()), ("side", pa.string()),
+            ("px", pa.string()), ("sz", pa.string()), ("base_tid", pa.int64()),
+            ("trade_id", pa.int64()), ("role", pa.string()), ("notional_usd", pa.string()),
+            ("hash", pa.string()),
+        ])
+        super().__init__(directory, **kwargs)
+
+    def _compression_suffix(self) -> str:
+        return ""
+
+    def _open_writer(self, raw) -> None:
+        self._out = self._pq.ParquetWriter(raw, self._schema,
+                                           compression="zstd" if self._compress else "none")
+
+    def _flush_writer(self) -> None:
+        pass
+
+    def _close_writer(self) -> None:
+        self._out.close()
+
+    def _write_batch(self, rows: List[Fill]) -> None:
+        dicts = [_row(f) for f in rows]
+        cols = {c: [d[c] for d in dicts] for c in _COLUMNS}
+        self._out.write_table(self._pa.table(cols, schema=self._schema))
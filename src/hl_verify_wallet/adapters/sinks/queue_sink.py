@@ -0,0 +1,42 @@
+# src/hl_verify_wallet/adapters/sinks/queue_sink.py
+import queue, threading
+from typing import Any, List
+from ...ports.sink import FillSink
+from ...domain.models import Fill
+
+class QueueSink(FillSink):
+    """
+    מעביר fills ל-thread צורך דרך תור חסום של רשימות (עד batch_size fills כל אחת).
+    flush חוסם כשהתור מלא – ה-backfill לא רץ קדימה יותר מ-maxsize רשימות – ומוותר כש-stop נקבע.
+    close() שולח END: אחריו אין עוד fills.
+    """
+    END = object()
+
+    def __init__(self, q: "queue.Queue", stop: threading.Event, batch_size: int = 1000):
+        self._q = q
+        self._stop = stop
+        self._batch = batch_size
+        self._buf: List[Fill] = []
+
+    def _put(self, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._q.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def add(self, f: Fill) -> None:
+        self._buf.append(f)
+
+    def should_flush(self) -> bool:
+        return len(self._buf) >= self._batch
+
+    def flush(self) -> None:
+        if self._buf:
+            self._put(self._buf)
+            self._buf = []
+
+    def close(self) -> None:
+        self._put(self.END)
@@ -1,4 +1,6 @@
-from typing import Dict
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional
 from ...ports.state_repository import StateRepository, WalletState
 
 class MemoryStateRepository(StateRepository):
@@ -11,5 +13,27 @@ class MemoryStateRepository(StateRepository):
             return WalletState(wallet_id=wallet_id, next_start_ms=None, finished=False)
         return st
 
+    def _put(self, wallet_id: int, **fields) -> None:
+        prev = self._db.get(wallet_id)
+        wallet = prev.wallet if prev is not None else None
+        self._db[wallet_id] = WalletState(wallet_id=wallet_id, wallet=wallet,
+                                          updated_ms=int(time.time() * 1000), **fields)
+
     def save(self, wallet_id: int, next_start_ms: int, finished: bool) -> None:
-        self._db[wallet_id] = WalletState(wallet_id=wallet_id, next_start_ms=next_start_ms, finished=finished)
+        self._put(wallet_id, next_start_ms=next_start_ms, finished=finished)
+
+    def save_checkpoint(self, wallet_id: int, chunk_start_ms: int, page_cursor: int) -> None:
+        self._put(wallet_id, next_start_ms=chunk_start_ms, finished=False, page_cursor=page_cursor)
+
+    def register(self, wallet_id: int, wallet: str) -> None:
+        prev = self._db.get(wallet_id)
+        if prev is None:
+            self._db[wallet_id] = WalletState(wallet_id=wallet_id, next_start_ms=None, finished=False,
+                                              wallet=wallet, updated_ms=0)
+        else:
+            self._db[wallet_id] = replace(prev, wallet=wallet)
+
+    def pending(self, limit: Optional[int] = None) -> List[WalletState]:
+        out = sorted((s for s in self._db.values() if not s.finished and s.wallet),
+                     key=lambda s: (s.updated_ms or 0, s.wallet_id))
+        return out[:limit] if limit is not None else out
@@ -0,0 +1,12 @@
+from typing import Dict, Optional
+from ...ports.watermark_repository import WatermarkRepository
+
+class MemoryWatermarkRepository(WatermarkRepository):
+    def __init__(self):
+        self._db: Dict[str, int] = {}
+
+    def load(self, key: str) -> Optional[int]:
+        return self._db.get(key)
+
+    def save(self, key: str, verified_until_ms: int) -> None:
+        self._db[key] = verified_until_ms
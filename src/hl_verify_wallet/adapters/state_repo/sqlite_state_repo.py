@@ -0,0 +1,163 @@
+import sqlite3, threading, time
+from typing import List, Optional, Tuple
+from ...ports.state_repository import StateRepository, WalletState
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallet_state (
+    wallet_id     INTEGER PRIMARY KEY,
+    next_start_ms INTEGER,
+    finished      INTEGER NOT NULL,
+    page_cursor   INTEGER,
+    updated_ms    INTEGER NOT NULL,
+    wallet        TEXT
+)
+"""
+
+_PENDING_INDEX = """
+CREATE INDEX IF NOT EXISTS wallet_state_pending ON wallet_state (finished, updated_ms)
+"""
+
+_REGISTER = """
+INSERT INTO wallet_state (wallet_id, next_start_ms, finished, page_cursor, updated_ms, wallet)
+VALUES (?, NULL, 0, NULL, 0, ?)
+ON CONFLICT(wallet_id) DO UPDATE SET wallet = excluded.wallet
+"""
+
+_COLUMNS = "wallet_id, next_start_ms, finished, page_cursor, wallet, updated_ms"
+
+_UPSERT = """
+INSERT INTO wallet_state (wallet_id, next_start_ms, finished, page_cursor, updated_ms)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(wallet_id) DO UPDATE SET
+    next_start_ms = excluded.next_start_ms,
+    finished      = excluded.finished,
+    page_cursor   = excluded.page_cursor,
+    updated_ms    = excluded.updated_ms
+"""
+
+class _Write:
+    __slots__ = ("stmt", "done", "error")
+
+    def __init__(self, stmt: Tuple[str, tuple]):
+        self.stmt = stmt
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+class SqliteStateRepository(StateRepository):
+    """
+    StateRepository על SQLite (WAL).
+    Group commit: כל save חוזר רק אחרי שהכתיבה שלו ב-commit, אבל כתיבות שמגיעות במקביל
+    (הרבה ארנקים באותו תהליך) מאוחדות ל-transaction אחד ע"י thread כותב יחיד.
+    כך כל checkpoint עמיד (resume לא מושך יותר מעמוד אחד), בלי commit לכל כתיבה תחת עומס.
+    """
+    def __init__(self, path: str, *, synchronous: str = "NORMAL",
+                 max_batch: int = 512, max_delay_sec: float = 0.0):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.execute(_SCHEMA)
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(wallet_state)")}
+        if "wallet" not in cols:   # DB מגרסה קודמת
+            self._conn.execute("ALTER TABLE wallet_state ADD COLUMN wallet TEXT")
+        self._conn.execute(_PENDING_INDEX)
+        self._db_lock = threading.Lock()
+        self._cv = threading.Condition()
+        self._pending: List[_Write] = []
+        self._max_batch = max_batch
+        self._max_delay = max_delay_sec
+        self._closed = False
+        self.writes = 0
+        self.commits = 0
+        self._writer = threading.Thread(target=self._commit_loop, name="state-commit", daemon=True)
+        self._writer.start()
+
+    # ---------- StateRepository ----------
+    @staticmethod
+    def _state(row) -> WalletState:
+        return WalletState(wallet_id=row[0], next_start_ms=row[1], finished=bool(row[2]),
+                           page_cursor=row[3], wallet=row[4], updated_ms=row[5])
+
+    def load(self, wallet_id: int) -> WalletState:
+        with self._db_lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM wallet_state WHERE wallet_id = ?", (wallet_id,)).fetchone()
+        if row is None:
+            return WalletState(wallet_id=wallet_id, next_start_ms=None, finished=False)
+        return self._state(row)
+
+    def pending(self, limit: Optional[int] = None) -> List[WalletState]:
+        sql = (f"SELECT {_COLUMNS} FROM wallet_state WHERE finished = 0 AND wallet IS NOT NULL "
+               "ORDER BY updated_ms, wallet_id")
+        with self._db_lock:
+            if limit is not None:
+                rows = self._conn.execute(sql + " LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = self._conn.execute(sql).fetchall()
+        return [self._state(r) for r in rows]
+
+    def register(self, wallet_id: int, wallet: str) -> None:
+        self._write((_REGISTER, (wallet_id, wallet)))
+
+    def save(self, wallet_id: int, next_start_ms: int, finished: bool) -> None:
+        self._write((_UPSERT, (wallet_id, next_start_ms, int(finished), None, int(time.time() * 1000))))
+
+    def save_checkpoint(self, wallet_id: int, chunk_start_ms: int, page_cursor: int) -> None:
+        self._write((_UPSERT, (wallet_id, chunk_start_ms, 0, page_cursor, int(time.time() * 1000))))
+
+    def close(self) -> None:
+        with self._cv:
+            self._closed = True
+            self._cv.notify()
+        self._writer.join()
+        with self._db_lock:
+            self._conn.close()
+
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb): self.close()
+
+    # ---------- group commit ----------
+    def _write(self, stmt: Tuple[str, tuple]) -> None:
+        w = _Write(stmt)
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("state repository is closed")
+            self._pending.append(w)
+            self._cv.notify()
+        w.done.wait()
+        if w.error is not None:
+            raise w.error
+
+    def _take_batch(self) -> Tuple[List[_Write], bool]:
+        with self._cv:
+            while not self._pending and not self._closed:
+                self._cv.wait()
+            if not self._pending:
+                return [], True
+        if self._max_delay > 0:
+            time.sleep(self._max_delay)   # חלון קטן לאיסוף כתיבות נוספות
+        with self._cv:
+            batch = self._pending[: self._max_batch]
+            del self._pending[: len(batch)]
+            return batch, False
+
+    def _commit_loop(self) -> None:
+        while True:
+            batch, stop = self._take_batch()
+            if stop:
+                return
+            err: Optional[BaseException] = None
+            with self._db_lock:
+                try:
+                    self._conn.execute("BEGIN")
+                    for w in batch:
+                        self._conn.execute(*w.stmt)
+                    self._conn.execute("COMMIT")
+                    self.commits += 1
+                    self.writes += len(batch)
+                except BaseException as e:  # noqa: BLE001 – מועבר לכותבים
+                    err = e
+                    if self._conn.in_transaction:
+                        self._conn.execute("ROLLBACK")
+            for w in batch:
+                w.error = err
+                w.done.set()
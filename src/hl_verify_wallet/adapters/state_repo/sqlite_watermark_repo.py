@@ -0,0 +1,48 @@
+import sqlite3, threading, time
+from typing import Optional
+from ...ports.watermark_repository import WatermarkRepository
+
+# אותו קובץ DB כמו SqliteStateRepository יכול להחזיק את שתי הטבלאות
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verify_watermark (
+    key               TEXT PRIMARY KEY,
+    verified_until_ms INTEGER NOT NULL,
+    updated_ms        INTEGER NOT NULL
+)
+"""
+
+_UPSERT = """
+INSERT INTO verify_watermark (key, verified_until_ms, updated_ms) VALUES (?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    verified_until_ms = excluded.verified_until_ms,
+    updated_ms        = excluded.updated_ms
+"""
+
+class SqliteWatermarkRepository(WatermarkRepository):
+    """
+    WatermarkRepository על SQLite (WAL): ה-watermark שורד cold start ו-deploy כל עוד הקובץ
+    על volume קבוע (למשל EFS ב-Lambda). save אחד לכל ריצה נקייה – commit לכל save בלי group commit.
+    """
+    def __init__(self, path: str, *, synchronous: str = "NORMAL"):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.execute(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def load(self, key: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT verified_until_ms FROM verify_watermark WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def save(self, key: str, verified_until_ms: int) -> None:
+        with self._lock:
+            self._conn.execute(_UPSERT, (key, int(verified_until_ms), int(time.time() * 1000)))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb): self.close()
@@ -0,0 +1,123 @@
+# src/hl_verify_wallet/adapters/token_bucket_rate_limiter.py
+import threading, time
+from typing import Any, Callable, Dict, Optional
+from ..ports.rate_limiter import RateLimiter
+
+class AdaptiveTokenBucket(RateLimiter):
+    """
+    Token bucket לפי weight, עם קצב אדפטיבי בסגנון AIMD:
+    - כל הצלחה מעלה את הקצב ב-increase_step (עד max_rate)
+    - 429/5xx מכפיל את הקצב ב-decrease_factor (עד min_rate) ומרוקן את הדלי,
+      כך שכל ה-threads הממתינים מואטים יחד במקום לחזור לשרת בבת אחת.
+    הורדות קצב מרוכזות: לכל היותר אחת בכל decrease_cooldown_sec (גל של 429 = האטה אחת).
+    """
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        *,
+        min_rate: float = 1.0,
+        max_rate: Optional[float] = None,
+        increase_step: float = 0.5,
+        decrease_factor: float = 0.5,
+        decrease_cooldown_sec: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be > 0")
+        self._max_rate = max_rate if max_rate is not None else rate
+        self._min_rate = min(min_rate, self._max_rate)
+        self._rate = float(rate)
+        self._burst = float(burst)
+        self._tokens = float(burst)
+        self._inc = increase_step
+        self._dec = decrease_factor
+        self._cooldown = decrease_cooldown_sec
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._last_decrease: Optional[float] = None
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    # ---------- bucket ----------
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    def acquire(self, weight: float = 1.0) -> None:
+        need = min(float(weight), self._burst)  # בקשה כבדה מהדלי עוברת כשהוא מלא
+        with self._lock:
+            self._waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    self._refill(self._clock())
+                    if self._tokens >= need:
+                        self._tokens -= weight
+                        return
+                    wait = (need - self._tokens) / self._rate
+                self._sleep(wait)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def charge(self, weight: float) -> None:
+        if weight <= 0:
+            return
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= weight  # יכול לרדת מתחת לאפס – הבקשות הבאות ימתינו
+
+    # ---------- AIMD ----------
+    def on_success(self) -> None:
+        with self._lock:
+            self._rate = min(self._max_rate, self._rate + self._inc)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            now = self._clock()
+            if self._last_decrease is not None and now - self._last_decrease < self._cooldown:
+                return
+            self._last_decrease = now
+            self._refill(now)
+            self._rate = max(self._min_rate, self._rate * self._dec)
+            self._tokens = min(self._tokens, 0.0)
+
+    # ---------- observability ----------
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(self._clock())
+            return {
+                "rate": self._rate,
+                "max_rate": self._max_rate,
+                "tokens": self._tokens,
+                "burst": self._burst,
+                "queue_depth": self._waiting,
+            }
+
+_shared: Optional[AdaptiveTokenBucket] = None
+_shared_lock = threading.Lock()
+
+def get_shared_rate_limiter(cfg) -> AdaptiveTokenBucket:
+    """מגביל יחיד לכל התהליך (כל מופעי HLBackfillService חולקים את אותה מכסת IP)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = AdaptiveTokenBucket(
+                rate=cfg.hl_rate_weight_per_sec,
+                burst=cfg.hl_rate_burst,
+                min_rate=cfg.hl_rate_min_weight_per_sec,
+                increase_step=cfg.hl_rate_increase_step,
+                decrease_factor=cfg.hl_rate_decrease_factor,
+            )
+        return _shared
@@ -1,66 +1,181 @@
-import os, json
+import os, json, threading, time
 from decimal import Decimal
 from .config import load_config
 from .domain.time_window import TimeWindow
-from .adapters.redshift_data_api_provider import RedshiftDataApiProvider
-from .adapters.hyperliquid_info_provider import HyperliquidInfoProvider
-from .services.matching.default_matcher import DefaultMatchStrategy
-from .services.matching.hash_coin_side_matcher import HashCoinSideMatchStrategy
-from .orchestrators.verify_wallet_usecase import run
+from .adapters.state_repo.memory_watermark_repo import MemoryWatermarkRepository
+from .adapters.powertools_logger import metrics
+from .orchestrators.verify_wallet_usecase import run, run_incremental, run_reconcile, run_many
 
+# watermarks: בזיכרון (שורדים רק בין invocations "חמות" של אותו container), או SQLite לפי WATERMARK_DB_PATH
+_WATERMARKS = None
+_WATERMARKS_PATH = None
+_WATERMARKS_LOCK = threading.Lock()
+
+# providers (ואיתם boto3 client ו-httpx pool) שורדים גם הם; נבנים מחדש רק אם ה-config השתנה
+_PROVIDERS = None
+_PROVIDERS_KEY = None
+_PROVIDERS_LOCK = threading.Lock()
+
+# imports כבדים (boto3, httpx) נטענים רק כשבונים providers – לא ב-import של המודול (cold start)
 def _build_providers(cfg):
+    from .adapters.redshift_data_api_provider import RedshiftDataApiProvider
+    from .adapters.hyperliquid_info_provider import HyperliquidInfoProvider
+    from .adapters.token_bucket_rate_limiter import get_shared_rate_limiter
+    from .adapters.hl_page_cache import HLPageCache
     us = RedshiftDataApiProvider(
         workgroup_or_cluster=cfg.redshift_workgroup_or_cluster,
         database=cfg.redshift_database,
         secret_arn=cfg.redshift_secret_arn,
         schema=cfg.redshift_schema,
         table=cfg.redshift_table_trades,
+        result_format=cfg.redshift_result_format,
+        csv_row_threshold=cfg.redshift_csv_row_threshold,
+        batch_wallets=cfg.redshift_batch_wallets,
     )
     hl = HyperliquidInfoProvider(
         base_url=cfg.hl_info_url,
         timeout_sec=cfg.hl_timeout_sec,
         retries=cfg.hl_retries,
+        rate_limiter=get_shared_rate_limiter(cfg),
+        shards=cfg.hl_shards,
+        shard_ms=cfg.hl_shard_ms or None,
+        max_concurrency=cfg.hl_max_concurrency,
+        pipeline_depth=cfg.hl_pipeline_depth,
+        page_cache=HLPageCache(cfg.hl_cache_dir, cfg.hl_cache_max_mb * 1024 * 1024) if cfg.hl_cache_dir else None,
+        ahead_safety_ms=cfg.hl_ahead_safety_ms,
+        http2=cfg.hl_http2,
     )
     return us, hl
 
+def _get_providers(cfg):
+    global _PROVIDERS, _PROVIDERS_KEY
+    with _PROVIDERS_LOCK:
+        if _PROVIDERS is None or cfg != _PROVIDERS_KEY:
+            stale = _PROVIDERS
+            _PROVIDERS = _build_providers(cfg)
+            _PROVIDERS_KEY = cfg
+            for p in stale or ():
+                close = getattr(p, "close", None)
+                if close is not None:
+                    close()
+        return _PROVIDERS
+
+def _get_watermarks(cfg):
+    global _WATERMARKS, _WATERMARKS_PATH
+    with _WATERMARKS_LOCK:
+        if _WATERMARKS is None or cfg.watermark_db_path != _WATERMARKS_PATH:
+            stale = _WATERMARKS
+            if cfg.watermark_db_path:
+                from .adapters.state_repo.sqlite_watermark_repo import SqliteWatermarkRepository
+                _WATERMARKS = SqliteWatermarkRepository(cfg.watermark_db_path)
+            else:
+                _WATERMARKS = MemoryWatermarkRepository()
+            _WATERMARKS_PATH = cfg.watermark_db_path
+            close = getattr(stale, "close", None)
+            if close is not None:
+                close()
+        return _WATERMARKS
+
 def _choose_matcher(mode: str, cfg):
     tol_px = Decimal(os.getenv("TOL_PX", "0.000001"))
     tol_sz = Decimal(os.getenv("TOL_SZ", "0.00000001"))
     tol_ts = int(os.getenv("TOL_TS_MS", "2000"))
     if mode == "grouped":
+        from .services.matching.hash_coin_side_matcher import HashCoinSideMatchStrategy
         return HashCoinSideMatchStrategy(tol_px, tol_sz, tol_ts)
+    from .services.matching.default_matcher import DefaultMatchStrategy
     return DefaultMatchStrategy(tol_px, tol_sz, tol_ts)
 
+def _spill_presenter(cfg, wallet: str, start_ms: int, end_ms: int):
+    from .presenters.ndjson_presenter import NdjsonSpillPresenter
+    name = f"{wallet.lower()}-{start_ms}-{end_ms}-{int(time.time() * 1000)}.ndjson"
+    return NdjsonSpillPresenter(os.path.join(cfg.spill_dir, name), compress=cfg.spill_gzip,
+                                sample_size=cfg.spill_sample)
+
+# מרווח לפני ה-timeout של Lambda: מספיק כדי להחזיר שגיאה מסודרת במקום להיהרג באמצע
+DEADLINE_MARGIN_SEC = 2.0
+
+def _deadline_sec(event, context):
+    deadline = event.get("deadline_sec")
+    remaining = getattr(context, "get_remaining_time_in_millis", None)
+    if remaining is not None:
+        budget = remaining() / 1000.0 - DEADLINE_MARGIN_SEC
+        deadline = budget if deadline is None else min(float(deadline), budget)
+    return float(deadline) if deadline is not None else None
+
 def lambda_handler(event, _context=None):
     """
     event:
       {
         "wallet": "...",
+        "wallets": null,          // רשימה → run_many: Redshift ב-batch (wallet IN ...), summary לכל ארנק;
+                                  // ה-diffs תמיד לקובץ NDJSON אחד (רשומה עם "wallet"), ב-body רק דגימה
         "start_ms": 0,
         "end_ms": 1762093860372,
         "coin": null,
-        "mode": "fills" | "grouped"
+        "mode": "fills" | "grouped",
+        "incremental": false,     // true → משווה רק מה-watermark האחרון (start_ms אופציונלי)
+        "reconcile": false,       // true → תקצירים לכל (coin, יום) קודם; רק דליים שונים נמשכים שורה-שורה
+        "overlap_ms": 60000,
+        "metrics": false,         // true → גם snapshot של המדדים ב-body
+        "deadline_sec": null,     // ברירת מחדל: הזמן שנשאר ל-Lambda פחות DEADLINE_MARGIN_SEC
+        "output": "json"          // "ndjson" → diffs לקובץ ב-SPILL_DIR; ב-body רק summary, דגימה ו-spill.path
       }
+    מדדים לכל שלב נפלטים כשורת EMF ל-stdout (METRICS_EMF=0 מכבה).
     """
+    t0 = time.perf_counter()
     cfg = load_config()
-    us, hl = _build_providers(cfg)
+    metrics.reset()
+    metrics.namespace = cfg.metrics_namespace
+    us, hl = _get_providers(cfg)
 
-    wallet = event["wallet"]
+    wallets = event.get("wallets")
+    wallet = event.get("wallet") if wallets else event["wallet"]
     coin = event.get("coin")
-    start_ms = int(event["start_ms"])
+    start_ms = int(event.get("start_ms") or 0)
     end_ms = int(event["end_ms"])
     mode = (event.get("mode") or "fills").lower()
-    window = TimeWindow(start_ms, end_ms)
 
     matcher = _choose_matcher(mode, cfg)
-    res = run(wallet, window, us, hl, matcher, coin)
+    deadline = _deadline_sec(event, _context)
+    # spill לקובץ: לפי output בארנק יחיד; ב-"wallets" תמיד – אחרת ה-body גדל עם כמות ה-diffs בכל הארנקים
+    spill = (_spill_presenter(cfg, wallet or f"wallets{len(wallets)}", start_ms, end_ms)
+             if event.get("output") == "ndjson" or wallets else None)
+    try:
+        if wallets:
+            res = run_many(wallets, TimeWindow(start_ms, end_ms), us, hl, matcher, coin,
+                           deadline_sec=deadline, diff_sink=spill)
+        elif event.get("reconcile"):
+            res = run_reconcile(wallet, TimeWindow(start_ms, end_ms), us, hl, matcher, coin,
+                                deadline_sec=deadline, diff_sink=spill)
+        elif event.get("incremental"):
+            res = run_incremental(wallet, end_ms, us, hl, matcher, _get_watermarks(cfg), coin,
+                                  start_ms=start_ms, overlap_ms=int(event.get("overlap_ms", 60_000)),
+                                  deadline_sec=deadline, diff_sink=spill)
+        else:
+            res = run(wallet, TimeWindow(start_ms, end_ms), us, hl, matcher, coin,
+                      deadline_sec=deadline, diff_sink=spill)
+    except BaseException:
+        if spill is not None:
+            spill.close()
+        raise
+    if spill is not None:
+        res = spill.compact(res)   # סוגר את הקובץ; הרשימות בתוצאה → דגימה
+
+    metrics.observe("verify_ms", (time.perf_counter() - t0) * 1000)
+    if event.get("metrics"):
+        res["metrics"] = metrics.snapshot()
 
     # פלט JSON מסודר
-    return {"statusCode": 200, "body": json.dumps({
-        "wallet": wallet,
-        "mode": mode,
-        **res
-    }, ensure_ascii=False)}
+    with metrics.timer("present_ms"):
+        body = json.dumps({
+            "wallet": wallet,
+            "mode": mode,
+            **res
+        }, ensure_ascii=False)
+    if cfg.metrics_emf:
+        metrics.emit({"mode": mode})
+    return {"statusCode": 200, "body": body}
 
 if __name__ == "__main__":
     # הרצה לוקאלית: הדבק JSON ל-stdin
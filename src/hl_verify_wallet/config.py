@@ -1,6 +1,76 @@
-# src/hl_verify_wallet/config.py  (רק התוספות/ברירות מחדל)
-class Config(BaseModel):
-    hl_info_url: str = os.getenv("HL_INFO_URL", "https://api.hyperliquid.xyz/info")
-    hl_timeout_sec: float = float(os.getenv("HL_TIMEOUT_SEC", "15"))
-    hl_retries: int = int(os.getenv("HL_RETRIES", "5"))
-    # ... השאר כבעבר
+# src/hl_verify_wallet/config.py
+import os
+from dataclasses import dataclass, fields
+from typing import Mapping, Optional
+
+_FALSE = ("0", "false", "False", "")
+
+# dataclass ולא pydantic: כל הערכים כבר מומרים במפורש מ-env, ו-pydantic לבדו עלה ~100ms ב-cold start
+@dataclass(frozen=True)
+class Config:
+    """
+    ערכי ברירת המחדל כאן; from_env קורא את ה-env בזמן הבנייה (לא ב-import),
+    כל שדה מהמשתנה בשם שלו באותיות גדולות (hl_retries ← HL_RETRIES).
+    """
+    # Redshift (Data API)
+    redshift_workgroup_or_cluster: str = ""
+    redshift_database: str = ""
+    redshift_secret_arn: str = ""
+    redshift_schema: str = "public"
+    redshift_table_trades: str = "trades"
+    redshift_result_format: str = "json"   # json | csv | auto (auto = COUNT(*) נוסף לכל statement)
+    redshift_csv_row_threshold: int = 200000
+    redshift_batch_wallets: int = 100   # wallet IN (...) ב-"wallets"
+
+    # Hyperliquid /info
+    hl_info_url: str = "https://api.hyperliquid.xyz/info"
+    hl_timeout_sec: float = 15.0
+    hl_retries: int = 5
+    hl_shards: int = 1
+    hl_shard_ms: int = 0       # 0 = פיצול ל-hl_shards חלקים (עם hl_cache_dir: shards של יום)
+    hl_max_concurrency: int = 4
+    hl_http2: bool = True   # דורש h2
+    hl_pipeline_depth: int = 0   # 0 = fetch/parse/sink סדרתי
+
+    # Page cache על דיסק (ריק = כבוי; ב-Lambda למשל /tmp/hl-cache)
+    hl_cache_dir: str = ""
+    hl_cache_max_mb: int = 256
+    hl_ahead_safety_ms: int = 300000
+
+    # Rate limit משותף ל-/info (weight לשנייה; HL: 1200 weight לדקה לכל IP)
+    hl_rate_weight_per_sec: float = 20.0
+    hl_rate_burst: float = 1200.0
+    hl_rate_min_weight_per_sec: float = 2.0
+    hl_rate_increase_step: float = 0.5
+    hl_rate_decrease_factor: float = 0.5
+
+    # מדדים לכל שלב (CloudWatch EMF ל-stdout)
+    metrics_emf: bool = True
+    metrics_namespace: str = "hl-verify-wallet"
+
+    # watermarks של incremental (ריק = בזיכרון, לא שורד cold start; קובץ SQLite על volume קבוע, למשל EFS)
+    watermark_db_path: str = ""
+
+    # output="ndjson": ה-diffs נשפכים לקובץ NDJSON וה-response מחזיק רק summary + דגימה + path
+    spill_dir: str = "/tmp/hl-verify-diffs"
+    spill_gzip: bool = True
+    spill_sample: int = 20
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] = os.environ) -> "Config":
+        kwargs = {}
+        for f in fields(cls):
+            raw = env.get(f.name.upper())
+            if raw is None:
+                continue
+            kwargs[f.name] = raw not in _FALSE if f.type is bool else f.type(raw)
+        return cls(**kwargs)
+
+_CONFIG: Optional[Config] = None
+
+def load_config(refresh: bool = False) -> Config:
+    """Config מפוענח פעם אחת לתהליך (invocations חמות לא בונות אותו מחדש)."""
+    global _CONFIG
+    if _CONFIG is None or refresh:
+        _CONFIG = Config.from_env()
+    return _CONFIG
@@ -0,0 +1,73 @@
+from decimal import Decimal
+from hashlib import md5
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+DAY_MS = 86_400_000
+HOUR_MS = 3_600_000
+
+# (coin, bucket_start_ms)
+BucketKey = Tuple[str, int]
+
+def trade_id_hash(trade_id: Optional[int]) -> int:
+    """
+    32 הביטים הראשונים של md5(str(trade_id)) – זהה ל-STRTOL(LEFT(MD5(trade_id::varchar), 8), 16)
+    ב-Redshift. סכום שלהם על דלי לא תלוי בסדר השורות. NULL לא נספר (כמו SUM ב-SQL).
+    """
+    if trade_id is None:
+        return 0
+    return int(md5(str(trade_id).encode()).hexdigest()[:8], 16)
+
+class BucketDigest:
+    """תקציר של דלי (coin, זמן): count, סכום sz, סכום notional, וסכום hash של trade_id."""
+    __slots__ = ("count", "sz", "notional", "id_hash")
+
+    def __init__(self, count: int = 0, sz: Decimal = Decimal(0), notional: Decimal = Decimal(0),
+                 id_hash: int = 0):
+        self.count = count
+        self.sz = sz
+        self.notional = notional
+        self.id_hash = id_hash
+
+    def add(self, f) -> None:
+        self.count += 1
+        self.sz += f.sz
+        if f.notional_usd is not None:
+            self.notional += f.notional_usd
+        if f.trade_id is not None:
+            self.id_hash += trade_id_hash(f.trade_id)
+
+    def matches(self, other: "BucketDigest", tol_px: Decimal, tol_sz: Decimal) -> bool:
+        """count ו-hash מדויקים; sz/notional עם טולרנס מצטבר (tol לכל fill + עיגול q6 של notional)."""
+        if self.count != other.count or self.id_hash != other.id_hash:
+            return False
+        if abs(self.sz - other.sz) > tol_sz * self.count:
+            return False
+        tol_notional = tol_px * max(self.sz, other.sz) + Decimal("0.000001") * self.count
+        return abs(self.notional - other.notional) <= tol_notional
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "sz": str(self.sz), "notional": str(self.notional),
+                "id_hash": self.id_hash}
+
+    def __eq__(self, other: object) -> bool:
+        return (isinstance(other, BucketDigest) and self.count == other.count and self.sz == other.sz
+                and self.notional == other.notional and self.id_hash == other.id_hash)
+
+    def __repr__(self) -> str:
+        return f"BucketDigest({self.count}, {self.sz}, {self.notional}, {self.id_hash})"
+
+def digest_fills(fills: Iterable, bucket_ms: int, end_ms: Optional[int] = None) -> Dict[BucketKey, BucketDigest]:
+    """
+    מעבר זורם אחד: fill → דלי (coin, floor(ts_ms / bucket_ms) * bucket_ms).
+    end_ms (לא כולל) – fills ב-ts_ms >= end_ms לא נספרים, כמו ב-WHERE של Redshift.
+    """
+    out: Dict[BucketKey, BucketDigest] = {}
+    for f in fills:
+        if end_ms is not None and f.ts_ms >= end_ms:
+            continue
+        k = (f.coin, f.ts_ms // bucket_ms * bucket_ms)
+        d = out.get(k)
+        if d is None:
+            d = out[k] = BucketDigest()
+        d.add(f)
+    return out
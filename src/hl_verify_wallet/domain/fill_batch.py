@@ -0,0 +1,130 @@
+# src/hl_verify_wallet/domain/fill_batch.py
+import threading
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, Iterator, List, Optional
+from .models import Fill
+
+NULL_INT = -(2 ** 63)        # sentinel ל-None בעמודות int64
+MICRO = 10 ** 6              # אותו scale כמו _q6 (numeric(18,6))
+_ONE = Decimal(1)
+_MICRO_DEC = Decimal(MICRO)
+
+def to_micro(x: Decimal) -> int:
+    """Decimal → int64 ב-micro units, עיגול ROUND_HALF_UP כמו _q6."""
+    return int((x * _MICRO_DEC).quantize(_ONE, rounding=ROUND_HALF_UP))
+
+def from_micro(v: int) -> Decimal:
+    return Decimal(v).scaleb(-6)
+
+class _Interner:
+    """טבלת קודים משותפת לתהליך (coin/side/role/wallet) – קוד 0 שמור ל-None."""
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self.values: List[Optional[str]] = [None]
+        self._lock = threading.Lock()
+
+    def code(self, v: Optional[str]) -> int:
+        if v is None:
+            return 0
+        c = self._codes.get(v)
+        if c is None:
+            with self._lock:
+                c = self._codes.get(v)
+                if c is None:
+                    c = len(self.values)
+                    self.values.append(v)
+                    self._codes[v] = c
+        return c
+
+# משותפות לכל ה-batches כדי שקודים יהיו ברי-השוואה בין US ל-HL
+COINS = _Interner()
+SIDES = _Interner()
+ROLES = _Interner()
+WALLETS = _Interner()
+
+class FillBatch:
+    """
+    ייצוג עמודתי של רשימת fills:
+    - ts_ms / base_tid / trade_id כ-int64 (NULL_INT = None)
+    - px / sz / notional_usd כ-int64 ב-micro units (6 ספרות, כמו _q6)
+    - coin / side / role / wallet כקודים מ-interner משותף
+    Fill נבנה רק לפי דרישה (batch[i] / iter). הדיוק הוא של TradeRow: px/sz מכומתים ל-6 ספרות.
+    נתיב opt-in ל-jobs שמחזיקים צד שלם בזיכרון (fetch_fill_batch + match_batches); run() נשאר
+    על ה-merge-join הזורם של Fill, כי טולרנס מתחת ל-micro (למשל TOL_SZ ברירת מחדל) לא נשמר כאן.
+    """
+    __slots__ = ("ts_ms", "base_tid", "trade_id", "px", "sz", "notional",
+                 "coin", "side", "role", "wallet", "hash", "counterparty")
+
+    def __init__(self):
+        self.ts_ms = array("q")
+        self.base_tid = array("q")
+        self.trade_id = array("q")
+        self.px = array("q")
+        self.sz = array("q")
+        self.notional = array("q")
+        self.coin = array("I")
+        self.side = array("H")
+        self.role = array("H")
+        self.wallet = array("I")
+        self.hash: List[Optional[str]] = []
+        self.counterparty: Dict[int, str] = {}   # דליל – כמעט תמיד None
+
+    @classmethod
+    def from_fills(cls, fills: Iterable[Fill]) -> "FillBatch":
+        b = cls()
+        b.extend(fills)
+        return b
+
+    def append(self, f: Fill) -> None:
+        if f.counterparty is not None:
+            self.counterparty[len(self.ts_ms)] = f.counterparty
+        self.ts_ms.append(f.ts_ms)
+        self.base_tid.append(f.base_tid if f.base_tid is not None else NULL_INT)
+        self.trade_id.append(f.trade_id if f.trade_id is not None else NULL_INT)
+        self.px.append(to_micro(f.px))
+        self.sz.append(to_micro(f.sz))
+        self.notional.append(to_micro(f.notional_usd) if f.notional_usd is not None else NULL_INT)
+        self.coin.append(COINS.code(f.coin))
+        self.side.append(SIDES.code(f.side))
+        self.role.append(ROLES.code(f.role))
+        self.wallet.append(WALLETS.code(f.wallet))
+        self.hash.append(f.hash)
+
+    def extend(self, fills: Iterable[Fill]) -> None:
+        for f in fills:
+            self.append(f)
+
+    def __len__(self) -> int:
+        return len(self.ts_ms)
+
+    def __getitem__(self, i: int) -> Fill:
+        if i < 0:
+            i += len(self)
+        base_tid = self.base_tid[i]
+        trade_id = self.trade_id[i]
+        notional = self.notional[i]
+        return Fill(
+            wallet=WALLETS.values[self.wallet[i]],
+            coin=COINS.values[self.coin[i]],
+            side=SIDES.values[self.side[i]],
+            px=from_micro(self.px[i]),
+            sz=from_micro(self.sz[i]),
+            ts_ms=self.ts_ms[i],
+            hash=self.hash[i],
+            base_tid=base_tid if base_tid != NULL_INT else None,
+            role=ROLES.values[self.role[i]],
+            counterparty=self.counterparty.get(i),
+            trade_id=trade_id if trade_id != NULL_INT else None,
+            notional_usd=from_micro(notional) if notional != NULL_INT else None,
+        )
+
+    def __iter__(self) -> Iterator[Fill]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def nbytes(self) -> int:
+        """גודל העמודות המספריות (בלי מחרוזות ה-hash, שמשותפות עם המקור)."""
+        cols = (self.ts_ms, self.base_tid, self.trade_id, self.px, self.sz, self.notional,
+                self.coin, self.side, self.role, self.wallet)
+        return sum(c.itemsize * len(c) for c in cols) + 8 * len(self.hash)
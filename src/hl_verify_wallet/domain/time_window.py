@@ -1,7 +1,44 @@
 # src/hl_verify_wallet/domain/time_window.py
 from dataclasses import dataclass
+from typing import List
 
 @dataclass(frozen=True)
 class TimeWindow:
     start_ms: int
     end_ms: int
+
+    def split(self, parts: int) -> List["TimeWindow"]:
+        """
+        מפצל את החלון ל-parts תתי-חלונות רציפים וזרים (end כולל, כמו endTime של HL).
+        לא מייצר חלונות ריקים – אם החלון קצר מ-parts, יוחזרו פחות חלקים.
+        """
+        if parts < 1:
+            raise ValueError("parts must be >= 1")
+        span = self.end_ms - self.start_ms + 1
+        if span <= 0:
+            return [self]
+        parts = min(parts, span)
+        step, rem = divmod(span, parts)
+        out: List[TimeWindow] = []
+        cursor = self.start_ms
+        for i in range(parts):
+            width = step + (1 if i < rem else 0)
+            out.append(TimeWindow(cursor, cursor + width - 1))
+            cursor += width
+        return out
+
+    def split_aligned(self, step_ms: int) -> List["TimeWindow"]:
+        """
+        מפצל לפי גבולות קבועים (כפולות של step_ms מ-epoch).
+        הגבולות לא תלויים ב-end_ms, ולכן תתי-חלונות שהסתיימו זהים בין ריצות (טוב ל-cache).
+        """
+        if step_ms < 1:
+            raise ValueError("step_ms must be >= 1")
+        out: List[TimeWindow] = []
+        cursor = self.start_ms
+        while cursor <= self.end_ms:
+            boundary = (cursor // step_ms + 1) * step_ms
+            end = min(boundary - 1, self.end_ms)
+            out.append(TimeWindow(cursor, end))
+            cursor = end + 1
+        return out or [self]
@@ -11,3 +11,7 @@ class HLTooManyFillsError(RuntimeError):
 class HLNoResultsError(RuntimeError):
     """No results returned repeatedly (possibly wrong wallet address)."""
     pass
+
+class HLCancelledError(RuntimeError):
+    """The caller set the cancel event; no further /info requests are sent."""
+    pass
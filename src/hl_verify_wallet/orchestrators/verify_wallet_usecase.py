@@ -1,22 +1,383 @@
-from typing import Optional, Dict, Any, List
+import queue, threading, time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Sequence, Set, Tuple
+from ..adapters.powertools_logger import metrics
+from ..domain.digest import DAY_MS, HOUR_MS
 from ..domain.time_window import TimeWindow
 from ..ports.fill_provider import FillProvider
+from ..ports.watermark_repository import WatermarkRepository
 from ..services.normalize.trade_row import to_trade_row_from_fill
-from decimal import Decimal
+from ..services.compare_service import compare
+from ..services.grouped_compare import compare_grouped
+from ..services.reconcile import Range, diff_buckets, merge_ranges, time_spans
 
-def _normalize_all(fills) -> List:
+def _normalize_all(fills: Iterable) -> Iterator:
     # אם תרצה להשוות על Fill “כמו שהוא” השאר ככה.
     # אם תרצה להשוות על TradeRow, החלף לשורה:
-    # return [to_trade_row_from_fill(f) for f in fills]
-    return list(fills)
+    # return (to_trade_row_from_fill(f) for f in fills)
+    return iter(fills)
+
+class VerificationTimeout(TimeoutError):
+    """ה-deadline המשותף של האימות עבר לפני ששני הצדדים נמשכו."""
+
+_END = object()
+
+class _Cancel:
+    """מצב משותף לשני הצדדים: stop + השגיאה הראשונה + deadline."""
+    def __init__(self, deadline: Optional[float]):
+        self.stop = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.deadline = deadline
+        self._lock = threading.Lock()
+
+    def fail(self, e: BaseException) -> None:
+        with self._lock:
+            if self.error is None:
+                self.error = e
+        self.stop.set()
+
+    def check(self) -> None:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.fail(VerificationTimeout("verification deadline exceeded"))
+        if self.stop.is_set():
+            raise self.error or VerificationTimeout("verification cancelled")
+
+class _SideStream:
+    """
+    מושך צד אחד (fetch_fills) ב-thread משלו לתוך תור חסום של chunks.
+    ה-compare צורך אותו כ-iterator רגיל; שגיאה/deadline בצד כלשהו עוצרת את שניהם.
+    """
+    def __init__(self, stage: str, fetch, cancel: _Cancel, chunk: int = 1000, max_chunks: int = 64):
+        self._stage = stage
+        self._fetch = fetch
+        self._cancel = cancel
+        self._chunk = chunk
+        self._q: "queue.Queue" = queue.Queue(maxsize=max_chunks)
+        self.elapsed = 0.0     # זמן עד שהצד נמסר במלואו (כולל המתנה ל-compare כשהתור מלא)
+        self.waited = 0.0      # זמן שה-compare חיכה לצד הזה
+        self._thread = threading.Thread(target=self._produce, name=f"fetch-{stage}", daemon=True)
+
+    def start(self) -> "_SideStream":
+        self._t0 = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _put(self, item) -> bool:
+        while not self._cancel.stop.is_set():
+            try:
+                self._q.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self) -> None:
+        rows = iter(metrics.metered(self._stage, self._fetch))
+        try:
+            buf = []
+            for r in rows:
+                buf.append(r)
+                if len(buf) >= self._chunk:
+                    if not self._put(buf):
+                        return
+                    buf = []
+                    if self._cancel.stop.is_set():
+                        return
+            if buf and not self._put(buf):
+                return
+            self.elapsed = time.perf_counter() - self._t0   # לפני _END – ה-compare קורא אותו מיד אחרי
+            self._put(_END)
+        except BaseException as e:  # noqa: BLE001 – מועבר ל-thread של ה-compare
+            self._cancel.fail(e)
+        finally:
+            rows.close()   # ספק generator (HL) עוצר את ה-backfill שלו עכשיו, לא כשה-GC יגיע אליו
+
+    def __iter__(self) -> Iterator:
+        perf = time.perf_counter
+        while True:
+            t0 = perf()
+            while True:
+                self._cancel.check()
+                try:
+                    item = self._q.get(timeout=0.05)
+                    break
+                except queue.Empty:
+                    continue
+            self.waited += perf() - t0
+            if item is _END:
+                return
+            yield from item
 
 def run(wallet: str, window: TimeWindow, us_provider: FillProvider,
-        hl_provider: FillProvider, matcher, coin: Optional[str]=None) -> Dict[str, Any]:
-    us_fills = list(us_provider.fetch_fills(wallet, window, coin))
-    hl_fills = list(hl_provider.fetch_fills(wallet, window, coin))
+        hl_provider: FillProvider, matcher, coin: Optional[str]=None,
+        *, deadline_sec: Optional[float] = None, diff_sink=None) -> Dict[str, Any]:
+    """
+    שני הספקים רצים במקביל (thread לכל צד, תורים חסומים), וה-compare הזורם צורך את שניהם.
+    כך ה-latency קרוב לצד האיטי ולא לסכום. deadline_sec משותף לשניהם; כשל/timeout בצד אחד
+    מבטל את השני. ב-result: timings לכל צד.
+    matcher.aggregate → השוואה ברמת קבוצה (compare_grouped) במקום merge-join של fills.
+    diff_sink → ה-diffs נכתבים אליו תוך כדי (ראו NdjsonSpillPresenter) ולא נאספים לתוצאה.
+    """
+    cancel = _Cancel(time.monotonic() + deadline_sec if deadline_sec is not None else None)
+    # שני הצדדים ממוינים לפי ts_ms – ההשוואה זורמת ולא מחזיקה את כל ההיסטוריה בזיכרון
+    # cancel.stop עובר לספקים – צד שבוטל מפסיק גם לדפדף, לא רק הצרכן שלו
+    us = _SideStream("us", lambda: us_provider.fetch_fills_cancellable(wallet, window, coin, cancel=cancel.stop),
+                     cancel).start()
+    hl = _SideStream("hl", lambda: hl_provider.fetch_fills_cancellable(wallet, window, coin, cancel=cancel.stop),
+                     cancel).start()
+    t0 = time.perf_counter()
+    try:
+        if getattr(matcher, "aggregate", False):
+            res = compare_grouped(_normalize_all(us), _normalize_all(hl), matcher, diff_sink=diff_sink)
+        else:
+            res = compare(_normalize_all(us), _normalize_all(hl), matcher, diff_sink=diff_sink)
+    except BaseException as e:
+        cancel.fail(e)
+        raise
+    total = time.perf_counter() - t0
+    # זמן ה-compare נטו = הכל פחות ההמתנה לספקים
+    match = total - us.waited - hl.waited
+    metrics.observe("match_ms", match * 1000)
+    res["timings"] = {
+        "us_ms": round(us.elapsed * 1000, 1),
+        "hl_ms": round(hl.elapsed * 1000, 1),
+        "match_ms": round(match * 1000, 1),
+        "total_ms": round(total * 1000, 1),
+    }
+    return res
+
+def watermark_key(wallet: str, coin: Optional[str] = None) -> str:
+    return wallet.lower() if not coin else f"{wallet.lower()}|{coin}"
+
+def run_incremental(wallet: str, end_ms: int, us_provider: FillProvider,
+                    hl_provider: FillProvider, matcher, watermarks: WatermarkRepository,
+                    coin: Optional[str] = None, *, start_ms: int = 0,
+                    overlap_ms: int = 60_000, deadline_sec: Optional[float] = None,
+                    diff_sink=None) -> Dict[str, Any]:
+    """
+    אימות אינקרמנטלי: משווה רק את [watermark - overlap, end_ms].
+    ה-overlap מכסה fills ליד הגבול (טולרנס ts, איחורי ingestion).
+    ה-watermark מתקדם ל-end_ms רק כשההשוואה נקייה – אחרת הריצה הבאה תבדוק שוב את אותו טווח.
+    """
+    key = watermark_key(wallet, coin)
+    wm = watermarks.load(key)
+    start = max(int(start_ms), wm - overlap_ms) if wm is not None else int(start_ms)
+    window = TimeWindow(start, int(end_ms))
+
+    res = run(wallet, window, us_provider, hl_provider, matcher, coin,
+              deadline_sec=deadline_sec, diff_sink=diff_sink)
+
+    summary = res["summary"]
+    clean = (summary["missing_in_us"] == 0 and summary["missing_in_hl"] == 0
+             and summary.get("mismatched", 0) == 0)
+    new_wm = wm
+    if clean and (wm is None or window.end_ms > wm):
+        watermarks.save(key, window.end_ms)
+        new_wm = window.end_ms
+    res["incremental"] = {
+        "window": {"start_ms": window.start_ms, "end_ms": window.end_ms},
+        "watermark_before": wm,
+        "watermark_after": new_wm,
+        "clean": clean,
+    }
+    return res
+
+class _HalfOpen(FillProvider):
+    """
+    [start_ms, end_ms) מדויק: Redshift מסנן ts < end, אבל endTime של HL כולל –
+    בלי זה fill שבדיוק על גבול הדלי היה נספר בשני טווחים.
+    """
+    def __init__(self, inner: FillProvider):
+        self._inner = inner
+
+    def fetch_fills(self, wallet: str, window: TimeWindow, coin: Optional[str] = None) -> Iterable:
+        end = window.end_ms
+        return (f for f in self._inner.fetch_fills(wallet, window, coin) if f.ts_ms < end)
+
+class _SpanSplit(FillProvider):
+    """
+    צד HL ב-reconcile: ל-userFillsByTime אין פילטר coin, אז כל span (ראו time_spans) נמשך פעם
+    אחת בלי coin, ו-fetch_fills(window, coin) נחתך ממנו מקומית (bisect על ts). נשמרים רק fills של
+    coins שנדרשים, ורק ה-span האחרון – הטווחים נצרכים לפי סדר הזמן.
+    """
+    def __init__(self, inner: FillProvider, spans: List[Tuple[int, int]], coins: Set[str]):
+        self._inner = _HalfOpen(inner)
+        self._spans = spans
+        self._starts = [lo for lo, _ in spans]
+        self._coins = coins
+        self._lock = threading.Lock()
+        self._cur: Optional[int] = None
+        self._by_coin: Dict[str, Tuple[List[int], List[Any]]] = {}
+
+    def _load(self, wallet: str, window: TimeWindow) -> Dict[str, Tuple[List[int], List[Any]]]:
+        i = bisect_right(self._starts, window.start_ms) - 1
+        with self._lock:
+            if i != self._cur:
+                lo, hi = self._spans[i]
+                by_coin: Dict[str, Tuple[List[int], List[Any]]] = defaultdict(lambda: ([], []))
+                for f in self._inner.fetch_fills(wallet, TimeWindow(lo, hi)):
+                    if f.coin in self._coins:
+                        ts, fills = by_coin[f.coin]
+                        ts.append(f.ts_ms)
+                        fills.append(f)
+                self._cur, self._by_coin = i, dict(by_coin)
+            return self._by_coin
+
+    def fetch_fills(self, wallet: str, window: TimeWindow, coin: Optional[str] = None) -> Iterable:
+        ts, fills = self._load(wallet, window).get(coin, ((), ()))
+        return fills[bisect_left(ts, window.start_ms):bisect_left(ts, window.end_ms)]
+
+def run_reconcile(wallet: str, window: TimeWindow, us_provider: FillProvider,
+                  hl_provider: FillProvider, matcher, coin: Optional[str] = None, *,
+                  bucket_ms: int = DAY_MS, sub_bucket_ms: int = HOUR_MS,
+                  max_bucket_rows: int = 20_000, deadline_sec: Optional[float] = None,
+                  diff_sink=None) -> Dict[str, Any]:
+    """
+    Reconciliation בשני שלבים:
+    1. תקצירים לכל (coin, יום) משני הצדדים במקביל – ב-Redshift ב-SQL (fetch_digests),
+       ב-HL מקומית תוך זרימה. ארנק נקי עולה שורה אחת לכל דלי מ-Redshift.
+    2. רק דליים שונים נמשכים שורה-שורה ועוברים דרך run. דלי שונה עם יותר מ-max_bucket_rows
+       מפורק קודם לדליים של sub_bucket_ms (שעה), ורק השעות השונות נמשכות.
+       ב-HL אין פילטר coin: טווחים של coins שונים באותו זמן נמשכים ב-fetch אחד (_SpanSplit).
+    fills בדליים הנקיים נספרים כ-matched (ב-matcher.aggregate – רק ב-us/hl).
+    """
+    t0 = time.perf_counter()
+    deadline = time.monotonic() + deadline_sec if deadline_sec is not None else None
+    tol_px, tol_sz = matcher.tol_px, matcher.tol_sz
+
+    def remaining() -> Optional[float]:
+        if deadline is None:
+            return None
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise VerificationTimeout("verification deadline exceeded")
+        return left
+
+    stats = {"buckets": 0, "clean_buckets": 0, "clean_rows": 0}
+
+    def locate(win: TimeWindow, bms: int, coin_f: Optional[str],
+               keep: Optional[Set[str]] = None) -> List[Range]:
+        remaining()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="digest") as ex:
+            fu = ex.submit(us_provider.fetch_digests, wallet, win, bms, coin_f)
+            fh = ex.submit(hl_provider.fetch_digests, wallet, win, bms, coin_f)
+            us_d, hl_d = fu.result(), fh.result()
+        if keep is not None:
+            us_d = {k: v for k, v in us_d.items() if k[0] in keep}
+            hl_d = {k: v for k, v in hl_d.items() if k[0] in keep}
+        clean, diff = diff_buckets(us_d, hl_d, tol_px, tol_sz)
+        n_buckets = len(us_d.keys() | hl_d.keys())
+        stats["buckets"] += n_buckets
+        stats["clean_buckets"] += n_buckets - len(diff)
+        stats["clean_rows"] += clean
+        out: List[Range] = []
+        # דליים גדולים מפורקים לשעות; כמה coins באותו דלי חולקים קריאת digests אחת (HL מושך את הזמן כולו)
+        split: Dict[Tuple[int, int], List[str]] = {}
+        for (c, lo), n in diff:
+            lo, hi = max(lo, win.start_ms), min(lo + bms, win.end_ms)
+            if n > max_bucket_rows and bms > sub_bucket_ms:
+                split.setdefault((lo, hi), []).append(c)
+            else:
+                out.append((c, lo, hi))
+        for (lo, hi), coins in sorted(split.items()):
+            if len(coins) == 1:
+                out.extend(locate(TimeWindow(lo, hi), sub_bucket_ms, coins[0]))
+            else:
+                out.extend(locate(TimeWindow(lo, hi), sub_bucket_ms, None, set(coins)))
+        return out
+
+    with metrics.timer("digest_ms"):
+        ranges = merge_ranges(locate(window, bucket_ms, coin))
+    t_digest = time.perf_counter() - t0
+
+    n = stats["clean_rows"]
+    summary: Dict[str, Any] = {"us": n, "hl": n, "matched": 0 if getattr(matcher, "aggregate", False) else n,
+                               "missing_in_us": 0, "missing_in_hl": 0}
+    lists: Dict[str, List[Dict[str, Any]]] = {"missing_in_us": [], "missing_in_hl": []}
+    rows = {"us": 0, "hl": 0}
+    # US: טווח לכל coin (Redshift מסנן coin ב-SQL); HL: fetch אחד לכל span, מפוצל לפי coin מקומית
+    us_half = _HalfOpen(us_provider)
+    hl_split = _SpanSplit(hl_provider, time_spans(ranges), {c for c, _, _ in ranges})
+    for c, lo, hi in sorted(ranges, key=lambda r: (r[1], r[0])):
+        r = run(wallet, TimeWindow(lo, hi), us_half, hl_split, matcher, c,
+                deadline_sec=remaining(), diff_sink=diff_sink)
+        for k, v in r["summary"].items():
+            summary[k] = summary.get(k, 0) + v
+        for k in ("missing_in_us", "missing_in_hl", "mismatched"):
+            if k in r:
+                lists.setdefault(k, []).extend(r[k])
+        rows["us"] += r["summary"]["us"]
+        rows["hl"] += r["summary"]["hl"]
+    metrics.incr("reconcile.diff_ranges", len(ranges))
+
+    total = time.perf_counter() - t0
+    return {
+        "summary": summary,
+        **lists,
+        "reconcile": {
+            "bucket_ms": bucket_ms, "sub_bucket_ms": sub_bucket_ms,
+            "buckets": stats["buckets"], "clean_buckets": stats["clean_buckets"],
+            "diff_ranges": len(ranges), "rows_compared": rows,
+        },
+        "timings": {
+            "digest_ms": round(t_digest * 1000, 1),
+            "compare_ms": round((total - t_digest) * 1000, 1),
+            "total_ms": round(total * 1000, 1),
+        },
+    }
+
+class _Prefetched(FillProvider):
+    """ה-fills של ארנק אחד מתוך fetch_fills_many – run מושך אותם כמו מכל ספק אחר."""
+    def __init__(self, fills: Iterable):
+        self._fills = fills
+
+    def fetch_fills(self, wallet: str, window: TimeWindow, coin: Optional[str] = None) -> Iterable:
+        return self._fills
+
+class _WalletSink:
+    """diff_sink אחד משותף לכל הארנקים ב-run_many: כל רשומה מקבלת את ה-wallet שלה."""
+    __slots__ = ("_sink", "_wallet")
+
+    def __init__(self, sink, wallet: str):
+        self._sink = sink
+        self._wallet = wallet
 
-    us_rows = _normalize_all(us_fills)
-    hl_rows = _normalize_all(hl_fills)
+    def write(self, kind: str, record: Dict[str, Any]) -> None:
+        self._sink.write(kind, {"wallet": self._wallet, **record})
 
-    from ..services.compare_service import compare
-    return compare(us_rows, hl_rows, matcher)
+def run_many(wallets: Sequence[str], window: TimeWindow, us_provider: FillProvider,
+             hl_provider: FillProvider, matcher, coin: Optional[str] = None,
+             *, deadline_sec: Optional[float] = None, diff_sink=None) -> Dict[str, Any]:
+    """
+    אימות של הרבה ארנקים על אותו חלון: צד US נמשך ב-fetch_fills_many (ב-Redshift: statement
+    אחד לכל batch של ארנקים במקום statement לארנק), וכל ארנק עובר run מול HL בתורו.
+    deadline_sec משותף לכל הריצה. ב-result: summary מצטבר + result לכל ארנק.
+    diff_sink → ה-diffs של כל הארנקים נכתבים אליו (כל רשומה עם "wallet"), ולכל ארנק נשארים
+    רק summary ו-timings – הגודל של ה-result לא תלוי בכמות ה-diffs.
+    """
+    t0 = time.perf_counter()
+    deadline = time.monotonic() + deadline_sec if deadline_sec is not None else None
+    results: Dict[str, Dict[str, Any]] = {}
+    summary: Dict[str, int] = {}
+    for wallet, us_fills in us_provider.fetch_fills_many(wallets, window, coin):
+        left = None
+        if deadline is not None:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise VerificationTimeout("verification deadline exceeded")
+        sink = _WalletSink(diff_sink, wallet) if diff_sink is not None else None
+        res = run(wallet, window, _Prefetched(us_fills), hl_provider, matcher, coin,
+                  deadline_sec=left, diff_sink=sink)
+        if sink is not None:
+            res = {"summary": res["summary"], "timings": res["timings"]}
+        results[wallet] = res
+        for k, v in res["summary"].items():
+            summary[k] = summary.get(k, 0) + v
+    summary["wallets"] = len(results)
+    return {
+        "summary": summary,
+        "wallets": results,
+        "timings": {"total_ms": round((time.perf_counter() - t0) * 1000, 1)},
+    }
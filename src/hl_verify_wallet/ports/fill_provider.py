@@ -0,0 +1,42 @@
+# src/hl_verify_wallet/ports/fill_provider.py
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+from ..domain.models import Fill
+from ..domain.digest import BucketDigest, BucketKey, digest_fills
+from ..domain.fill_batch import FillBatch
+from ..domain.time_window import TimeWindow
+
+class FillProvider(ABC):
+    """מקור fills (Redshift / HL). חייב להחזיר fills ממוינים לפי ts_ms."""
+    @abstractmethod
+    def fetch_fills(self, wallet: str, window: TimeWindow, coin: Optional[str] = None) -> Iterable[Fill]: ...
+
+    def fetch_fills_cancellable(self, wallet: str, window: TimeWindow, coin: Optional[str] = None,
+                                *, cancel: threading.Event) -> Iterable[Fill]:
+        """
+        כמו fetch_fills, כשהצרכן רץ ב-thread אחר ויכול לוותר באמצע (cancel נקבע).
+        ברירת המחדל מתעלמת מ-cancel; ספק שמדפדף ברשת עוצר בו את הבקשות עצמן.
+        """
+        return self.fetch_fills(wallet, window, coin)
+
+    def fetch_fill_batch(self, wallet: str, window: TimeWindow, coin: Optional[str] = None) -> FillBatch:
+        """אותם fills בייצוג עמודתי. ברירת המחדל צורכת את fetch_fills בזרימה."""
+        return FillBatch.from_fills(self.fetch_fills(wallet, window, coin))
+
+    def fetch_fills_many(self, wallets: Sequence[str], window: TimeWindow,
+                         coin: Optional[str] = None) -> Iterator[Tuple[str, Iterator[Fill]]]:
+        """
+        (wallet, fills) לכל ארנק. ברירת המחדל – fetch_fills לכל ארנק בנפרד;
+        ספק עם DB יכול למשוך כמה ארנקים ב-statement אחד. כל iterator תקף עד שמבקשים את הבא.
+        """
+        for w in dict.fromkeys(wallets):
+            yield w, iter(self.fetch_fills(w, window, coin))
+
+    def fetch_digests(self, wallet: str, window: TimeWindow, bucket_ms: int,
+                      coin: Optional[str] = None) -> Dict[BucketKey, BucketDigest]:
+        """
+        תקצירים לכל (coin, דלי של bucket_ms) על [start_ms, end_ms).
+        ברירת המחדל מחשבת אותם מקומית תוך זרימה על fetch_fills; ספק עם DB יכול לדחוף את זה ל-SQL.
+        """
+        return digest_fills(self.fetch_fills(wallet, window, coin), bucket_ms, window.end_ms)
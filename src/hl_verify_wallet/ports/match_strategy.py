@@ -0,0 +1,26 @@
+# src/hl_verify_wallet/ports/match_strategy.py
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+class MatchStrategy(ABC):
+    """
+    אסטרטגיית התאמה בין fill מצד US לבין fill מצד HL.
+    key – מפתח דלי (רק fills עם אותו key מושווים); equals – האם שני fills תואמים.
+    index_key / probe_keys – אינדקס משני בתוך הדלי: fill נשמר תחת index_key שלו, ו-fill נכנס
+    מחפש רק בתאים של probe_keys שלו. ברירת המחדל – תא אחד = key.
+    """
+    tol_ts: int = 0
+    # True → ההשוואה נעשית ברמת קבוצה לפי key (services.grouped_compare) ולא fill מול fill
+    aggregate: bool = False
+
+    @abstractmethod
+    def key(self, f) -> tuple: ...
+    @abstractmethod
+    def equals(self, a, b) -> bool: ...
+
+    def index_key(self, f) -> tuple:
+        return self.key(f)
+
+    def probe_keys(self, f) -> Iterable[tuple]:
+        """כל התאים שעשויים להכיל fill ש-equals לו (חייב לכלול את index_key של כל fill כזה)."""
+        return (self.index_key(f),)
@@ -0,0 +1,7 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+class Presenter(ABC):
+    """מציג את תוצאת האימות (stdout / קובץ / response)."""
+    @abstractmethod
+    def render(self, result: Dict[str, Any]) -> None: ...
@@ -0,0 +1,16 @@
+# src/hl_verify_wallet/ports/rate_limiter.py
+from abc import ABC, abstractmethod
+
+class RateLimiter(ABC):
+    """מגביל קצב לפי משקל בקשה (request weight), משותף לכל הקוראים בתהליך."""
+    @abstractmethod
+    def acquire(self, weight: float = 1.0) -> None:
+        """חוסם עד שיש מספיק משקל פנוי, ומחייב אותו."""
+    @abstractmethod
+    def charge(self, weight: float) -> None:
+        """חיוב נוסף לא-חוסם אחרי שהתשובה הגיעה (למשל משקל לפי כמות פריטים)."""
+    @abstractmethod
+    def on_success(self) -> None: ...
+    @abstractmethod
+    def on_throttle(self) -> None:
+        """השרת החזיר 429/5xx – יש להאט."""
@@ -1,15 +1,30 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 
 @dataclass(frozen=True)
 class WalletState:
     wallet_id: int
     next_start_ms: Optional[int]
     finished: bool
+    page_cursor: Optional[int] = None   # checkpoint בתוך ה-chunk שמתחיל ב-next_start_ms
+    wallet: Optional[str] = None        # כתובת הארנק (נדרש ל-scheduler)
+    updated_ms: Optional[int] = None    # מתי ה-state עודכן לאחרונה (staleness)
 
 class StateRepository(ABC):
     @abstractmethod
     def load(self, wallet_id: int) -> WalletState: ...
     @abstractmethod
     def save(self, wallet_id: int, next_start_ms: int, finished: bool) -> None: ...
+
+    def save_checkpoint(self, wallet_id: int, chunk_start_ms: int, page_cursor: int) -> None:
+        """checkpoint אחרי כל עמוד בתוך chunk. ברירת מחדל: לא נשמר (ה-chunk יימשך מחדש)."""
+        return None
+
+    @abstractmethod
+    def register(self, wallet_id: int, wallet: str) -> None:
+        """רישום ארנק לצי (ארנק חדש נכנס כ-pending ו'הכי ישן')."""
+
+    @abstractmethod
+    def pending(self, limit: Optional[int] = None) -> List[WalletState]:
+        """ארנקים שלא סיימו, מהישן (updated_ms) לחדש."""
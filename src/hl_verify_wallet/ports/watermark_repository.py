@@ -0,0 +1,13 @@
+# src/hl_verify_wallet/ports/watermark_repository.py
+from abc import ABC, abstractmethod
+from typing import Optional
+
+class WatermarkRepository(ABC):
+    """
+    לכל ארנק: ה-ts_ms שעד אליו Redshift ו-HL הוכחו כזהים (high-water mark).
+    אח של StateRepository – זה עוקב אחרי אימות, לא אחרי backfill.
+    """
+    @abstractmethod
+    def load(self, key: str) -> Optional[int]: ...
+    @abstractmethod
+    def save(self, key: str, verified_until_ms: int) -> None: ...
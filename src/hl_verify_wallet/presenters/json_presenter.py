@@ -1,7 +1,9 @@
 from ..ports.presenter import Presenter
+from ..adapters.powertools_logger import metrics
 from typing import Any, Dict
 import json
 
 class JsonPresenter(Presenter):
     def render(self, result: Dict[str, Any]) -> None:
-        print(json.dumps(result, default=str, ensure_ascii=False))
+        with metrics.timer("present_ms"):
+            print(json.dumps(result, default=str, ensure_ascii=False))
@@ -0,0 +1,94 @@
+import gzip, json, os
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+from ..ports.presenter import Presenter
+from ..adapters.powertools_logger import metrics
+
+# רשימות ה-diff בתוצאה של compare / compare_grouped
+DIFF_KINDS = ("missing_in_us", "missing_in_hl", "mismatched")
+
+class NdjsonSpillPresenter(Presenter):
+    """
+    כותב את ה-diffs כ-NDJSON (שורה לכל רשומה: {"kind": ..., **record}) לקובץ או stream, עם gzip אופציונלי.
+    compare/compare_grouped מקבלים אותו כ-diff_sink וקוראים ל-write תוך כדי ההשוואה, כך שהרשימות
+    לא נבנות בזיכרון. compact(result) מחזיר תוצאה בגודל קבוע: summary + דגימה של עד
+    sample_size רשומות לכל סוג + מצביע לקובץ.
+    """
+    def __init__(self, target: Union[str, BinaryIO], *, compress: bool = False,
+                 sample_size: int = 20, batch_size: int = 1000):
+        self.path: Optional[str] = None
+        if isinstance(target, str):
+            if compress and not target.endswith(".gz"):
+                target += ".gz"
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            self.path = target
+            self._raw: BinaryIO = open(target, "wb")
+            self._own_raw = True
+        else:
+            self._raw = target
+            self._own_raw = False
+        # gzip עוטף את ה-raw; ב-close רק ה-trailer נכתב, ה-stream של הקורא נשאר פתוח
+        self._out = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6) if compress else self._raw
+        self.compress = compress
+        self.sample_size = sample_size
+        self._batch = batch_size
+        self._buf: List[str] = []
+        self.samples: Dict[str, List[Dict[str, Any]]] = {k: [] for k in DIFF_KINDS}
+        self.counts: Dict[str, int] = {k: 0 for k in DIFF_KINDS}
+        self.records = 0
+        self.closed = False
+
+    def write(self, kind: str, record: Dict[str, Any]) -> None:
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        sample = self.samples.setdefault(kind, [])
+        if len(sample) < self.sample_size:
+            sample.append(record)
+        self._buf.append(json.dumps({"kind": kind, **record}, separators=(",", ":"),
+                                    default=str, ensure_ascii=False))
+        self.records += 1
+        if len(self._buf) >= self._batch:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buf:
+            self._out.write(("\n".join(self._buf) + "\n").encode("utf-8"))
+            self._buf = []
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._flush()
+        if self._out is not self._raw:
+            self._out.close()
+        if self._own_raw:
+            self._raw.close()
+        else:
+            self._raw.flush()
+        self.closed = True
+
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb): self.close()
+
+    def compact(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        סוגר את הקובץ ומחזיר את result עם דגימה במקום הרשימות המלאות.
+        רשומות שעדיין נמצאות ב-result (תוצאה שלא הוזרמה) נכתבות לקובץ קודם.
+        """
+        out = dict(result)
+        for kind in DIFF_KINDS:
+            for rec in result.get(kind) or ():
+                self.write(kind, rec)
+            if kind in result or self.counts.get(kind):
+                out[kind] = self.samples.get(kind, [])
+        self.close()
+        out["spill"] = {
+            "path": self.path,
+            "format": "ndjson",
+            "gzip": self.compress,
+            "records": self.records,
+            "sample_size": self.sample_size,
+        }
+        return out
+
+    def render(self, result: Dict[str, Any]) -> None:
+        with metrics.timer("present_ms"):
+            print(json.dumps(self.compact(result), default=str, ensure_ascii=False))
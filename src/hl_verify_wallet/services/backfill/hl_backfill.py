@@ -1,31 +1,72 @@
 # src/hl_verify_wallet/services/backfill/hl_backfill.py
-import json, random, time, logging
-from typing import List, Optional, Dict, Any
-from decimal import Decimal
+import json, queue, random, threading, time, logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Dict, Any, Tuple
+from decimal import Decimal, ROUND_HALF_UP
 from ...domain.models import Fill
 from ...domain.time_window import TimeWindow
 from ...ports.sink import FillSink
-from ...adapters.hyperliquid_client import HLClient
-from ...services.normalize.trade_row import set_role_from_crossed, _compute_trade_id, _q6
+from ...adapters.powertools_logger import metrics
+from ...services.normalize.trade_row import _DEC6
 from ...ports.state_repository import StateRepository, WalletState
+from ...ports.rate_limiter import RateLimiter
+from ...errors import HLCancelledError, HLTooManyFillsError
+
+if TYPE_CHECKING:  # httpx נטען רק עם הלקוח עצמו
+    from ...adapters.hyperliquid_client import HLClient
+
+try:  # decoder מהיר אופציונלי
+    import orjson as _orjson
+except ImportError:  # pragma: no cover
+    _orjson = None
 
 RETRY_STATUSES = {403, 407, 429, 500, 502, 503, 504}
 
+# side גולמי → A/B (הווריאנטים הנפוצים מחושבים מראש; השאר דרך lower())
+_SIDE_TABLE = {v: "A" for v in ("A", "a", "ask", "Ask", "ASK")}
+_SIDE_TABLE.update({v: "B" for v in ("B", "b", "bid", "Bid", "BID")})
+
+def _json_loads(data: str) -> Any:
+    if _orjson is not None:
+        try:
+            return _orjson.loads(data)
+        except _orjson.JSONDecodeError:
+            pass  # למשל int מעבר ל-64 ביט – json הרגיל מתמודד
+    return json.loads(data)
+
+# משקל /info ל-userFillsByTime: 20 לבקשה + 1 לכל 20 פריטים שחוזרים
+USER_FILLS_WEIGHT = 20
+USER_FILLS_ITEMS_PER_WEIGHT = 20
+# מקסימום fills בתשובה אחת של userFillsByTime
+PAGE_CAP = 2000
+
 class HLBackfillService:
     def __init__(
         self,
-        client: HLClient,
+        client: "HLClient",
         *,
         retries: int = 5,
         timeout_sec: float = 15.0,
         tol_sleep_cap: float = 5.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        page_cap: int = PAGE_CAP,
+        cancel: Optional[threading.Event] = None,
     ):
         self.client = client
+        # cancel נקבע מבחוץ (למשל הצד השני של האימות נכשל) – הבקשה הבאה לא יוצאת
+        self.cancel = cancel
+        self.page_cap = page_cap
         self.retries = retries
         self.timeout_sec = timeout_sec
         self.tol_sleep_cap = tol_sleep_cap
+        self.rate_limiter = rate_limiter
 
     # ---------- low-level page fetch ----------
+    def _check_cancel(self) -> None:
+        if self.cancel is not None and self.cancel.is_set():
+            raise HLCancelledError("backfill cancelled")
+
     def fetch_page(self, wallet: str, start_ms: int, end_ms: Optional[int] = None) -> List[Dict[str, Any]]:
         payload: Dict[str, Any] = {
             "type": "userFillsByTime",
@@ -36,80 +77,120 @@ class HLBackfillService:
         if end_ms is not None:
             payload["endTime"] = int(end_ms)
 
+        self._check_cancel()
+        # hit ב-cache לא יוצא לרשת, ולכן נבדק לפני ה-acquire ולא מחויב במשקל
+        hit = self.client.cached(payload)
+        if hit is not None:
+            return _json_loads(hit.text) or []
+
         last_err = None
         for a in range(self.retries):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(USER_FILLS_WEIGHT)
+            self._check_cancel()   # גם אחרי retry/המתנה לדלי
             try:
                 r = self.client.request_info(payload, timeout=self.timeout_sec)
                 status = getattr(r, "status_code", None)
                 data = r.text
                 if status == 200:
-                    return json.loads(data) or []
+                    with metrics.timer("hl.decode_ms"):
+                        rows = _json_loads(data) or []
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.on_success()
+                        self.rate_limiter.charge(len(rows) // USER_FILLS_ITEMS_PER_WEIGHT)
+                    return rows
                 if status in RETRY_STATUSES:
                     last_err = f"http {status}"
-                    time.sleep(min(2 ** a, self.tol_sleep_cap) + random.random())
+                    metrics.incr("hl.retries")
+                    self._backoff(a, status)
                     continue
                 raise RuntimeError(f"HTTP {status}: {str(data)[:200]}")
             except Exception as e:
                 last_err = str(e)
-                time.sleep(min(2 ** a, self.tol_sleep_cap) + random.random())
+                metrics.incr("hl.retries")
+                self._backoff(a, None)
         raise RuntimeError(last_err or "request failed")
 
-    # ---------- parse & normalize one fill ----------
-    def _parse_fill(self, wallet: str, raw: Dict[str, Any]) -> Optional[Fill]:
-        coin = str(raw.get("coin", ""))
-        if coin.startswith("@"):
-            return None  # ספוט → לא רלוונטי
-
-        # נרמול side ל-A/B
-        side_raw = raw.get("side")
-        if isinstance(side_raw, str):
-            low = side_raw.lower()
-            if low in ("ask", "a"):
-                side = "A"
-            elif low in ("bid", "b"):
-                side = "B"
-            else:
-                side = side_raw
+    def _backoff(self, attempt: int, status: Optional[int]) -> None:
+        # עם rate limiter: 429/5xx מאטים את הדלי המשותף, וה-acquire הבא הוא שממתין.
+        if self.rate_limiter is not None and status is not None and (status == 429 or status >= 500):
+            self.rate_limiter.on_throttle()
+            return
+        delay = min(2 ** attempt, self.tol_sleep_cap) + random.random()
+        if self.cancel is not None:
+            self.cancel.wait(delay)
         else:
-            side = side_raw
-
-        px = Decimal(str(raw.get("px")))
-        sz = Decimal(str(raw.get("sz")))
-        ts_ms = int(raw.get("time"))
-        base_tid = raw.get("tid")
-        base_tid = int(base_tid) if base_tid is not None else None
-        h = raw.get("hash")
-        crossed = raw.get("crossed")  # יכול להיות None ב-info
-
-        f = Fill(
-            wallet=wallet,
-            coin=coin,
-            side=side,
-            px=px,
-            sz=sz,
-            ts_ms=ts_ms,
-            hash=h,
-            base_tid=base_tid,
-        )
-        f = set_role_from_crossed(f, crossed)  # taker/maker אם קיים crossed
-
-        trade_id = _compute_trade_id(f.base_tid, f.side) if f.base_tid is not None else None
-        notional = _q6(px * sz)
-
-        return Fill(
-            wallet=f.wallet,
-            coin=f.coin,
-            side=f.side,
-            px=f.px,
-            sz=f.sz,
-            ts_ms=f.ts_ms,
-            hash=f.hash,
-            base_tid=f.base_tid,
-            role=f.role,
-            counterparty=None,
-            trade_id=trade_id,
-            notional_usd=notional,
-        )
+            time.sleep(delay)
+
+    # ---------- pagination ----------
+    def _advance(self, wallet: str, page: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        (השורות לפליטה, ה-startTime הבא) לעמוד לא ריק.
+        עמוד חלקי (< page_cap) הוא סוף הטווח: הכל נפלט, ממשיכים מ-last_time + 1.
+        עמוד מלא אולי נחתך באמצע ה-ms האחרון שלו – השורות של אותו ms לא נפלטות, והבקשה הבאה
+        מתחילה ב-last_time ומביאה אותו שלם. כך אין צורך ב-dedupe, ו-fills באותו ms לא הולכים לאיבוד.
+        עמוד מלא שכולו אותו ms → HLTooManyFillsError (אי אפשר לדפדף הלאה בלי לאבד fills).
+        """
+        last_time = int(page[-1]["time"])
+        if len(page) < self.page_cap:
+            return page, last_time + 1
+        if int(page[0]["time"]) == last_time:
+            raise HLTooManyFillsError(
+                f"wallet={wallet}: {len(page)} fills at ts={last_time} fill a whole page")
+        cut = len(page) - 1
+        while int(page[cut - 1]["time"]) == last_time:
+            cut -= 1
+        return page[:cut], last_time
+
+    # ---------- parse & normalize ----------
+    def _parse_page(self, wallet: str, page: List[Dict[str, Any]]) -> List[Fill]:
+        """
+        ממיר עמוד שלם של fills גולמיים ל-Fill סופיים במעבר אחד:
+        כל Fill נבנה פעם אחת (כולל role/trade_id/notional), ספוט מסונן לפני כל עבודה אחרת.
+        """
+        t0 = time.perf_counter()
+        out: List[Fill] = []
+        append = out.append
+        side_table = _SIDE_TABLE
+        dec = Decimal
+        dec6 = _DEC6
+        for raw in page:
+            coin = raw.get("coin", "")
+            if type(coin) is not str:
+                coin = str(coin)
+            if coin[:1] == "@":
+                continue  # ספוט → לא רלוונטי
+
+            # נרמול side ל-A/B
+            side = raw.get("side")
+            if type(side) is str:
+                side = side_table.get(side) or side_table.get(side.lower(), side)
+
+            px = raw.get("px")
+            px = dec(px) if type(px) is str else dec(str(px))
+            sz = raw.get("sz")
+            sz = dec(sz) if type(sz) is str else dec(str(sz))
+            base_tid = raw.get("tid")
+            if base_tid is not None:
+                base_tid = int(base_tid)
+                trade_id = base_tid * 10 + (1 if side == "B" else 2)  # _compute_trade_id
+            else:
+                trade_id = None
+            crossed = raw.get("crossed")  # יכול להיות None ב-info
+            role = None if crossed is None else ("taker" if crossed else "maker")
+
+            append(Fill(
+                wallet, coin, side, px, sz, int(raw.get("time")), raw.get("hash"),
+                base_tid, role, None, trade_id,
+                (px * sz).quantize(dec6, rounding=ROUND_HALF_UP),  # _q6
+            ))
+        metrics.observe("hl.parse_ms", (time.perf_counter() - t0) * 1000)
+        metrics.incr("hl.rows_parsed", len(out))
+        return out
+
+    def _parse_fill(self, wallet: str, raw: Dict[str, Any]) -> Optional[Fill]:
+        rows = self._parse_page(wallet, [raw])
+        return rows[0] if rows else None
 
     # ---------- simple (single-window) backfill ----------
     def process_wallet(self, wallet: str, window: TimeWindow, sink: FillSink) -> int:
@@ -123,25 +204,223 @@ class HLBackfillService:
             if n == 0:
                 break
 
-            for f_raw in page:
-                parsed = self._parse_fill(wallet, f_raw)
-                if parsed is None:
-                    continue
+            rows, cursor = self._advance(wallet, page)
+            for parsed in self._parse_page(wallet, rows):
                 sink.add(parsed)
                 total += 1
                 if sink.should_flush():
                     sink.flush()
 
-            last_time = int(page[-1]["time"])
-            cursor = last_time + 1
-
             if last_cursor is not None and cursor <= last_cursor:
                 logging.warning("cursor did not advance, breaking to avoid loop")
                 break
             last_cursor = cursor
 
-        if sink.should_flush():
-            sink.flush()
+        sink.flush()
+
+        logging.info("wallet=%s rows=%d", wallet, total)
+        return total
+
+    # ---------- pipelined backfill ----------
+    _EOS = object()   # סוף הזרם בין השלבים
+
+    @staticmethod
+    def _put(q: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+        """put חוסם עם backpressure; מוותר אם שלב מאוחר יותר נכשל (stop)."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @classmethod
+    def _get(cls, q: "queue.Queue", stop: threading.Event) -> Any:
+        """get חוסם; מחזיר _EOS אם הצינור נעצר."""
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return cls._EOS
+
+    def process_wallet_pipelined(self, wallet: str, window: TimeWindow, sink: FillSink,
+                                 *, queue_pages: int = 4) -> int:
+        """
+        כמו process_wallet, אבל בשלושה שלבים מחוברים בתורים חסומים (queue_pages עמודים כל אחד):
+        fetch (HTTP + JSON) → parse (_parse_page) → sink (ב-thread הקורא).
+        ה-fetcher שולח את הבקשה הבאה ברגע שידוע ה-time האחרון של העמוד, בזמן שהעמוד הקודם
+        עוד מפוענח ונכתב. sink איטי ממלא את התורים ועוצר את ה-fetcher – אין buffering בלי גבול.
+        שגיאה בכל שלב עוצרת את כולם ונזרקת מכאן.
+        """
+        if queue_pages < 1:
+            raise ValueError("queue_pages must be >= 1")
+        raw_q: "queue.Queue" = queue.Queue(maxsize=queue_pages)
+        parsed_q: "queue.Queue" = queue.Queue(maxsize=queue_pages)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        def fetcher() -> None:
+            cursor = int(window.start_ms)
+            try:
+                while True:
+                    page = self.fetch_page(wallet, cursor, window.end_ms)
+                    if not page:
+                        break
+                    rows, nxt = self._advance(wallet, page)
+                    if not self._put(raw_q, rows, stop):
+                        return
+                    if nxt <= cursor:
+                        logging.warning("cursor did not advance, breaking to avoid loop")
+                        break
+                    cursor = nxt
+            except BaseException as e:  # noqa: BLE001 – מועבר ל-thread הקורא
+                errors.append(e)
+                stop.set()
+            finally:
+                self._put(raw_q, self._EOS, stop)
+
+        def parser() -> None:
+            try:
+                while True:
+                    page = self._get(raw_q, stop)
+                    if page is self._EOS:
+                        break
+                    if not self._put(parsed_q, self._parse_page(wallet, page), stop):
+                        return
+            except BaseException as e:  # noqa: BLE001
+                errors.append(e)
+                stop.set()
+            finally:
+                self._put(parsed_q, self._EOS, stop)
+
+        threads = [threading.Thread(target=fetcher, name="hl-fetch", daemon=True),
+                   threading.Thread(target=parser, name="hl-parse", daemon=True)]
+        for t in threads:
+            t.start()
+
+        total = 0
+        try:
+            while True:
+                rows = self._get(parsed_q, stop)
+                if rows is self._EOS:
+                    break
+                for parsed in rows:
+                    sink.add(parsed)
+                    total += 1
+                    if sink.should_flush():
+                        sink.flush()
+        finally:
+            stop.set()   # אחרי EOS השלבים כבר סיימו; אחרי שגיאה ב-sink – עוצר אותם
+            for t in threads:
+                t.join()
+        if errors:
+            raise errors[0]
+        sink.flush()
+
+        logging.info("wallet=%s rows=%d", wallet, total)
+        return total
+
+    # ---------- sharded (parallel) backfill ----------
+    def _fetch_shard(self, wallet: str, start_ms: int, end_ms: int) -> List[Fill]:
+        """מושך תת-חלון אחד במלואו (pagination רגיל) ומחזיר את ה-fills המנורמלים לפי סדר ts."""
+        out: List[Fill] = []
+        cursor = int(start_ms)
+        while True:
+            page = self.fetch_page(wallet, cursor, end_ms)
+            if not page:
+                break
+
+            rows, nxt = self._advance(wallet, page)
+            out.extend(self._parse_page(wallet, rows))
+
+            if len(page) < self.page_cap or nxt > end_ms:
+                break  # עמוד חלקי הוא סוף תת-החלון – בלי בקשה ריקה נוספת
+            if nxt <= cursor:
+                logging.warning("cursor did not advance, breaking to avoid loop")
+                break
+            cursor = nxt
+        return out
+
+    def _aligned_parts(self, wallet: str, window: TimeWindow,
+                       shard_ms: int) -> Tuple[Optional[List[Dict[str, Any]]], List[TimeWindow]]:
+        """
+        (עמוד ה-probe אם הוא כל החלון, תתי-חלונות מיושרים למשיכה).
+        בקשת probe אחת על כל החלון מחזירה את ה-fills הראשונים מ-start_ms לפי סדר זמן:
+        - עמוד חלקי (או ריק) הוא כל מה שיש בחלון – אין מה לפצל
+        - עמוד מלא: מתחילים מה-fill הראשון (ולא משנים ריקות מ-start_ms=0), ומדלגים על
+          תתי-חלונות שהעמוד מכסה ואין בהם fill; מתת-החלון של ה-time האחרון והלאה – הכל.
+        הגבולות עדיין כפולות של shard_ms, ולכן אותם תתי-חלונות נבחרים בכל ריצה.
+        """
+        probe = self.fetch_page(wallet, window.start_ms, window.end_ms)
+        if len(probe) < self.page_cap:
+            return probe, []
+        last = int(probe[-1]["time"])
+        busy = {int(r["time"]) // shard_ms for r in probe}
+        parts = [w for w in TimeWindow(int(probe[0]["time"]), window.end_ms).split_aligned(shard_ms)
+                 if w.end_ms >= last or w.start_ms // shard_ms in busy]
+        return None, parts
+
+    @staticmethod
+    def _emit(sink: FillSink, rows: List[Fill]) -> int:
+        for parsed in rows:
+            sink.add(parsed)
+            if sink.should_flush():
+                sink.flush()
+        return len(rows)
+
+    def process_wallet_sharded(
+        self,
+        wallet: str,
+        window: TimeWindow,
+        sink: FillSink,
+        *,
+        shards: int = 8,
+        max_concurrency: int = 4,
+        shard_ms: Optional[int] = None,
+    ) -> int:
+        """
+        כמו process_wallet, אבל מפצל את החלון ל-shards תתי-חלונות ומושך אותם במקביל
+        (לכל היותר max_concurrency בקשות בו-זמנית).
+        עם shard_ms – הפיצול לפי גבולות זמן קבועים (ולא ל-N חלקים), כך שעמודי shards
+        שהסתיימו חוזרים על אותם (startTime, endTime) בכל ריצה ונענים מה-page cache.
+        לפני הפיצול בקשת probe אחת (_aligned_parts) מדלגת על ההיסטוריה הריקה.
+        תתי-החלונות זרים ומסודרים, לכן מעבירים אותם ל-sink לפי סדר ה-shard –
+        והתוצאה זהה לזו של הנתיב הסדרתי (גם כש-ms נחתך בגבול עמוד: שניהם דרך _advance).
+        בזיכרון מוחזקים לכל היותר max_concurrency shards.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        head: Optional[List[Dict[str, Any]]] = None
+        if shard_ms:
+            head, planned = self._aligned_parts(wallet, window, shard_ms)
+        else:
+            planned = window.split(shards)
+        parts = iter(planned)
+        total = self._emit(sink, self._parse_page(wallet, head)) if head else 0
+
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="hl-shard") as ex:
+            pending = deque()
+
+            def submit_next() -> None:
+                w = next(parts, None)
+                if w is not None:
+                    pending.append(ex.submit(self._fetch_shard, wallet, w.start_ms, w.end_ms))
+
+            for _ in range(max_concurrency):
+                submit_next()
+
+            try:
+                while pending:
+                    rows = pending.popleft().result()
+                    submit_next()
+                    total += self._emit(sink, rows)
+            finally:
+                for fut in pending:
+                    fut.cancel()
+
+        sink.flush()
 
         logging.info("wallet=%s rows=%d", wallet, total)
         return total
@@ -160,13 +439,23 @@ class HLBackfillService:
         max_empty_chunks: int,
         start_ms_override: int = 0,
         now_ms_provider=lambda: int(time.time() * 1000),
+        max_chunks: Optional[int] = None,
+        min_chunk_ms: int = 60_000,
+        max_chunk_ms: Optional[int] = None,
     ) -> int:
         """
         לוגיקת backfill משודרגת בסגנון השותף:
-        - ריצה ב-chunks של זמן (chunk_ms)
-        - שמירת state (next_start_ms, finished)
-        - עצירה כשהגענו 'קרוב מדי להווה' (ahead_safety_ms)
+        - ריצה ב-chunks של זמן; הגודל מתחיל ב-chunk_ms ומסתגל לצפיפות:
+          chunk ריק → פי 2 (עד max_chunk_ms, ברירת מחדל 64*chunk_ms),
+          עמוד שחזר מלא (page_cap) → חצי (עד min_chunk_ms)
+        - ארנק חדש: בקשה אחת מ-start_ms עד האופק מוצאת את ה-fill הראשון (העמודים עולים בזמן),
+          כך שלא עוברים על שנים של chunks ריקים
+        - שמירת state (next_start_ms, finished) + checkpoint של page_cursor אחרי כל עמוד,
+          כך ש-resume אחרי קריסה מושך מחדש לכל היותר עמוד אחד
+        - עצירה כשהגענו 'קרוב מדי להווה' (ahead_safety_ms); chunk לא חוצה את האופק
         - ספירת רצפים של chunks ריקים → סימן שסיימנו
+        - max_chunks: עצירה אחרי N chunks בלי לסמן finished (time-slice ל-scheduler)
+        - עמוד מלא: ה-ms האחרון נמשך מחדש בבקשה הבאה (_advance); עמוד מלא שכולו באותו ms → HLTooManyFillsError
         """
         st = state_repo.load(wallet_id)
         if st.finished:
@@ -176,32 +465,57 @@ class HLBackfillService:
         cursor = int(start_ms_override) if start_ms_override > 0 else (
             int(st.next_start_ms) if st.next_start_ms is not None else int(start_ms)
         )
+        resume_page_cursor = st.page_cursor if start_ms_override <= 0 else None
+        min_size = min(min_chunk_ms, chunk_ms)
+        max_size = max_chunk_ms if max_chunk_ms is not None else 64 * chunk_ms
+        size = chunk_ms
+
+        if start_ms_override <= 0 and st.next_start_ms is None:
+            horizon = now_ms_provider() - ahead_safety_ms
+            if cursor <= horizon:
+                probe = self.fetch_page(wallet, cursor, horizon)
+                if not probe:
+                    logging.info("wallet=%s no fills before %d", wallet, horizon)
+                    state_repo.save(wallet_id, horizon + 1, True)
+                    return 0
+                cursor = max(cursor, int(probe[0]["time"]))
 
         total = 0
         empty_chunks = 0
+        chunks = 0
 
         while True:
-            if now_ms_provider() - cursor < ahead_safety_ms:
+            if max_chunks is not None and chunks >= max_chunks:
+                break
+            horizon = now_ms_provider() - ahead_safety_ms
+            if cursor > horizon:
                 # קרוב מדי להווה – מסמנים שסיימנו (נוכל להמשיך בעתיד)
                 state_repo.save(wallet_id, cursor, True)
                 break
 
             chunk_start = cursor
-            chunk_end = chunk_start + chunk_ms - 1
+            chunk_end = min(chunk_start + size - 1, horizon)
             page_total = 0
             page_cursor = chunk_start
+            if resume_page_cursor is not None and resume_page_cursor >= chunk_start:
+                # ה-checkpoint נכתב אולי ב-chunk גדול יותר מ-chunk_ms – מרחיבים כדי לא לחזור אחורה
+                page_cursor = int(resume_page_cursor)
+                chunk_end = max(chunk_end, min(page_cursor, horizon))
+            resume_page_cursor = None
+            capped = False
             sample = None
 
-            while True:
+            while page_cursor <= chunk_end:
                 page = self.fetch_page(wallet, page_cursor, chunk_end)
                 n = len(page)
                 if n == 0:
                     break
 
-                for f_raw in page:
-                    parsed = self._parse_fill(wallet, f_raw)
-                    if parsed is None:
-                        continue
+                if n >= self.page_cap:
+                    capped = True
+                rows, page_cursor = self._advance(wallet, page)
+
+                for parsed in self._parse_page(wallet, rows):
                     sink.add(parsed)
                     total += 1
                     page_total += 1
@@ -210,18 +524,21 @@ class HLBackfillService:
                     if sink.should_flush():
                         sink.flush()
 
-                last_time = int(page[-1]["time"])
-                page_cursor = last_time + 1
-                if last_time >= chunk_end:
+                if page_cursor > chunk_end:
                     break
-
-            if sink.should_flush():
                 sink.flush()
+                state_repo.save_checkpoint(wallet_id, chunk_start, page_cursor)
+
+            # flush מלא לפני שמירת ה-state: מה שנרשם כ"בוצע" כבר כתוב ב-sink
+            sink.flush()
 
             if page_total == 0:
                 empty_chunks += 1
+                size = min(size * 2, max_size)
             else:
                 empty_chunks = 0
+                if capped:
+                    size = max(size // 2, min_size)
                 if sample:
                     logging.info("sample=%s", json.dumps({
                         "ts_ms": sample.ts_ms, "coin": sample.coin, "side": sample.side,
@@ -229,9 +546,11 @@ class HLBackfillService:
                         "base_tid": sample.base_tid, "trade_id": sample.trade_id,
                         "hash": sample.hash
                     }, separators=(",", ":")))
-                logging.info("wallet=%s chunk_start=%d rows=%d", wallet, chunk_start, page_total)
+                logging.info("wallet=%s chunk_start=%d rows=%d next_chunk_ms=%d",
+                             wallet, chunk_start, page_total, size)
 
             cursor = chunk_end + 1
+            chunks += 1
             state_repo.save(wallet_id, cursor, False)
 
             if empty_chunks >= max_empty_chunks:
@@ -0,0 +1,154 @@
+# src/hl_verify_wallet/services/backfill/scheduler.py
+import heapq, itertools, logging, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from ...adapters.hyperliquid_client import HLClient
+from ...ports.rate_limiter import RateLimiter
+from ...ports.sink import FillSink
+from ...ports.state_repository import StateRepository, WalletState
+from .hl_backfill import HLBackfillService, PAGE_CAP
+
+@dataclass
+class SchedulerStats:
+    wallets_finished: int = 0
+    slices: int = 0
+    fills: int = 0
+    errors: Dict[int, str] = field(default_factory=dict)
+    elapsed_sec: float = 0.0
+
+    @property
+    def fills_per_sec(self) -> float:
+        return self.fills / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "wallets_finished": self.wallets_finished,
+            "slices": self.slices,
+            "fills": self.fills,
+            "errors": len(self.errors),
+            "elapsed_sec": round(self.elapsed_sec, 3),
+            "fills_per_sec": round(self.fills_per_sec, 1),
+        }
+
+class BackfillScheduler:
+    """
+    מריץ process_wallet_chunked על צי ארנקים, מתוך state_repo.pending():
+    - pool של workers; לכל worker HLClient משלו (connection pool משלו) ו-sink משלו
+    - עדיפות לפי staleness (updated_ms הישן ביותר קודם)
+    - time-slicing: כל ארנק מקבל לכל היותר slice_chunks chunks ואז חוזר לסוף התור,
+      כך שארנק "לוויתן" לא מרעיב את השאר
+    - fills/sec ברמת הצי (stats / progress()) – לכיול גודל ה-pool מול ה-rate limit
+    """
+    def __init__(
+        self,
+        client_factory: Callable[[], HLClient],
+        state_repo: StateRepository,
+        sink_factory: Callable[[int], FillSink],
+        *,
+        workers: int = 4,
+        start_ms: int = 0,
+        chunk_ms: int = 7 * 24 * 3600 * 1000,
+        ahead_safety_ms: int = 300_000,
+        max_empty_chunks: int = 8,
+        slice_chunks: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        retries: int = 5,
+        timeout_sec: float = 15.0,
+        page_cap: int = PAGE_CAP,
+        now_ms_provider: Callable[[], int] = lambda: int(time.time() * 1000),
+    ):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self._client_factory = client_factory
+        self._repo = state_repo
+        self._sink_factory = sink_factory
+        self._workers = workers
+        self._chunk_kwargs = dict(start_ms=start_ms, chunk_ms=chunk_ms, ahead_safety_ms=ahead_safety_ms,
+                                  max_empty_chunks=max_empty_chunks, now_ms_provider=now_ms_provider)
+        # רצף chunks ריקים נספר בתוך slice – slice קצר ממנו לא היה מסיים ארנק אף פעם
+        self._slice = max(slice_chunks, max_empty_chunks)
+        self._rate_limiter = rate_limiter
+        self._retries = retries
+        self._timeout = timeout_sec
+        self._page_cap = page_cap
+        self._now = now_ms_provider
+        self._heap: List[Tuple[int, int, int, str]] = []
+        self._seq = itertools.count()
+        self._inflight = 0
+        self._cv = threading.Condition()
+        self._stats = SchedulerStats()
+        self._t0: Optional[float] = None
+
+    def _push(self, st: WalletState, priority: int) -> None:
+        heapq.heappush(self._heap, (priority, next(self._seq), st.wallet_id, st.wallet))
+
+    def _next(self) -> Optional[Tuple[int, str]]:
+        with self._cv:
+            while not self._heap and self._inflight > 0:
+                self._cv.wait()      # ארנק in-flight עוד עשוי לחזור לתור
+            if not self._heap:
+                return None
+            _, _, wallet_id, wallet = heapq.heappop(self._heap)
+            self._inflight += 1
+            return wallet_id, wallet
+
+    def _done(self, wallet_id: int, wallet: str, fills: int, requeue: bool, error: Optional[str]) -> None:
+        with self._cv:
+            self._inflight -= 1
+            self._stats.slices += 1
+            self._stats.fills += fills
+            if error is not None:
+                self._stats.errors[wallet_id] = error
+            elif requeue:
+                # חזרה לסוף התור: עודכן עכשיו, ולכן פחות stale מכל מי שממתין
+                heapq.heappush(self._heap, (self._now(), next(self._seq), wallet_id, wallet))
+            else:
+                self._stats.wallets_finished += 1
+            self._cv.notify_all()
+
+    def _worker(self, idx: int) -> None:
+        client = self._client_factory()
+        sink = self._sink_factory(idx)
+        try:
+            svc = HLBackfillService(client, retries=self._retries, timeout_sec=self._timeout,
+                                    rate_limiter=self._rate_limiter, page_cap=self._page_cap)
+            while True:
+                item = self._next()
+                if item is None:
+                    return
+                wallet_id, wallet = item
+                fills, requeue, error = 0, False, None
+                try:
+                    fills = svc.process_wallet_chunked(wallet_id, wallet, sink=sink, state_repo=self._repo,
+                                                       max_chunks=self._slice, **self._chunk_kwargs)
+                    requeue = not self._repo.load(wallet_id).finished
+                except Exception as e:  # ארנק אחד שנכשל לא עוצר את הצי
+                    logging.exception("wallet=%s backfill slice failed", wallet)
+                    error = str(e)
+                self._done(wallet_id, wallet, fills, requeue, error)
+        finally:
+            close = getattr(sink, "close", None)
+            if close is not None:
+                close()
+            client.close()
+
+    def progress(self) -> Dict[str, object]:
+        with self._cv:
+            if self._t0 is not None:
+                self._stats.elapsed_sec = time.perf_counter() - self._t0
+            out = self._stats.as_dict()
+            out["queued"] = len(self._heap)
+            out["inflight"] = self._inflight
+            return out
+
+    def run(self, limit: Optional[int] = None) -> SchedulerStats:
+        for st in self._repo.pending(limit):
+            self._push(st, st.updated_ms or 0)
+        self._t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="backfill") as ex:
+            for f in [ex.submit(self._worker, i) for i in range(self._workers)]:
+                f.result()
+        self._stats.elapsed_sec = time.perf_counter() - self._t0
+        logging.info("backfill fleet done %s", self._stats.as_dict())
+        return self._stats
@@ -0,0 +1,171 @@
+# src/hl_verify_wallet/services/compare_service.py
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from ..domain.models import Fill
+from ..ports.match_strategy import MatchStrategy
+from .normalize.trade_row import fill_to_dict
+
+MATCHED = "matched"
+MISSING_IN_US = "missing_in_us"   # קיים ב-HL, חסר ב-Redshift
+MISSING_IN_HL = "missing_in_hl"   # קיים ב-Redshift, חסר ב-HL
+
+_US, _HL = 0, 1
+
+class _Entry:
+    __slots__ = ("fill", "key", "seq", "alive")
+
+    def __init__(self, fill, key, seq):
+        self.fill = fill
+        self.key = key
+        self.seq = seq
+        self.alive = True
+
+def _ordered(rows: Iterable, label: str) -> Iterator:
+    prev = None
+    for r in rows:
+        if prev is not None and r.ts_ms < prev:
+            raise ValueError(f"{label} rows are not ordered by ts_ms ({r.ts_ms} < {prev})")
+        prev = r.ts_ms
+        yield r
+
+def iter_compare(
+    us_rows: Iterable,
+    hl_rows: Iterable,
+    matcher: MatchStrategy,
+    tol_ts_ms: Optional[int] = None,
+) -> Iterator[Tuple[str, Optional[Fill], Optional[Fill]]]:
+    """
+    Merge-join זורם על שני מקורות ממוינים לפי ts_ms.
+    מחזיק רק fills שעדיין לא הותאמו ונמצאים בחלון tol_ts_ms האחרון, ממופים לפי matcher.index_key;
+    fill נכנס בודק רק את התאים של matcher.probe_keys שלו ולא את כל הממתינים באותו key.
+    מפיק (kind, us, hl):
+      (MATCHED, us, hl) | (MISSING_IN_HL, us, None) | (MISSING_IN_US, None, hl)
+    ההתאמה דטרמיניסטית: fill נכנס מותאם ל-fill הממתין המוקדם ביותר שתואם לו.
+    """
+    tol = int(tol_ts_ms if tol_ts_ms is not None else getattr(matcher, "tol_ts", 0))
+    iters = (_ordered(us_rows, "us"), _ordered(hl_rows, "hl"))
+    heads = [next(iters[_US], None), next(iters[_HL], None)]
+    pending: Tuple[Deque[_Entry], Deque[_Entry]] = (deque(), deque())
+    buckets: Tuple[Dict[Any, Deque[_Entry]], Dict[Any, Deque[_Entry]]] = ({}, {})
+    seq = 0
+
+    def evict(side: int) -> Tuple[str, Optional[Fill], Optional[Fill]]:
+        e = pending[side].popleft()
+        e.alive = False
+        bucket = buckets[side].get(e.key)
+        if bucket is not None:
+            while bucket and not bucket[0].alive:
+                bucket.popleft()
+            if not bucket:
+                del buckets[side][e.key]
+        if side == _US:
+            return MISSING_IN_HL, e.fill, None
+        return MISSING_IN_US, None, e.fill
+
+    def drain(horizon: Optional[int]) -> Iterator[Tuple[str, Optional[Fill], Optional[Fill]]]:
+        # מוציא (לפי סדר ts) כל מה שלא יוכל יותר להיות מותאם
+        while True:
+            for side in (_US, _HL):
+                q = pending[side]
+                while q and not q[0].alive:
+                    q.popleft()
+            us_q, hl_q = pending
+            cands = [s for s, q in ((_US, us_q), (_HL, hl_q))
+                     if q and (horizon is None or q[0].fill.ts_ms < horizon)]
+            if not cands:
+                return
+            side = min(cands, key=lambda s: pending[s][0].fill.ts_ms)
+            yield evict(side)
+
+    while heads[_US] is not None or heads[_HL] is not None:
+        if heads[_HL] is None or (heads[_US] is not None and heads[_US].ts_ms <= heads[_HL].ts_ms):
+            side = _US
+        else:
+            side = _HL
+        other = _HL - side
+        x = heads[side]
+        heads[side] = next(iters[side], None)
+
+        yield from drain(x.ts_ms - tol)
+
+        match: Optional[_Entry] = None
+        for pk in matcher.probe_keys(x):
+            bucket = buckets[other].get(pk)
+            if not bucket:
+                continue
+            for e in bucket:
+                if match is not None and e.seq > match.seq:
+                    break
+                if not e.alive:
+                    continue
+                if matcher.equals(x, e.fill) if side == _US else matcher.equals(e.fill, x):
+                    match = e
+                    break
+        if match is not None:
+            match.alive = False
+            bucket = buckets[other][match.key]
+            while bucket and not bucket[0].alive:
+                bucket.popleft()
+            if not bucket:
+                del buckets[other][match.key]
+            if side == _US:
+                yield MATCHED, x, match.fill
+            else:
+                yield MATCHED, match.fill, x
+            continue
+
+        k = matcher.index_key(x)
+        e = _Entry(x, k, seq)
+        seq += 1
+        pending[side].append(e)
+        buckets[side].setdefault(k, deque()).append(e)
+
+    yield from drain(None)
+
+def compare(
+    us_rows: Iterable,
+    hl_rows: Iterable,
+    matcher: MatchStrategy,
+    tol_ts_ms: Optional[int] = None,
+    *,
+    diff_sink=None,
+) -> Dict[str, Any]:
+    """
+    מריץ את iter_compare ומסכם: ספירות + רשימות החסרים (JSON-friendly).
+    diff_sink (למשל NdjsonSpillPresenter): כל חסר נשלח ל-diff_sink.write(kind, record)
+    במקום להיאסף לרשימה – הזיכרון לא גדל עם גודל ה-diff, והרשימות בתוצאה ריקות.
+    """
+    matched = 0
+    us_total = hl_total = 0
+    n_missing_us = n_missing_hl = 0
+    missing_in_us: List[Dict[str, Any]] = []
+    missing_in_hl: List[Dict[str, Any]] = []
+    if diff_sink is not None:
+        emit_us = lambda rec: diff_sink.write(MISSING_IN_US, rec)
+        emit_hl = lambda rec: diff_sink.write(MISSING_IN_HL, rec)
+    else:
+        emit_us, emit_hl = missing_in_us.append, missing_in_hl.append
+    for kind, us, hl in iter_compare(us_rows, hl_rows, matcher, tol_ts_ms):
+        if kind == MATCHED:
+            matched += 1
+            us_total += 1
+            hl_total += 1
+        elif kind == MISSING_IN_HL:
+            us_total += 1
+            n_missing_hl += 1
+            emit_hl(fill_to_dict(us))
+        else:
+            hl_total += 1
+            n_missing_us += 1
+            emit_us(fill_to_dict(hl))
+    return {
+        "summary": {
+            "us": us_total,
+            "hl": hl_total,
+            "matched": matched,
+            "missing_in_us": n_missing_us,
+            "missing_in_hl": n_missing_hl,
+        },
+        "missing_in_us": missing_in_us,
+        "missing_in_hl": missing_in_hl,
+    }
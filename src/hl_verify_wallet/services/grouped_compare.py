@@ -0,0 +1,112 @@
+# src/hl_verify_wallet/services/grouped_compare.py
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Tuple
+from ..ports.match_strategy import MatchStrategy
+
+MATCHED = "matched"
+MISMATCHED = "mismatched"
+MISSING_IN_US = "missing_in_us"   # קבוצה שקיימת רק ב-HL
+MISSING_IN_HL = "missing_in_hl"   # קבוצה שקיימת רק ב-Redshift
+
+# [count, sz, notional, min_ts, max_ts] – list ולא אובייקט: זה ה-hot loop, עדכון in-place זול יותר
+_COUNT, _SZ, _NOTIONAL, _MIN_TS, _MAX_TS = range(5)
+
+def aggregate(rows: Iterable, matcher: MatchStrategy) -> Tuple[Dict[tuple, list], int]:
+    """
+    מעבר זורם אחד: fill → קבוצה לפי matcher.key (אצל HashCoinSideMatchStrategy: (hash, coin, side)).
+    הזיכרון פרופורציונלי למספר הקבוצות ולא למספר ה-fills. מחזיר (aggs, מספר fills).
+    notional מחושב מ-px*sz הגולמיים (לא notional_usd המעוגל) כדי שה-VWAP יהיה מדויק.
+    """
+    key = matcher.key
+    aggs: Dict[tuple, list] = {}
+    n = 0
+    for f in rows:
+        n += 1
+        k = key(f)
+        a = aggs.get(k)
+        if a is None:
+            aggs[k] = [1, f.sz, f.px * f.sz, f.ts_ms, f.ts_ms]
+            continue
+        a[_COUNT] += 1
+        a[_SZ] += f.sz
+        a[_NOTIONAL] += f.px * f.sz
+        if f.ts_ms < a[_MIN_TS]:
+            a[_MIN_TS] = f.ts_ms
+        elif f.ts_ms > a[_MAX_TS]:
+            a[_MAX_TS] = f.ts_ms
+    return aggs, n
+
+def _vwap(a: list) -> Decimal:
+    return a[_NOTIONAL] / a[_SZ] if a[_SZ] else Decimal(0)
+
+def agg_to_dict(k: tuple, a: list) -> Dict[str, Any]:
+    """ייצוג JSON-friendly של קבוצה (Decimal → str)."""
+    h, coin, side = k
+    return {
+        "hash": h or None, "coin": coin, "side": side,
+        "count": a[_COUNT], "sz": str(a[_SZ]), "vwap_px": str(_vwap(a)),
+        "notional": str(a[_NOTIONAL]),
+        "min_ts_ms": a[_MIN_TS], "max_ts_ms": a[_MAX_TS],
+    }
+
+def classify(us: list, hl: list, tol_px: Decimal, tol_sz: Decimal) -> str:
+    if abs(us[_SZ] - hl[_SZ]) > tol_sz or abs(_vwap(us) - _vwap(hl)) > tol_px:
+        return MISMATCHED
+    return MATCHED
+
+def compare_grouped(us_rows: Iterable, hl_rows: Iterable, matcher: MatchStrategy,
+                    *, diff_sink=None) -> Dict[str, Any]:
+    """
+    השוואה ברמת קבוצה (hash, coin, side): כל צד מצטמצם במעבר אחד ל-aggregates
+    (סה"כ sz, VWAP, notional, count, min/max ts), והקבוצות מושוות לפי tol_px/tol_sz של ה-matcher.
+    tol_ts לא רלוונטי – המפתח הוא ה-hash, לא הזמן. לא דורש שהצדדים יהיו ממוינים.
+    summary.us/hl = מספר ה-fills; ה-*_groups = מספר הקבוצות.
+    diff_sink: כמו ב-compare – הרשומות נשלחות ל-diff_sink.write(kind, record) והרשימות בתוצאה ריקות.
+    """
+    tol_px, tol_sz = matcher.tol_px, matcher.tol_sz
+    us_aggs, us_total = aggregate(us_rows, matcher)
+    hl_aggs, hl_total = aggregate(hl_rows, matcher)
+
+    matched = 0
+    mismatched: List[Dict[str, Any]] = []
+    missing_in_hl: List[Dict[str, Any]] = []
+    for k, a in us_aggs.items():
+        b = hl_aggs.pop(k, None)
+        if b is None:
+            missing_in_hl.append(agg_to_dict(k, a))
+        elif classify(a, b, tol_px, tol_sz) == MATCHED:
+            matched += 1
+        else:
+            d = agg_to_dict(k, a)
+            mismatched.append({"hash": d["hash"], "coin": d["coin"], "side": d["side"],
+                               "us": d, "hl": agg_to_dict(k, b)})
+    # מה שנשאר ב-hl_aggs לא הופיע ב-US
+    missing_in_us = [agg_to_dict(k, b) for k, b in hl_aggs.items()]
+
+    # פלט דטרמיניסטי: לפי זמן ה-fill הראשון בקבוצה
+    order = lambda d: (d["min_ts_ms"], d["coin"], d["side"], d["hash"] or "")
+    mismatched.sort(key=lambda m: order(m["us"]))
+    missing_in_hl.sort(key=order)
+    missing_in_us.sort(key=order)
+    counts = (len(mismatched), len(missing_in_us), len(missing_in_hl))
+    if diff_sink is not None:
+        for kind, lst in ((MISMATCHED, mismatched), (MISSING_IN_US, missing_in_us), (MISSING_IN_HL, missing_in_hl)):
+            for rec in lst:
+                diff_sink.write(kind, rec)
+            lst.clear()
+    n_mismatched, n_missing_us, n_missing_hl = counts
+    return {
+        "summary": {
+            "us": us_total,
+            "hl": hl_total,
+            "us_groups": len(us_aggs),
+            "hl_groups": matched + n_mismatched + n_missing_us,
+            "matched": matched,
+            "mismatched": n_mismatched,
+            "missing_in_us": n_missing_us,
+            "missing_in_hl": n_missing_hl,
+        },
+        "mismatched": mismatched,
+        "missing_in_us": missing_in_us,
+        "missing_in_hl": missing_in_hl,
+    }
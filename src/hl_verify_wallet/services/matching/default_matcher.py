@@ -0,0 +1,164 @@
+# src/hl_verify_wallet/services/matching/default_matcher.py
+from bisect import bisect_left, bisect_right
+from decimal import Decimal, ROUND_FLOOR
+from typing import Dict, Iterable, List, Optional, Tuple
+from ...domain.models import Fill
+from ...domain.fill_batch import FillBatch, MICRO
+from ...ports.match_strategy import MatchStrategy
+from .utils import BatchMatchResult, MatchResult, NextFree, within
+
+def _floor_micro(tol: Decimal) -> int:
+    return max(0, int((tol * MICRO).to_integral_value(rounding=ROUND_FLOOR)))
+
+def _cell(v, tol):
+    """תא ברוחב tol: ערכים שרחוקים עד tol נופלים באותו תא או בתא שכן. tol=0 → הערך עצמו."""
+    if not tol:
+        return v
+    if isinstance(v, int):
+        return v // tol
+    return int((v / tol).to_integral_value(rounding=ROUND_FLOOR))
+
+def _near(v, tol) -> Tuple:
+    c = _cell(v, tol)
+    return (c,) if not tol else (c - 1, c, c + 1)
+
+class DefaultMatchStrategy(MatchStrategy):
+    """
+    התאמת fill מול fill עם טולרנסים ל-px/sz/ts, בתוך דלי (coin, side).
+    בתוך הדלי ה-fills מאונדקסים לפי תא px/sz (ברוחב הטולרנס), כך שמועמדים בחלון הזמן
+    עם px/sz רחוקים לא נסרקים בכלל.
+    """
+    def __init__(self, tol_px: Decimal, tol_sz: Decimal, tol_ts_ms: int):
+        self.tol_px, self.tol_sz, self.tol_ts = tol_px, tol_sz, tol_ts_ms
+
+    def key(self, f) -> tuple:
+        return (f.coin, f.side)
+
+    def index_key(self, f) -> tuple:
+        return (f.coin, f.side, _cell(f.px, self.tol_px), _cell(f.sz, self.tol_sz))
+
+    def probe_keys(self, f) -> List[tuple]:
+        szs = _near(f.sz, self.tol_sz)
+        return [(f.coin, f.side, p, s) for p in _near(f.px, self.tol_px) for s in szs]
+
+    def equals(self, a, b) -> bool:
+        return (a.coin == b.coin and a.side == b.side
+                and abs(a.ts_ms - b.ts_ms) <= self.tol_ts
+                and within(a.px, b.px, self.tol_px)
+                and within(a.sz, b.sz, self.tol_sz))
+
+    def match(self, us_rows: Iterable[Fill], hl_rows: Iterable[Fill]) -> MatchResult:
+        """
+        התאמה אחד-לאחד של שתי רשימות, O(n log n):
+        - HL מחולק לתאים לפי index_key (coin, side, תא px, תא sz), כל תא ממוין לפי ts_ms
+        - כל fill של US (לפי סדר ts, ואז סדר הקלט) בודק את התאים של probe_keys, בכל אחד מוצא
+          את חלון [ts-tol, ts+tol] ב-bisect, ולוקח את ה-fill הפנוי המוקדם ביותר (ts, סדר קלט)
+          מכל התאים שעומד בטולרנס px/sz
+        - fills שכבר נלקחו מדולגים ב-union-find, כך שאין סריקה חוזרת שלהם
+        """
+        tol_ts = self.tol_ts
+        # תא → (ts, rank, fills, NextFree); rank = מיקום ב-(ts, סדר קלט) הגלובלי
+        cells: Dict[tuple, Tuple[List[int], List[int], List[Fill], NextFree]] = {}
+        grouped: Dict[tuple, List[Tuple[int, int, Fill]]] = {}
+        for i, f in enumerate(hl_rows):
+            grouped.setdefault(self.index_key(f), []).append((f.ts_ms, i, f))
+        for k, items in grouped.items():
+            items.sort(key=lambda t: (t[0], t[1]))
+            cells[k] = ([t[0] for t in items], [t[1] for t in items], [t[2] for t in items],
+                        NextFree(len(items)))
+        del grouped
+
+        res = MatchResult()
+        us_sorted = sorted(enumerate(us_rows), key=lambda t: (t[1].ts_ms, t[0]))
+        for _, u in us_sorted:
+            best: Optional[Tuple[Tuple[int, int], tuple, int]] = None
+            for k in self.probe_keys(u):
+                c = cells.get(k)
+                if c is None:
+                    continue
+                ts, rank, fills, free = c
+                hi = bisect_right(ts, u.ts_ms + tol_ts)
+                j = free.find(bisect_left(ts, u.ts_ms - tol_ts))
+                while j < hi:
+                    if best is not None and (ts[j], rank[j]) > best[0]:
+                        break
+                    h = fills[j]
+                    if within(u.px, h.px, self.tol_px) and within(u.sz, h.sz, self.tol_sz):
+                        best = ((ts[j], rank[j]), k, j)
+                        break
+                    j = free.find(j + 1)
+            if best is None:
+                res.missing_in_hl.append(u)
+                continue
+            _, k, j = best
+            c = cells[k]
+            c[3].take(j)
+            res.pairs.append((u, c[2][j]))
+
+        leftovers: List[Tuple[int, int, Fill]] = []
+        for ts, rank, fills, free in cells.values():
+            j = free.find(0)
+            while j < len(fills):
+                leftovers.append((ts[j], rank[j], fills[j]))
+                j = free.find(j + 1)
+        leftovers.sort(key=lambda t: (t[0], t[1]))
+        res.missing_in_us = [t[2] for t in leftovers]
+        return res
+
+    def match_batches(self, us: FillBatch, hl: FillBatch) -> BatchMatchResult:
+        """
+        אותו אלגוריתם כמו match, ישירות על העמודות של FillBatch:
+        px/sz כ-int ב-micro units (טולרנס מעוגל למטה ל-micro), בלי לבנות Fill ובלי Decimal.
+        """
+        tol_ts = self.tol_ts
+        tol_px = _floor_micro(self.tol_px)
+        tol_sz = _floor_micro(self.tol_sz)
+
+        h_ts, h_px, h_sz = hl.ts_ms, hl.px, hl.sz
+        grouped: Dict[tuple, List[int]] = {}
+        for j, (c, sd, px, sz) in enumerate(zip(hl.coin, hl.side, h_px, h_sz)):
+            grouped.setdefault((c, sd, _cell(px, tol_px), _cell(sz, tol_sz)), []).append(j)
+        cells: Dict[tuple, Tuple[List[int], List[int], NextFree]] = {}
+        for k, idxs in grouped.items():
+            idxs.sort(key=lambda j: (h_ts[j], j))
+            cells[k] = ([h_ts[j] for j in idxs], idxs, NextFree(len(idxs)))
+        del grouped
+
+        res = BatchMatchResult()
+        u_ts, u_px, u_sz, u_coin, u_side = us.ts_ms, us.px, us.sz, us.coin, us.side
+        for i in sorted(range(len(us)), key=lambda i: (u_ts[i], i)):
+            t, px, sz, coin, side = u_ts[i], u_px[i], u_sz[i], u_coin[i], u_side[i]
+            szs = _near(sz, tol_sz)
+            best: Optional[Tuple[Tuple[int, int], tuple, int]] = None
+            for p in _near(px, tol_px):
+                for s in szs:
+                    c = cells.get((coin, side, p, s))
+                    if c is None:
+                        continue
+                    ts, idxs, free = c
+                    hi = bisect_right(ts, t + tol_ts)
+                    k = free.find(bisect_left(ts, t - tol_ts))
+                    while k < hi:
+                        j = idxs[k]
+                        if best is not None and (ts[k], j) > best[0]:
+                            break
+                        if abs(px - h_px[j]) <= tol_px and abs(sz - h_sz[j]) <= tol_sz:
+                            best = ((ts[k], j), (coin, side, p, s), k)
+                            break
+                        k = free.find(k + 1)
+            if best is None:
+                res.missing_in_hl.append(i)
+                continue
+            (_, j), key, k = best
+            cells[key][2].take(k)
+            res.pairs.append((i, j))
+
+        leftovers: List[int] = []
+        for ts, idxs, free in cells.values():
+            k = free.find(0)
+            while k < len(idxs):
+                leftovers.append(idxs[k])
+                k = free.find(k + 1)
+        leftovers.sort(key=lambda j: (h_ts[j], j))
+        res.missing_in_us = leftovers
+        return res
@@ -3,8 +3,11 @@ from ...ports.match_strategy import MatchStrategy
 
 class HashCoinSideMatchStrategy(MatchStrategy):
     """
-    משווה לפי מפתח (hash, coin, side), ומאפשר טולרנסים ל-px/sz/ts
+    משווה לפי מפתח (hash, coin, side), ומאפשר טולרנסים ל-px/sz/ts.
+    aggregate=True: ה-orchestrator מצמצם כל צד ל-aggregate לקבוצה (sz, VWAP) ומשווה עם tol_px/tol_sz.
     """
+    aggregate = True
+
     def __init__(self, tol_px: Decimal, tol_sz: Decimal, tol_ts_ms: int):
         self.tol_px, self.tol_sz, self.tol_ts = tol_px, tol_sz, tol_ts_ms
 
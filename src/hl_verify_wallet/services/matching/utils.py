@@ -0,0 +1,43 @@
+# src/hl_verify_wallet/services/matching/utils.py
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import List, Tuple
+from ...domain.models import Fill
+
+@dataclass
+class MatchResult:
+    pairs: List[Tuple[Fill, Fill]] = field(default_factory=list)   # (us, hl)
+    missing_in_us: List[Fill] = field(default_factory=list)        # קיים ב-HL בלבד
+    missing_in_hl: List[Fill] = field(default_factory=list)        # קיים ב-US בלבד
+
+@dataclass
+class BatchMatchResult:
+    """כמו MatchResult, אבל באינדקסים לתוך ה-FillBatch (Fill נבנה רק לפי דרישה)."""
+    pairs: List[Tuple[int, int]] = field(default_factory=list)     # (us_idx, hl_idx)
+    missing_in_us: List[int] = field(default_factory=list)         # אינדקסים ב-HL
+    missing_in_hl: List[int] = field(default_factory=list)         # אינדקסים ב-US
+
+class NextFree:
+    """
+    Union-find לדילוג על אינדקסים שכבר נוצלו בדלי ממוין:
+    find(i) מחזיר את האינדקס הפנוי הראשון >= i (או n אם אין), ב-O(α(n)) אמורטייזד.
+    """
+    __slots__ = ("_parent",)
+
+    def __init__(self, n: int):
+        self._parent = list(range(n + 1))
+
+    def find(self, i: int) -> int:
+        parent = self._parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def take(self, i: int) -> None:
+        self._parent[i] = i + 1
+
+def within(a: Decimal, b: Decimal, tol: Decimal) -> bool:
+    return abs(a - b) <= tol
@@ -1,5 +1,5 @@
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional
+from typing import Any, Dict, Optional
 from ...domain.models import Fill, TradeRow
 
 _DEC6 = Decimal("0.000001")
@@ -61,3 +61,14 @@ def set_role_from_crossed(fill: Fill, crossed: Optional[bool]) -> Fill:
         base_tid=fill.base_tid, role=role, counterparty=fill.counterparty,
         trade_id=fill.trade_id, notional_usd=fill.notional_usd
     )
+
+def fill_to_dict(f: Fill) -> Dict[str, Any]:
+    """ייצוג JSON-friendly של Fill (Decimal → str)."""
+    return {
+        "ts_ms": f.ts_ms, "coin": f.coin, "side": f.side,
+        "px": str(f.px), "sz": str(f.sz),
+        "base_tid": f.base_tid, "trade_id": f.trade_id,
+        "role": f.role,
+        "notional_usd": str(f.notional_usd) if f.notional_usd is not None else None,
+        "hash": f.hash,
+    }
@@ -0,0 +1,50 @@
+# src/hl_verify_wallet/services/reconcile.py
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from ..domain.digest import BucketDigest, BucketKey
+
+# (coin, start_ms, end_ms) – end לא כולל
+Range = Tuple[str, int, int]
+
+def diff_buckets(us: Dict[BucketKey, BucketDigest], hl: Dict[BucketKey, BucketDigest],
+                 tol_px: Decimal, tol_sz: Decimal) -> Tuple[int, List[Tuple[BucketKey, int]]]:
+    """
+    משווה תקצירים דלי מול דלי. מחזיר (מספר ה-fills בדליים הנקיים, [(key, max count)] לדליים ששונים).
+    דלי שקיים רק בצד אחד תמיד שונה.
+    """
+    clean = 0
+    diff: List[Tuple[BucketKey, int]] = []
+    for k in sorted(us.keys() | hl.keys()):
+        a: Optional[BucketDigest] = us.get(k)
+        b: Optional[BucketDigest] = hl.get(k)
+        if a is not None and b is not None and a.matches(b, tol_px, tol_sz):
+            clean += a.count
+        else:
+            diff.append((k, max(a.count if a else 0, b.count if b else 0)))
+    return clean, diff
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    """
+    מאחד טווחים צמודים של אותו coin: fill שזז בגבול דלי (טולרנס ts) מלכלך את שני הדליים,
+    וההשוואה ברמת השורה צריכה לראות את שניהם יחד.
+    """
+    out: List[Range] = []
+    for coin, lo, hi in sorted(ranges):
+        if out and out[-1][0] == coin and out[-1][2] >= lo:
+            out[-1] = (coin, out[-1][1], max(out[-1][2], hi))
+        else:
+            out.append((coin, lo, hi))
+    return out
+
+def time_spans(ranges: List[Range]) -> List[Tuple[int, int]]:
+    """
+    איחוד טווחי הזמן של כל ה-coins יחד: ל-HL אין פילטר coin, כך ש-span אחד נמשך פעם אחת
+    ומפוצל מקומית לכל ה-coins שבתוכו (ולא נמשך שוב לכל coin).
+    """
+    out: List[Tuple[int, int]] = []
+    for lo, hi in sorted((lo, hi) for _, lo, hi in ranges):
+        if out and out[-1][1] >= lo:
+            out[-1] = (out[-1][0], max(out[-1][1], hi))
+        else:
+            out.append((lo, hi))
+    return out
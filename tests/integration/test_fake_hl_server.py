@@ -0,0 +1,51 @@
+# tests/integration/test_fake_hl_server.py
+from hl_verify_wallet.adapters.hyperliquid_info_provider import HyperliquidInfoProvider
+from hl_verify_wallet.adapters.token_bucket_rate_limiter import AdaptiveTokenBucket
+from hl_verify_wallet.domain.time_window import TimeWindow
+from benchmarks.fake_hl_server import FakeHLServer
+from benchmarks.load_driver import END_MS, SyntheticUsProvider, wallet_address
+
+def test_provider_over_http_survives_injected_errors():
+    wallet = wallet_address(0)
+    # limiter מהיר: on_throttle מאט את הדלי במקום sleep של backoff, כך שהבדיקה מהירה
+    limiter = AdaptiveTokenBucket(10 ** 6, 10 ** 6, min_rate=10 ** 5)
+    with FakeHLServer(fills_per_wallet=800, page_cap=2000, p429=0.3, p5xx=0.2, seed=3) as srv:
+        hl = HyperliquidInfoProvider(srv.url, timeout_sec=5, retries=20, rate_limiter=limiter)
+        got = list(hl.fetch_fills(wallet, TimeWindow(0, END_MS)))
+        st = srv.stats()
+    expected = list(SyntheticUsProvider(800).fetch_fills(wallet, TimeWindow(0, END_MS)))
+    assert got == expected
+    assert st["statuses"]["200"] == 2          # עמוד מלא + עמוד ריק שסוגר את הדפדוף
+    assert st["requests"] > st["statuses"]["200"]
+
+def test_server_pages_with_inclusive_end_time_and_cap():
+    with FakeHLServer(fills_per_wallet=50, page_cap=10) as srv:
+        times, _ = srv.history.rows("0xabc")
+        page = srv.history.page("0xabc", times[5], times[30], srv.page_cap)
+        assert len(page) == 10 and page[0]["time"] == times[5]
+        tail = srv.history.page("0xabc", times[45], times[49], srv.page_cap)
+        assert tail[-1]["time"] == times[49]
+
+def test_provider_reuses_one_connection_across_calls():
+    with FakeHLServer(fills_per_wallet=100) as srv:
+        hl = HyperliquidInfoProvider(srv.url, timeout_sec=5)
+        for i in range(3):
+            assert list(hl.fetch_fills(wallet_address(i), TimeWindow(0, END_MS)))
+        hl.close()
+        st = srv.stats()
+    assert st["requests"] == 6 and st["connections"] == 1
+
+def test_idle_client_is_rebuilt_before_next_request():
+    from hl_verify_wallet.adapters.hyperliquid_client import HLClient
+    now = [0.0]
+    payload = {"type": "userFillsByTime", "user": "0xabc", "startTime": 0}
+    with FakeHLServer(fills_per_wallet=10) as srv:
+        with HLClient(srv.url, max_idle_sec=60, clock=lambda: now[0]) as c:
+            assert c.request_info(payload).status_code == 200
+            now[0] += 30
+            c.request_info(payload)
+            assert c.rebuilds == 0
+            now[0] += 61          # Lambda קפוא – ה-socket כנראה נסגר בצד השני
+            c.request_info(payload)
+            assert c.rebuilds == 1
+        assert srv.stats()["connections"] == 2
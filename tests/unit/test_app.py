@@ -0,0 +1,34 @@
+# tests/unit/test_app.py
+import json
+from hl_verify_wallet import app, config
+from tests.unit.test_verify_wallet_usecase import ListProvider, _f
+
+def test_providers_are_reused_across_warm_invocations(monkeypatch):
+    built = []
+    def build(cfg):
+        built.append(cfg)
+        return ListProvider([_f(100)]), ListProvider([_f(100)])
+    monkeypatch.setattr(app, "_build_providers", build)
+    monkeypatch.setattr(app, "_PROVIDERS", None)
+    event = {"wallet": "0xabc", "start_ms": 0, "end_ms": 1_000, "metrics": True}
+    for _ in range(3):
+        body = json.loads(app.lambda_handler(event)["body"])
+        assert body["summary"]["matched"] == 1
+    assert len(built) == 1
+    assert body["metrics"]["counters"]["us.rows"] == 1
+
+def test_incremental_watermark_is_durable_with_db_path(monkeypatch, tmp_path):
+    monkeypatch.setenv("WATERMARK_DB_PATH", str(tmp_path / "wm.db"))
+    monkeypatch.setenv("METRICS_EMF", "0")
+    monkeypatch.setattr(config, "_CONFIG", None)
+    fills = [_f(t) for t in range(0, 200_000, 1000)]
+    us, hl = ListProvider(fills), ListProvider(fills)
+    monkeypatch.setattr(app, "_build_providers", lambda cfg: (us, hl))
+    monkeypatch.setattr(app, "_PROVIDERS", None)
+    monkeypatch.setattr(app, "_WATERMARKS", None)
+    event = {"wallet": "0xabc", "end_ms": 100_000, "incremental": True, "overlap_ms": 0}
+    app.lambda_handler(event)
+    app._WATERMARKS.close()
+    monkeypatch.setattr(app, "_WATERMARKS", None)   # cold start: ה-repo נפתח מחדש מהקובץ
+    app.lambda_handler({**event, "end_ms": 150_000})
+    assert us.windows == [(0, 100_000), (100_000, 150_000)]
@@ -0,0 +1,23 @@
+# tests/unit/test_benchmarks.py
+from benchmarks import synthetic
+import benchmarks.run as bench
+from benchmarks.run import CASES, regressions, run
+
+def test_synthetic_wallet_is_deterministic_and_ordered():
+    a, b = synthetic.raw_rows(500), synthetic.raw_rows(500)
+    assert a == b
+    assert [r["time"] for r in a] == sorted(r["time"] for r in a)
+    us, hl = synthetic.us_hl_pair(3000)
+    assert 0 < len(hl) - len(us) + 10 and len(us) < 3000
+
+def test_every_case_runs_and_regressions_use_threshold(monkeypatch):
+    monkeypatch.setattr(bench, "MIN_SAMPLE_SEC", 0.0)
+    results = run([300], list(CASES), repeat=1, memory=False)
+    assert set(results) == {f"{c}@300" for c in CASES}
+    base = {"compare_default@300": {"items_per_sec": 1000.0, "peak_mb": 10.0}}
+    ok = {"compare_default@300": {"items_per_sec": 800.0, "peak_mb": 12.0}}
+    slow = {"compare_default@300": {"items_per_sec": 700.0, "peak_mb": 10.0}}
+    fat = {"compare_default@300": {"items_per_sec": 1000.0, "peak_mb": 14.0}}
+    assert regressions(ok, base, 0.25) == []
+    assert len(regressions(slow, base, 0.25)) == 1
+    assert len(regressions(fat, base, 0.25)) == 1
@@ -0,0 +1,53 @@
+# tests/unit/test_compare.py
+import time
+from decimal import Decimal
+import pytest
+from hl_verify_wallet.domain.models import Fill
+from hl_verify_wallet.services.compare_service import compare, iter_compare, MATCHED
+from hl_verify_wallet.services.matching.default_matcher import DefaultMatchStrategy
+from hl_verify_wallet.services.matching.hash_coin_side_matcher import HashCoinSideMatchStrategy
+
+def _f(ts, coin="BTC", side="A", h="0x1"):
+    return Fill(wallet="0xabc", coin=coin, side=side, px=Decimal("1"), sz=Decimal("1"), ts_ms=ts, hash=h)
+
+def _matcher(tol_ts=100):
+    return HashCoinSideMatchStrategy(Decimal("0"), Decimal("0"), tol_ts)
+
+def test_compare_matches_within_tolerance_and_reports_missing():
+    us = [_f(1000, h="a"), _f(2000, h="b"), _f(5000, h="c")]
+    hl = [_f(1050, h="a"), _f(2500, h="b"), _f(6000, h="d")]
+    res = compare(iter(us), iter(hl), _matcher(100))
+    assert res["summary"] == {"us": 3, "hl": 3, "matched": 1, "missing_in_us": 2, "missing_in_hl": 2}
+    assert [r["hash"] for r in res["missing_in_hl"]] == ["b", "c"]
+    assert [r["hash"] for r in res["missing_in_us"]] == ["b", "d"]
+
+def test_compare_is_one_to_one_and_streams_in_order():
+    us = [_f(1000), _f(1000), _f(1001)]
+    hl = [_f(1000), _f(1002)]
+    out = list(iter_compare(us, hl, _matcher(5)))
+    assert [k for k, _, _ in out].count(MATCHED) == 2
+    assert len(out) == 3
+
+def test_compare_long_stream():
+    # זרם ארוך מגנרטורים – בלי list() על אף צד
+    def gen(n):
+        for i in range(n):
+            yield _f(i * 10, h=str(i))
+    it = iter_compare(gen(100000), gen(100000), _matcher(20))
+    assert sum(1 for k, _, _ in it if k == MATCHED) == 100000
+
+def test_compare_rejects_unordered_input():
+    with pytest.raises(ValueError):
+        compare([_f(2), _f(1)], [], _matcher())
+
+def test_compare_default_matcher_far_px_in_dense_window():
+    # אותו מקרה כמו ב-test_matcher, דרך ה-merge-join הזורם
+    n = 20000
+    def gen(px):
+        for i in range(n):
+            yield Fill(wallet="0xabc", coin="BTC", side="A", px=Decimal(px), sz=Decimal("1"), ts_ms=i)
+    m = DefaultMatchStrategy(Decimal("0.01"), Decimal("0.001"), 2000)
+    t0 = time.perf_counter()
+    res = compare(gen("100"), gen("100.5"), m)
+    assert res["summary"] == {"us": n, "hl": n, "matched": 0, "missing_in_us": n, "missing_in_hl": n}
+    assert time.perf_counter() - t0 < 5
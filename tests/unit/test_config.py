@@ -0,0 +1,18 @@
+# tests/unit/test_config.py
+from hl_verify_wallet import config
+from hl_verify_wallet.config import Config, load_config
+
+def test_from_env_converts_by_field_type():
+    cfg = Config.from_env({"HL_RETRIES": "7", "HL_TIMEOUT_SEC": "2.5", "HL_HTTP2": "0",
+                           "SPILL_GZIP": "1", "REDSHIFT_SCHEMA": "raw"})
+    assert (cfg.hl_retries, cfg.hl_timeout_sec, cfg.hl_http2, cfg.spill_gzip) == (7, 2.5, False, True)
+    assert cfg.redshift_schema == "raw" and cfg.hl_shards == Config().hl_shards
+
+def test_refresh_sees_env_changed_after_import(monkeypatch):
+    monkeypatch.setattr(config, "_CONFIG", None)
+    monkeypatch.setenv("HL_RETRIES", "3")
+    first = load_config()
+    assert first.hl_retries == 3 and load_config() is first
+    monkeypatch.setenv("HL_RETRIES", "9")
+    assert load_config().hl_retries == 3
+    assert load_config(refresh=True).hl_retries == 9
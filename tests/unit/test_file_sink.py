@@ -0,0 +1,50 @@
+# tests/unit/test_file_sink.py
+import csv, gzip, json
+import pytest
+from hl_verify_wallet.adapters.sinks.file_sink import CsvFileSink, JsonlFileSink, _BufferedFileSink
+from hl_verify_wallet.adapters.state_repo.memory_state_repo import MemoryStateRepository
+from hl_verify_wallet.services.backfill.hl_backfill import HLBackfillService
+from tests.unit.test_hl_backfill import FakeRangeClient, _synthetic_rows
+
+class TrackingJsonlSink(JsonlFileSink):
+    max_buffered = 0
+    def add(self, f):
+        super().add(f)
+        self.max_buffered = max(self.max_buffered, len(self._buf))
+
+def test_chunked_backfill_to_jsonl_keeps_memory_flat(tmp_path):
+    client = FakeRangeClient(_synthetic_rows(300), page_cap=50)
+    sink = TrackingJsonlSink(str(tmp_path), batch_size=16, max_file_bytes=4096, compress=True, fsync_every=4)
+    with sink:
+        n = HLBackfillService(client, page_cap=client.page_cap).process_wallet_chunked(
+            1, "0xabc", sink=sink, state_repo=MemoryStateRepository(), start_ms=1000,
+            chunk_ms=500, ahead_safety_ms=0, max_empty_chunks=2, now_ms_provider=lambda: 10 ** 13)
+    assert sink.max_buffered <= 16
+    assert len(sink.paths) > 1 and all(p.endswith(".jsonl.gz") for p in sink.paths)
+    rows = []
+    for p in sink.paths:
+        with gzip.open(p, "rt") as fh:
+            rows.extend(json.loads(line) for line in fh)
+    assert len(rows) == n == sink.rows_written
+    assert [r["ts_ms"] for r in rows] == sorted(r["ts_ms"] for r in rows)
+
+def test_csv_sink_writes_header_per_file_and_rolls_by_age(tmp_path):
+    clock = [0.0]
+    client = FakeRangeClient(_synthetic_rows(20), page_cap=100)
+    sink = CsvFileSink(str(tmp_path), batch_size=5, max_file_age_sec=10, clock=lambda: clock[0])
+    svc = HLBackfillService(client)
+    for f in svc._parse_page("0xabc", client.rows):
+        sink.add(f)
+        if sink.should_flush():
+            sink.flush()
+            clock[0] += 6
+    sink.close()
+    assert len(sink.paths) == 2
+    for p in sink.paths:
+        with open(p, newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        assert rows and rows[0]["wallet"] == "0xabc"
+
+def test_buffered_base_requires_write_batch(tmp_path):
+    with pytest.raises(TypeError):
+        _BufferedFileSink(str(tmp_path))
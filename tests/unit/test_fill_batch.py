@@ -0,0 +1,30 @@
+# tests/unit/test_fill_batch.py
+from decimal import Decimal
+from hl_verify_wallet.domain.models import Fill
+from hl_verify_wallet.domain.fill_batch import FillBatch
+from hl_verify_wallet.services.matching.default_matcher import DefaultMatchStrategy
+from tests.unit.test_matcher import _f
+
+def test_roundtrip_views_equal_source():
+    src = [
+        Fill(wallet="0xabc", coin="BTC", side="B", px=Decimal("101.5"), sz=Decimal("0.001"), ts_ms=5,
+             hash="0x1", base_tid=42, role="maker", trade_id=421, notional_usd=Decimal("0.101500")),
+        Fill(wallet="0xabc", coin="@1", side="A", px=Decimal("1"), sz=Decimal("2"), ts_ms=6,
+             counterparty="0xdef"),
+    ]
+    b = FillBatch.from_fills(src)
+    assert len(b) == 2
+    assert list(b) == src
+    assert b[-1].counterparty == "0xdef" and b[-1].base_tid is None
+    assert b[0].px == Decimal("101.500000")
+
+def test_match_batches_agrees_with_match():
+    m = DefaultMatchStrategy(Decimal("0.01"), Decimal("0.001"), 1000)
+    us = [_f(1000), _f(2000, px="101"), _f(3000, side="B"), _f(9000), _f(9001, tid=7)]
+    hl = [_f(1500, px="100.005"), _f(2000, px="101.5"), _f(3100, side="B", sz="1.0005"), _f(20000), _f(9500)]
+    ref = m.match(us, hl)
+    ub, hb = FillBatch.from_fills(us), FillBatch.from_fills(hl)
+    res = m.match_batches(ub, hb)
+    assert [(ub[i], hb[j]) for i, j in res.pairs] == ref.pairs
+    assert [ub[i] for i in res.missing_in_hl] == ref.missing_in_hl
+    assert [hb[j] for j in res.missing_in_us] == ref.missing_in_us
@@ -0,0 +1,50 @@
+# tests/unit/test_grouped_compare.py
+from decimal import Decimal
+from hl_verify_wallet.domain.models import Fill
+from hl_verify_wallet.domain.time_window import TimeWindow
+from hl_verify_wallet.ports.fill_provider import FillProvider
+from hl_verify_wallet.orchestrators.verify_wallet_usecase import run
+from hl_verify_wallet.services.grouped_compare import compare_grouped
+from hl_verify_wallet.services.matching.hash_coin_side_matcher import HashCoinSideMatchStrategy
+
+def _f(ts, px, sz, h="0x1", coin="BTC", side="B"):
+    return Fill(wallet="0xabc", coin=coin, side=side, px=Decimal(px), sz=Decimal(sz), ts_ms=ts, hash=h)
+
+def _m(tol_px="0.01", tol_sz="0.001"):
+    return HashCoinSideMatchStrategy(Decimal(tol_px), Decimal(tol_sz), 0)
+
+def test_grouped_aggregates_partial_fills_against_single_fill():
+    # הזמנה אחת: ב-US פוצלה ל-3 partial fills, ב-HL fill אחד עם אותו VWAP וסה"כ sz
+    us = [_f(1000, "100", "1"), _f(1001, "102", "1"), _f(1005, "101", "2")]
+    hl = [_f(1003, "101", "4")]
+    res = compare_grouped(iter(us), iter(hl), _m())
+    assert res["summary"] == {"us": 3, "hl": 1, "us_groups": 1, "hl_groups": 1, "matched": 1,
+                              "mismatched": 0, "missing_in_us": 0, "missing_in_hl": 0}
+
+def test_grouped_reports_mismatch_and_missing_groups():
+    us = [_f(1000, "100", "1", h="a"), _f(1001, "100", "1", h="a"),
+          _f(2000, "50", "1", h="b"), _f(3000, "10", "1", h="c", side="A")]
+    hl = [_f(1000, "100", "1.5", h="a"), _f(2000, "50.02", "1", h="b"), _f(4000, "10", "1", h="d")]
+    res = compare_grouped(us, hl, _m())
+    s = res["summary"]
+    assert (s["matched"], s["mismatched"], s["missing_in_us"], s["missing_in_hl"]) == (0, 2, 1, 1)
+    a, b = res["mismatched"]
+    assert a["hash"] == "a" and a["us"]["sz"] == "2" and a["hl"]["sz"] == "1.5"
+    assert a["us"]["count"] == 2 and (a["us"]["min_ts_ms"], a["us"]["max_ts_ms"]) == (1000, 1001)
+    assert b["hash"] == "b" and b["hl"]["vwap_px"] == "50.02"
+    assert [g["hash"] for g in res["missing_in_hl"]] == ["c"]
+    assert [g["hash"] for g in res["missing_in_us"]] == ["d"]
+
+class _Provider(FillProvider):
+    def __init__(self, fills):
+        self.fills = fills
+    def fetch_fills(self, wallet, window, coin=None):
+        return iter(self.fills)
+
+def test_run_uses_grouped_engine_for_aggregate_matcher():
+    # 5000 partial fills בצד אחד מול fill מאוחד בצד השני – merge-join היה מסמן הכל כחסר
+    us = [_f(i, "10", "0.001") for i in range(5000)]
+    hl = [_f(0, "10", "5")]
+    res = run("0xabc", TimeWindow(0, 10_000), _Provider(us), _Provider(hl), _m())
+    assert res["summary"]["matched"] == 1 and res["summary"]["us"] == 5000
+    assert res["mismatched"] == [] and "timings" in res
@@ -57,3 +57,215 @@ def test_spot_rows_are_filtered_out():
     assert n == 1
     assert len(sink.rows) == 1
     assert sink.rows[0].coin == "SOL"
+
+class FakeRangeClient(HLClient):
+    """מדמה את השרת: מחזיר עד page_cap fills בטווח [startTime, endTime] לפי סדר זמן."""
+    def __init__(self, rows, page_cap=3):
+        self.rows = sorted(rows, key=lambda r: r["time"])
+        self.page_cap = page_cap
+    def request_info(self, payload, timeout=None):
+        st = payload["startTime"]
+        end = payload.get("endTime", 2 ** 62)
+        data = [r for r in self.rows if st <= r["time"] <= end][: self.page_cap]
+        return FakeResp(200, data)
+
+def _synthetic_rows(n):
+    coins = ["BTC", "ETH", "@1", "SOL"]
+    return [
+        {"coin": coins[i % 4], "side": "A" if i % 3 else "B", "px": str(100 + i), "sz": "0.5",
+         "time": 1000 + i * 7, "tid": 5000 + i, "hash": f"0x{i:04x}", "crossed": bool(i % 2)}
+        for i in range(n)
+    ]
+
+def test_sharded_matches_serial():
+    client = FakeRangeClient(_synthetic_rows(50), page_cap=4)
+    window = TimeWindow(1000, 1000 + 50 * 7)
+
+    serial = MemorySink()
+    n_serial = HLBackfillService(client, page_cap=client.page_cap).process_wallet("0xabc", window, serial)
+
+    sharded = MemorySink()
+    n_sharded = HLBackfillService(client, page_cap=client.page_cap).process_wallet_sharded(
+        "0xabc", window, sharded, shards=7, max_concurrency=3)
+
+    assert n_sharded == n_serial
+    assert sharded.rows == serial.rows
+    assert [r.ts_ms for r in sharded.rows] == sorted(r.ts_ms for r in sharded.rows)
+
+def test_full_page_boundary_inside_one_ms_loses_nothing_on_every_path():
+    # עמוד מלא (4) נחתך באמצע ts=30: tid 4 היה הולך לאיבוד עם cursor = last_time + 1
+    times = [10, 20, 30, 30, 30, 40]
+    rows = [{"coin": "BTC", "side": "A", "px": "1", "sz": "1", "time": t, "tid": i} for i, t in enumerate(times)]
+    client = FakeRangeClient(rows, page_cap=4)
+    svc = HLBackfillService(client, page_cap=4)
+    window = TimeWindow(0, 100)
+    expected = list(range(6))
+
+    serial = MemorySink()
+    svc.process_wallet("0xabc", window, serial)
+    assert [r.base_tid for r in serial.rows] == expected
+
+    piped = MemorySink()
+    svc.process_wallet_pipelined("0xabc", window, piped, queue_pages=1)
+    assert piped.rows == serial.rows
+
+    # התוצאה לא תלויה במיקום גבולות ה-shards
+    for shards in (1, 2, 3, 5, 7):
+        sharded = MemorySink()
+        svc.process_wallet_sharded("0xabc", window, sharded, shards=shards, max_concurrency=2)
+        assert sharded.rows == serial.rows, shards
+
+    n, chunked = _chunked(client, chunk_ms=1000, start_ms=0)
+    assert [r.base_tid for r in chunked.rows] == expected
+
+def test_full_page_of_one_ms_raises_instead_of_dropping():
+    # page_cap=3: ה-ms 30 ממלא עמוד שלם – אי אפשר לדעת אם יש בו עוד fills, אז לא מדלגים בשקט
+    import pytest
+    from hl_verify_wallet.errors import HLTooManyFillsError
+    times = [10, 20, 30, 30, 30, 40]
+    rows = [{"coin": "BTC", "side": "A", "px": "1", "sz": "1", "time": t, "tid": i} for i, t in enumerate(times)]
+    svc = HLBackfillService(FakeRangeClient(rows, page_cap=3), page_cap=3)
+    with pytest.raises(HLTooManyFillsError):
+        svc.process_wallet("0xabc", TimeWindow(0, 100), MemorySink())
+    with pytest.raises(HLTooManyFillsError):
+        svc.process_wallet_sharded("0xabc", TimeWindow(0, 100), MemorySink(), shards=3)
+
+def test_sharded_matches_serial_with_duplicate_ts_at_page_cap():
+    # צפיפות: 3–4 fills לכל ms, page_cap קטן – חיתוכים באמצע ms בכל עמוד כמעט
+    rows = [{"coin": "BTC", "side": "A", "px": "1", "sz": "1", "time": 1000 + i // (3 + i % 2), "tid": i}
+            for i in range(120)]
+    client = FakeRangeClient(rows, page_cap=5)
+    window = TimeWindow(1000, 1100)
+    serial = MemorySink()
+    HLBackfillService(client, page_cap=5).process_wallet("0xabc", window, serial)
+    assert [r.base_tid for r in serial.rows] == sorted(range(120), key=lambda i: (rows[i]["time"], i))
+    for shards in (2, 3, 7, 11):
+        sharded = MemorySink()
+        HLBackfillService(client, page_cap=5).process_wallet_sharded(
+            "0xabc", window, sharded, shards=shards, max_concurrency=3)
+        assert sharded.rows == serial.rows, shards
+
+def test_parse_page_builds_final_fills_in_one_pass():
+    from decimal import Decimal
+    from hl_verify_wallet.domain.models import Fill
+    page = [
+        {"coin": "@3", "side": "bid", "px": "1", "sz": "1", "time": 1},
+        {"coin": "ETH", "side": "bid", "px": "2000.5", "sz": "0.333", "time": 2, "tid": 7, "hash": "0x1", "crossed": True},
+        {"coin": "BTC", "side": "Ask", "px": 100.25, "sz": "2", "time": 3, "crossed": False},
+    ]
+    svc = HLBackfillService(FakeClient({}))
+    out = svc._parse_page("0xabc", page)
+    assert out == [
+        Fill("0xabc", "ETH", "B", Decimal("2000.5"), Decimal("0.333"), 2, "0x1", 7, "taker", None, 71,
+             Decimal("666.166500")),
+        Fill("0xabc", "BTC", "A", Decimal("100.25"), Decimal("2"), 3, None, None, "maker", None, None,
+             Decimal("200.500000")),
+    ]
+    assert str(out[1].notional_usd) == "200.500000"
+    assert svc._parse_fill("0xabc", page[0]) is None
+    assert svc._parse_fill("0xabc", page[1]) == out[0]
+
+class CountingRangeClient(FakeRangeClient):
+    def __init__(self, rows, page_cap=3):
+        super().__init__(rows, page_cap)
+        self.calls = 0
+    def request_info(self, payload, timeout=None):
+        self.calls += 1
+        return super().request_info(payload, timeout)
+
+def _chunked(client, **kw):
+    from hl_verify_wallet.adapters.state_repo.memory_state_repo import MemoryStateRepository
+    sink = MemorySink()
+    args = dict(sink=sink, state_repo=MemoryStateRepository(), start_ms=0, chunk_ms=1000,
+                ahead_safety_ms=0, max_empty_chunks=3, now_ms_provider=lambda: 10 ** 12)
+    args.update(kw)
+    n = HLBackfillService(client, retries=1, page_cap=client.page_cap).process_wallet_chunked(
+        1, "0xabc", **args)
+    return n, sink
+
+def test_chunked_skips_empty_history_and_adapts_chunk_size():
+    # ארנק "צעיר": 60 fills צפופים אחרי ~30 שנה של כלום, ואז עוד שקט עד האופק
+    t0 = 10 ** 12 - 10 ** 9
+    rows = [{"coin": "BTC", "side": "A", "px": "1", "sz": "1", "time": t0 + i * 50, "tid": i}
+            for i in range(60)]
+    client = CountingRangeClient(rows, page_cap=10)
+    n, sink = _chunked(client)
+    assert n == 60
+    assert [r.base_tid for r in sink.rows] == list(range(60))
+    # ב-chunk_ms קבוע זה היה 10^9 בקשות; כאן probe + דפדוף + כמה chunks ריקים מוכפלים
+    assert client.calls < 30
+
+def test_chunked_raises_when_full_page_shares_one_ms():
+    import pytest
+    from hl_verify_wallet.errors import HLTooManyFillsError
+    rows = [{"coin": "BTC", "side": "A", "px": "1", "sz": "1", "time": 5000, "tid": i} for i in range(4)]
+    with pytest.raises(HLTooManyFillsError):
+        _chunked(FakeRangeClient(rows, page_cap=4))
+
+def test_pipelined_matches_serial_and_bounds_buffering():
+    import time as _time
+    rows = [dict(r, coin="BTC") for r in _synthetic_rows(200)]   # בלי ספוט: fill אחד לכל row
+    window = TimeWindow(1000, 1000 + 200 * 7)
+    serial = MemorySink()
+    HLBackfillService(FakeRangeClient(rows, page_cap=5), page_cap=5).process_wallet("0xabc", window, serial)
+
+    class SlowSink(MemorySink):
+        def add(self, f):
+            _time.sleep(0.0005)
+            super().add(f)
+
+    client = CountingRangeClient(rows, page_cap=5)
+    seen = []
+    class WatchingSink(SlowSink):
+        def add(self, f):
+            seen.append((len(self.rows), client.calls))
+            super().add(f)
+
+    piped = WatchingSink()
+    n = HLBackfillService(client, page_cap=5).process_wallet_pipelined("0xabc", window, piped, queue_pages=2)
+    assert n == len(serial.rows)
+    assert piped.rows == serial.rows
+    # backpressure: ה-fetcher אף פעם לא מקדים את ה-sink ביותר מ-2 תורים + עמוד בטיפול בכל שלב
+    # (עמוד מלא של 5 מוסר 4 שורות – ה-ms האחרון נמשך שוב בבקשה הבאה)
+    assert all(calls * 4 - written <= (2 * 2 + 3) * 4 for written, calls in seen)
+
+def test_pipelined_propagates_sink_errors():
+    import pytest
+    class BrokenSink(MemorySink):
+        def add(self, f):
+            raise IOError("disk full")
+    with pytest.raises(IOError):
+        HLBackfillService(FakeRangeClient(_synthetic_rows(50), page_cap=5), page_cap=5).process_wallet_pipelined(
+            "0xabc", TimeWindow(1000, 2000), BrokenSink())
+
+def test_provider_fetch_fills_yields_before_the_last_page():
+    import time
+    from hl_verify_wallet.adapters.hyperliquid_info_provider import HyperliquidInfoProvider, _QUEUE_BATCHES
+
+    class CountingRangeClient(FakeRangeClient):
+        calls = 0
+        def request_info(self, payload, timeout=None):
+            self.calls += 1
+            return super().request_info(payload, timeout)
+
+    rows = [{"coin": "BTC" if t % 2 else "ETH", "side": "B", "px": "1", "sz": "1", "time": t, "tid": t}
+            for t in range(1000)]
+    client = CountingRangeClient(rows, page_cap=5)   # 4 fills לעמוד → ~250 בקשות
+    hl = HyperliquidInfoProvider("http://unused", client=client, page_cap=5)
+
+    it = iter(hl.fetch_fills("0xabc", TimeWindow(0, 2000), coin="BTC"))
+    assert next(it).base_tid == 1
+    time.sleep(0.1)   # ה-backfill רץ קדימה רק עד שהתור מלא
+    assert client.calls <= 2 * (_QUEUE_BATCHES + 2)   # חסום ע"י התור, לא 250 העמודים
+    assert [f.base_tid for f in it] == list(range(3, 1000, 2))
+    assert client.calls > 200
+
+    # צרכן שמוותר סוגר את ה-generator – ה-backfill מפסיק לשלוח בקשות
+    client.calls = 0
+    it = iter(hl.fetch_fills("0xabc", TimeWindow(0, 2000)))
+    next(it)
+    it.close()
+    time.sleep(0.1)
+    seen = client.calls
+    time.sleep(0.1)
+    assert client.calls == seen <= 2 * (_QUEUE_BATCHES + 2)
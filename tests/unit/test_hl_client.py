@@ -0,0 +1,57 @@
+# tests/unit/test_hl_client.py
+import threading, time
+import httpx
+from hl_verify_wallet.adapters.hyperliquid_client import HLClient
+
+class FakeResp:
+    status_code = 200
+    headers = {"content-length": "2"}
+    content = b"[]"
+
+class FakeHttp:
+    """httpx.Client מדומה: post איטי שנכשל אם הלקוח נסגר באמצע."""
+    def __init__(self, fail_first=False):
+        self.closed = False
+        self.fail_first = fail_first
+        self.posts = 0
+    def post(self, url, json=None, timeout=None):
+        self.posts += 1
+        if self.fail_first and self.posts == 1:
+            raise httpx.RemoteProtocolError("stale")
+        assert not self.closed, "post on a closed client"
+        time.sleep(0.005)
+        assert not self.closed, "client closed while a request was in flight"
+        return FakeResp()
+    def close(self):
+        self.closed = True
+
+class FakeHLClient(HLClient):
+    def __init__(self, **kw):
+        self.made = []
+        super().__init__("http://x", **kw)
+    def _new_client(self):
+        c = FakeHttp(fail_first=not self.made)
+        self.made.append(c)
+        return c
+
+def test_rebuild_closes_old_client_only_after_in_flight_requests():
+    now = [0.0]
+    c = FakeHLClient(max_idle_sec=1.0, clock=lambda: now[0])
+    errors = []
+    def worker():
+        try:
+            for _ in range(20):
+                c.request_info({"type": "x"})
+                now[0] += 1.5   # כל בקשה חוצה את max_idle → rebuild בזמן שאחרים באמצע בקשה
+        except AssertionError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert c.rebuilds >= 2 and len(c.made) == c.rebuilds + 1
+    assert all(m.closed for m in c.made[:-1]) and not c.made[-1].closed
+    c.close()
+    assert c.made[-1].closed
@@ -0,0 +1,96 @@
+# tests/unit/test_hl_page_cache.py
+import os
+from hl_verify_wallet.adapters.hl_page_cache import HLPageCache, CachingHLClient
+from hl_verify_wallet.adapters.sinks.memory_sink import MemorySink
+from hl_verify_wallet.domain.time_window import TimeWindow
+from hl_verify_wallet.ports.rate_limiter import RateLimiter
+from hl_verify_wallet.services.backfill.hl_backfill import HLBackfillService, USER_FILLS_WEIGHT
+from tests.unit.test_hl_backfill import FakeRangeClient, _synthetic_rows
+
+class CountingClient(FakeRangeClient):
+    calls = 0
+    def request_info(self, payload, timeout=None):
+        self.calls += 1
+        return super().request_info(payload, timeout)
+
+def test_cache_serves_old_pages_and_skips_recent(tmp_path):
+    inner = CountingClient(_synthetic_rows(40), page_cap=5)
+    now = 1000 + 40 * 7
+    client = CachingHLClient(inner, HLPageCache(str(tmp_path)), ahead_safety_ms=50, now_ms_provider=lambda: now)
+    window = TimeWindow(1000, now)
+
+    def run():
+        sink = MemorySink()
+        HLBackfillService(client, page_cap=inner.page_cap).process_wallet_sharded("0xabc", window, sink, shard_ms=64, max_concurrency=2)
+        return sink.rows
+
+    first = run()
+    calls_first = inner.calls
+    second = run()
+    assert second == first
+    # בריצה השנייה רק ה-shards בטווח ה-safety חוזרים לשרת
+    assert 0 < inner.calls - calls_first < calls_first
+    assert client.hits > 0
+
+class CountingLimiter(RateLimiter):
+    def __init__(self):
+        self.weight = 0
+    def acquire(self, weight=1.0):
+        self.weight += weight
+    def charge(self, weight):
+        self.weight += weight
+    def on_success(self): ...
+    def on_throttle(self): ...
+
+def test_cache_hits_do_not_spend_rate_limit_budget(tmp_path):
+    inner = CountingClient(_synthetic_rows(40), page_cap=5)
+    now = 10_000_000
+    client = CachingHLClient(inner, HLPageCache(str(tmp_path)), ahead_safety_ms=50, now_ms_provider=lambda: now)
+    limiter = CountingLimiter()
+    svc = HLBackfillService(client, page_cap=inner.page_cap, rate_limiter=limiter)
+    window = TimeWindow(1000, 2000)
+    first = MemorySink()
+    svc.process_wallet(wallet="0xabc", window=window, sink=first)
+    spent, calls = limiter.weight, inner.calls
+    assert spent >= calls * USER_FILLS_WEIGHT
+    second = MemorySink()
+    svc.process_wallet(wallet="0xabc", window=window, sink=second)
+    # כל העמודים ישנים מה-safety → הכל מה-cache, בלי בקשות ובלי משקל
+    assert second.rows == first.rows
+    assert (inner.calls, limiter.weight) == (calls, spent)
+    assert client.hits == calls
+
+def test_cache_lru_is_size_bounded(tmp_path):
+    cache = HLPageCache(str(tmp_path), max_bytes=600)
+    for i in range(20):
+        cache.put("0xabc", i, i + 1, os.urandom(100).hex())
+    assert cache.size_bytes <= 600
+    assert cache.get("0xabc", 0, 1) is None
+    assert cache.get("0xabc", 19, 20) is not None
+    reopened = HLPageCache(str(tmp_path), max_bytes=600)
+    assert len(reopened) == len(cache)
+
+def test_default_cached_provider_skips_empty_history_and_rereads_only_the_tail(tmp_path):
+    from hl_verify_wallet.adapters.hyperliquid_info_provider import HyperliquidInfoProvider
+    from hl_verify_wallet.domain.digest import DAY_MS
+    # 5000 fills על פני 10 ימים ב-2023, page_cap=200 (~3 עמודים ליום); חלון מ-start_ms=0
+    t0 = 19_675 * DAY_MS + 12 * 3_600_000
+    rows = [{"coin": "BTC", "side": "A", "px": "1", "sz": "1", "time": t0 + i * 172_800, "tid": i}
+            for i in range(5000)]
+    inner = CountingClient(rows, page_cap=200)
+    cache = HLPageCache(str(tmp_path))
+    # בלי HL_SHARD_MS: ה-cache לבדו מפעיל shards מיושרים של יום
+    hl = HyperliquidInfoProvider("http://unused", page_cache=cache, client=inner, page_cap=200)
+    end = t0 + 10 * DAY_MS
+
+    first = list(hl.fetch_fills("0xabc", TimeWindow(0, end)))
+    assert [f.base_tid for f in first] == list(range(5000))
+    # probe + 2 עמודים לכל חצי יום בקצוות + 3 לכל אחד מ-9 הימים המלאים – לא בקשה לכל יום מאז 1970
+    assert inner.calls == 1 + 2 + 9 * 3 + 2
+
+    calls = inner.calls
+    later = list(hl.fetch_fills("0xabc", TimeWindow(0, end + 3_600_000)))
+    assert later == first
+    # רק ה-probe ו-2 העמודים של היום האחרון (endTime חדש) חוזרים לשרת; כל השאר hits
+    assert inner.calls - calls == 1 + 2
+    assert hl._client.hits == calls - 1 - 2
@@ -0,0 +1,25 @@
+# tests/unit/test_import_time.py
+import os, re, subprocess, sys
+
+# תקציב cold start ל-import של hl_verify_wallet.app (µs, מצטבר). נמדד ~40ms; מרווח לרעש של CI.
+IMPORT_BUDGET_US = 150_000
+# נטענים רק כשבונים providers בפועל
+HEAVY = ("boto3", "botocore", "httpx", "pydantic")
+
+def _importtime(module: str):
+    src = os.path.join(os.path.dirname(__file__), "..", "..", "src")
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(src))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, check=True)
+    out = {}
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)", line)
+        if m:
+            out[m.group(3)] = int(m.group(1))
+    return out
+
+def test_app_import_stays_light():
+    times = _importtime("hl_verify_wallet.app")
+    heavy = sorted(m for m in times if m.split(".")[0] in HEAVY)
+    assert not heavy, f"heavy modules imported eagerly: {heavy[:5]}"
+    assert times["hl_verify_wallet.app"] < IMPORT_BUDGET_US, times["hl_verify_wallet.app"]
@@ -0,0 +1,55 @@
+# tests/unit/test_matcher.py
+import time
+from decimal import Decimal
+from hl_verify_wallet.domain.models import Fill
+from hl_verify_wallet.services.matching.default_matcher import DefaultMatchStrategy
+
+def _f(ts, px="100", sz="1", coin="BTC", side="A", tid=None):
+    return Fill(wallet="0xabc", coin=coin, side=side, px=Decimal(px), sz=Decimal(sz), ts_ms=ts, base_tid=tid)
+
+def _m():
+    return DefaultMatchStrategy(Decimal("0.01"), Decimal("0.001"), 1000)
+
+def test_match_respects_tolerances_and_buckets():
+    us = [_f(1000), _f(2000, px="101"), _f(3000, side="B"), _f(9000)]
+    hl = [_f(1500, px="100.005"), _f(2000, px="101.5"), _f(3100, side="B", sz="1.0005"), _f(20000)]
+    res = _m().match(us, hl)
+    assert [(u.ts_ms, h.ts_ms) for u, h in res.pairs] == [(1000, 1500), (3000, 3100)]
+    assert [f.ts_ms for f in res.missing_in_hl] == [2000, 9000]
+    assert [f.ts_ms for f in res.missing_in_us] == [2000, 20000]
+
+def test_match_is_one_to_one_and_deterministic():
+    us = [_f(1000, tid=1), _f(1000, tid=2), _f(1001, tid=3)]
+    hl = [_f(1002, tid=10), _f(999, tid=11)]
+    res = _m().match(us, hl)
+    assert [(u.base_tid, h.base_tid) for u, h in res.pairs] == [(1, 11), (2, 10)]
+    assert [f.base_tid for f in res.missing_in_hl] == [3]
+    assert res.missing_in_us == []
+    assert _m().match(list(reversed(us)), hl).pairs == [(us[1], hl[1]), (us[0], hl[0])]
+
+def test_match_dense_bucket_scales():
+    n = 50000
+    us = [_f(i // 10) for i in range(n)]  # כל המילישניות צפופות בחלון הטולרנס
+    hl = [_f(i // 10) for i in range(n)]
+    t0 = time.perf_counter()
+    res = _m().match(us, hl)
+    assert len(res.pairs) == n
+    assert time.perf_counter() - t0 < 10
+
+def test_match_far_px_in_dense_window_does_not_scan_the_window():
+    # 20k fills במרווח 1ms, tol_ts=2000: כל fill רואה ~4000 מועמדים בזמן, אבל px רחוק ב-0.5
+    n = 20000
+    us = [_f(i) for i in range(n)]
+    hl = [_f(i, px="100.5") for i in range(n)]
+    m = DefaultMatchStrategy(Decimal("0.01"), Decimal("0.001"), 2000)
+    t0 = time.perf_counter()
+    res = m.match(us, hl)
+    assert res.pairs == [] and len(res.missing_in_hl) == n and len(res.missing_in_us) == n
+    assert time.perf_counter() - t0 < 5
+
+def test_match_across_px_cells_takes_earliest_candidate():
+    # 100.009 ו-99.995 נופלים בתאים שונים; שניהם בטולרנס של 100.000 – נלקח המוקדם בזמן
+    us = [_f(1000)]
+    hl = [_f(1200, px="100.009", tid=1), _f(1100, px="99.995", tid=2)]
+    res = _m().match(us, hl)
+    assert [h.base_tid for _, h in res.pairs] == [2]
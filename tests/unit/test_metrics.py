@@ -0,0 +1,36 @@
+# tests/unit/test_metrics.py
+import io, json
+from decimal import Decimal
+from hl_verify_wallet.adapters.powertools_logger import Metrics, metrics
+from hl_verify_wallet.domain.time_window import TimeWindow
+from hl_verify_wallet.orchestrators.verify_wallet_usecase import run
+from hl_verify_wallet.services.matching.default_matcher import DefaultMatchStrategy
+from tests.unit.test_verify_wallet_usecase import ListProvider, _f
+
+def test_histogram_and_emf_payload():
+    m = Metrics(namespace="ns")
+    for v in (0.5, 3, 3, 40, 90_000):
+        m.observe("hl.request_ms", v)
+    m.incr("hl.bytes", 1024)
+    m.incr("hl.retries")
+    snap = m.snapshot()
+    t = snap["timers_ms"]["hl.request_ms"]
+    assert t["count"] == 5 and t["max"] == 90_000 and t["p50"] == 5
+    assert snap["counters"] == {"hl.bytes": 1024, "hl.retries": 1}
+
+    out = io.StringIO()
+    m.emit({"mode": "fills"}, stream=out)
+    doc = json.loads(out.getvalue())
+    cw = doc["_aws"]["CloudWatchMetrics"][0]
+    assert cw["Namespace"] == "ns" and cw["Dimensions"] == [["mode", "service"]]
+    assert {"Name": "hl.bytes", "Unit": "Bytes"} in cw["Metrics"]
+    assert doc["hl.request_ms"] == {"Values": [1.0, 5.0, 50.0, 90000.0], "Counts": [1, 2, 1, 1]}
+
+def test_run_records_rows_and_time_per_stage():
+    metrics.reset()
+    us = ListProvider([_f(t) for t in range(0, 1000, 10)])
+    hl = ListProvider([_f(t) for t in range(0, 1000, 10)])
+    run("0xabc", TimeWindow(0, 1000), us, hl, DefaultMatchStrategy(Decimal("0"), Decimal("0"), 0))
+    snap = metrics.snapshot()
+    assert snap["counters"]["us.rows"] == 100 and snap["counters"]["hl.rows"] == 100
+    assert {"us.fetch_ms", "hl.fetch_ms", "match_ms"} <= set(snap["timers_ms"])
@@ -0,0 +1,65 @@
+# tests/unit/test_ndjson_presenter.py
+import gzip, io, json
+from decimal import Decimal
+from hl_verify_wallet import app
+from hl_verify_wallet import config
+from hl_verify_wallet.presenters.ndjson_presenter import NdjsonSpillPresenter
+from hl_verify_wallet.services.compare_service import compare
+from hl_verify_wallet.services.matching.default_matcher import DefaultMatchStrategy
+from tests.unit.test_verify_wallet_usecase import ListProvider, _f
+
+def test_compare_streams_diffs_to_ndjson_and_keeps_sample(tmp_path):
+    us = [_f(t) for t in range(0, 5000, 2)]
+    hl = [_f(t) for t in range(0, 5000, 5)]
+    m = DefaultMatchStrategy(Decimal("0"), Decimal("0"), 0)
+    spill = NdjsonSpillPresenter(str(tmp_path / "d.ndjson"), compress=True, sample_size=3, batch_size=100)
+    res = compare(us, hl, m, diff_sink=spill)
+    assert res["missing_in_us"] == [] and res["missing_in_hl"] == []
+    out = spill.compact(res)
+    s = out["summary"]
+    assert (s["missing_in_us"], s["missing_in_hl"]) == (500, 2000)
+    assert len(out["missing_in_us"]) == 3 and len(out["missing_in_hl"]) == 3
+    assert out["spill"]["path"].endswith(".ndjson.gz") and out["spill"]["records"] == 2500
+    with gzip.open(out["spill"]["path"], "rt") as fh:
+        lines = [json.loads(l) for l in fh]
+    assert len(lines) == 2500
+    assert sum(1 for l in lines if l["kind"] == "missing_in_us") == 500
+    assert lines[0]["ts_ms"] == 2 and lines[0]["px"] == "10"
+
+def test_presenter_writes_to_stream_and_spills_unstreamed_result():
+    buf = io.BytesIO()
+    p = NdjsonSpillPresenter(buf, sample_size=1)
+    out = p.compact({"summary": {"missing_in_hl": 2}, "missing_in_hl": [{"ts_ms": 1}, {"ts_ms": 2}],
+                     "missing_in_us": []})
+    assert out["missing_in_hl"] == [{"ts_ms": 1}] and out["spill"]["path"] is None
+    assert buf.getvalue().decode().splitlines() == ['{"kind":"missing_in_hl","ts_ms":1}',
+                                                    '{"kind":"missing_in_hl","ts_ms":2}']
+
+def test_lambda_ndjson_output_body_is_bounded(monkeypatch, tmp_path):
+    monkeypatch.setenv("SPILL_DIR", str(tmp_path))
+    monkeypatch.setenv("SPILL_SAMPLE", "5")
+    monkeypatch.setenv("METRICS_EMF", "0")
+    monkeypatch.setattr(config, "_CONFIG", None)   # נקרא מחדש מה-env; משוחזר בסוף הטסט
+    us = [_f(t) for t in range(10_000)]
+    monkeypatch.setattr(app, "_build_providers", lambda cfg: (ListProvider(us), ListProvider([])))
+    monkeypatch.setattr(app, "_PROVIDERS", None)
+    body = json.loads(app.lambda_handler({"wallet": "0xABC", "end_ms": 20_000, "output": "ndjson"})["body"])
+    assert body["summary"]["missing_in_hl"] == 10_000
+    assert len(body["missing_in_hl"]) == 5
+    assert body["spill"]["records"] == 10_000 and body["spill"]["path"].startswith(str(tmp_path))
+    with gzip.open(body["spill"]["path"], "rt") as fh:
+        assert sum(1 for _ in fh) == 10_000
+
+def test_lambda_wallets_mode_always_spills(monkeypatch, tmp_path):
+    monkeypatch.setenv("SPILL_DIR", str(tmp_path))
+    monkeypatch.setenv("SPILL_SAMPLE", "5")
+    monkeypatch.setenv("METRICS_EMF", "0")
+    monkeypatch.setattr(config, "_CONFIG", None)
+    us = [_f(t) for t in range(10_000)]
+    monkeypatch.setattr(app, "_build_providers", lambda cfg: (ListProvider(us), ListProvider([])))
+    monkeypatch.setattr(app, "_PROVIDERS", None)
+    body = json.loads(app.lambda_handler({"wallets": ["0xABC", "0xDEF"], "end_ms": 20_000})["body"])
+    assert body["summary"]["wallets"] == 2 and body["summary"]["missing_in_hl"] == 20_000
+    assert set(body["wallets"]["0xDEF"]) == {"summary", "timings"}
+    assert len(body["missing_in_hl"]) == 5 and body["missing_in_hl"][0]["wallet"] == "0xABC"
+    assert body["spill"]["records"] == 20_000
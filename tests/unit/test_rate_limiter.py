@@ -0,0 +1,59 @@
+# tests/unit/test_rate_limiter.py
+from hl_verify_wallet.adapters.token_bucket_rate_limiter import AdaptiveTokenBucket
+from hl_verify_wallet.services.backfill.hl_backfill import HLBackfillService
+from hl_verify_wallet.adapters.hyperliquid_client import HLClient
+from tests.unit.test_hl_backfill import FakeResp
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+        self.slept = []
+    def now(self):
+        return self.t
+    def sleep(self, s):
+        self.slept.append(s)
+        self.t += s
+
+def _bucket(clock, **kw):
+    return AdaptiveTokenBucket(kw.pop("rate", 10), kw.pop("burst", 20), clock=clock.now, sleep=clock.sleep, **kw)
+
+def test_acquire_waits_for_weight():
+    clock = FakeClock()
+    b = _bucket(clock)
+    b.acquire(20)          # burst מלא
+    assert clock.slept == []
+    b.acquire(5)           # צריך 5 טוקנים בקצב 10/s
+    assert abs(sum(clock.slept) - 0.5) < 1e-9
+    assert b.queue_depth == 0
+
+def test_aimd_decrease_and_recover():
+    clock = FakeClock()
+    b = _bucket(clock, rate=10, min_rate=1, increase_step=1, decrease_factor=0.5, decrease_cooldown_sec=1.0)
+    b.on_throttle()
+    b.on_throttle()        # באותו cooldown – לא מוריד שוב
+    assert b.rate == 5
+    clock.t += 2
+    b.on_throttle()
+    assert b.rate == 2.5
+    for _ in range(20):
+        b.on_success()
+    assert b.rate == 10    # חסום ע"י max_rate
+
+def test_fetch_page_throttles_limiter_instead_of_sleeping():
+    class FlakyClient(HLClient):
+        def __init__(self):
+            self.calls = 0
+        def request_info(self, payload, timeout=None):
+            self.calls += 1
+            if self.calls == 1:
+                return FakeResp(429, {})
+            return FakeResp(200, [{"coin": "BTC", "side": "A", "px": "1", "sz": "1", "time": 1}] * 40)
+
+    clock = FakeClock()
+    b = _bucket(clock, rate=100, burst=100)
+    svc = HLBackfillService(FlakyClient(), rate_limiter=b)
+    rows = svc.fetch_page("0xabc", 0, 10)
+    assert len(rows) == 40
+    assert b.rate == 50 + 0.5
+    snap = b.snapshot()
+    assert snap["tokens"] < 0   # 2 בקשות * 20 + 2 לפי פריטים, ואחרי 429 הדלי רוקן
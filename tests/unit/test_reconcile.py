@@ -0,0 +1,116 @@
+# tests/unit/test_reconcile.py
+from decimal import Decimal
+from hl_verify_wallet.adapters.redshift_data_api_provider import RedshiftDataApiProvider
+from hl_verify_wallet.domain.digest import DAY_MS, HOUR_MS, BucketDigest, digest_fills, trade_id_hash
+from hl_verify_wallet.domain.models import Fill
+from hl_verify_wallet.domain.time_window import TimeWindow
+from hl_verify_wallet.orchestrators.verify_wallet_usecase import run_reconcile
+from hl_verify_wallet.ports.fill_provider import FillProvider
+from hl_verify_wallet.services.matching.default_matcher import DefaultMatchStrategy
+
+def _f(ts, tid, coin="BTC", sz="1"):
+    sz = Decimal(sz)
+    return Fill(wallet="0xabc", coin=coin, side="B", px=Decimal("10"), sz=sz, ts_ms=ts,
+                base_tid=tid, trade_id=tid * 10 + 1, notional_usd=Decimal("10") * sz)
+
+class PushdownProvider(FillProvider):
+    """מדמה ספק עם SQL: fetch_digests לא נספר כהעברת שורות; fetch_fills כן. end כולל, כמו HL."""
+    def __init__(self, fills):
+        self.fills = fills
+        self.row_windows = []
+        self.rows_fetched = 0
+    def fetch_fills(self, wallet, window, coin=None):
+        self.row_windows.append((coin, window.start_ms, window.end_ms))
+        out = [f for f in self.fills if window.start_ms <= f.ts_ms <= window.end_ms and (not coin or f.coin == coin)]
+        self.rows_fetched += len(out)
+        return out
+    def fetch_digests(self, wallet, window, bucket_ms, coin=None):
+        self.digest_calls = getattr(self, "digest_calls", []) + [(coin, window.start_ms, bucket_ms)]
+        rows = [f for f in self.fills if window.start_ms <= f.ts_ms and (not coin or f.coin == coin)]
+        return digest_fills(rows, bucket_ms, window.end_ms)
+
+def _history(days=3, per_hour=10):
+    fills, tid = [], 0
+    for d in range(days):
+        for h in range(24):
+            for i in range(per_hour):
+                tid += 1
+                fills.append(_f(d * DAY_MS + h * HOUR_MS + i * 1000, tid, coin="BTC" if i % 2 else "ETH"))
+    return fills
+
+def _m():
+    return DefaultMatchStrategy(Decimal("0"), Decimal("0"), 0)
+
+def test_clean_wallet_transfers_no_rows():
+    fills = _history()
+    us, hl = PushdownProvider(fills), PushdownProvider(list(fills))
+    res = run_reconcile("0xabc", TimeWindow(0, 3 * DAY_MS), us, hl, _m())
+    assert res["summary"] == {"us": len(fills), "hl": len(fills), "matched": len(fills),
+                              "missing_in_us": 0, "missing_in_hl": 0}
+    assert res["reconcile"]["buckets"] == 6 and res["reconcile"]["diff_ranges"] == 0
+    assert us.rows_fetched == 0 and hl.rows_fetched == 0
+
+def test_only_diverged_bucket_is_row_compared_with_hourly_recursion():
+    fills = _history()
+    # ב-HL: fill אחד חסר ביום 1 בשעה 5, ו-sz אחר ל-fill אחד ביום 2 בשעה 0
+    lost = next(f for f in fills if f.ts_ms == DAY_MS + 5 * HOUR_MS + 1000)
+    changed = next(f for f in fills if f.ts_ms == 2 * DAY_MS + 3000)
+    hl_fills = [f for f in fills if f is not lost and f is not changed] + [_f(changed.ts_ms, changed.base_tid, sz="2")]
+    hl_fills.sort(key=lambda f: f.ts_ms)
+    us, hl = PushdownProvider(fills), PushdownProvider(hl_fills)
+    res = run_reconcile("0xabc", TimeWindow(0, 3 * DAY_MS), us, hl, _m(), max_bucket_rows=50)
+    s = res["summary"]
+    assert (s["missing_in_us"], s["missing_in_hl"]) == (1, 2)
+    assert s["us"] == len(fills) and s["hl"] == len(hl_fills)
+    assert [r["ts_ms"] for r in res["missing_in_hl"]] == [lost.ts_ms, changed.ts_ms]
+    # רק שתי שעות נמשכו שורה-שורה, כל אחת עם ה-coin שלה
+    assert us.row_windows == [("BTC", DAY_MS + 5 * HOUR_MS, DAY_MS + 6 * HOUR_MS),
+                              ("BTC", 2 * DAY_MS, 2 * DAY_MS + HOUR_MS)]
+    assert us.rows_fetched == 10
+
+def test_hl_fetches_each_dirty_time_span_once_for_all_coins():
+    fills = _history()
+    # ביום 1: BTC שונה בשעות 5 ו-6, ETH בשעה 5 – ב-HL זה טווח זמן אחד
+    drop = {DAY_MS + 5 * HOUR_MS + 1000, DAY_MS + 5 * HOUR_MS + 2000, DAY_MS + 6 * HOUR_MS + 1000}
+    hl_fills = [f for f in fills if f.ts_ms not in drop]
+    us, hl = PushdownProvider(fills), PushdownProvider(hl_fills)
+    res = run_reconcile("0xabc", TimeWindow(0, 3 * DAY_MS), us, hl, _m(), max_bucket_rows=50)
+    assert res["summary"]["missing_in_hl"] == 3
+    assert sorted(r["ts_ms"] for r in res["missing_in_hl"]) == sorted(drop)
+    # Redshift: טווח לכל coin; HL: fetch אחד בלי coin לכל ה-span
+    assert us.row_windows == [("BTC", DAY_MS + 5 * HOUR_MS, DAY_MS + 7 * HOUR_MS),
+                              ("ETH", DAY_MS + 5 * HOUR_MS, DAY_MS + 6 * HOUR_MS)]
+    assert hl.row_windows == [(None, DAY_MS + 5 * HOUR_MS, DAY_MS + 7 * HOUR_MS)]
+    # הפירוק לשעות של יום 1 – קריאת digests אחת לשני ה-coins
+    assert hl.digest_calls == [(None, 0, DAY_MS), (None, DAY_MS, HOUR_MS)]
+
+def test_local_digest_matches_sql_hash_definition():
+    # STRTOL(LEFT(MD5('771'), 8), 16)
+    assert trade_id_hash(771) == int("b7ee6f5f", 16) and trade_id_hash(None) == 0
+    d = digest_fills([_f(5, 1), _f(DAY_MS - 1, 2), _f(DAY_MS, 3)], DAY_MS)
+    assert d[("BTC", 0)] == BucketDigest(2, Decimal(2), Decimal(20), trade_id_hash(11) + trade_id_hash(21))
+    assert d[("BTC", DAY_MS)].count == 1
+
+class StubDigestRedshift:
+    def execute_statement(self, **kw):
+        self.kw = kw
+        return {"Id": "sid"}
+    def describe_statement(self, Id):
+        return {"Status": "FINISHED"}
+    def get_statement_result(self, Id, NextToken=None):
+        cols = [{"name": "coin", "typeName": "varchar"}, {"name": "bucket_ms", "typeName": "int8"},
+                {"name": "n", "typeName": "int8"}, {"name": "sz", "typeName": "numeric"},
+                {"name": "notional", "typeName": "numeric"}, {"name": "id_hash", "typeName": "numeric"}]
+        rec = [{"stringValue": "BTC"}, {"longValue": DAY_MS}, {"longValue": 3},
+               {"stringValue": "1.5"}, {"stringValue": "15.000000"}, {"stringValue": "123"}]
+        return {"Records": [rec], "ColumnMetadata": cols}
+
+def test_redshift_digests_are_computed_in_sql():
+    stub = StubDigestRedshift()
+    p = RedshiftDataApiProvider("wg", "db", "arn", "public", "trades", client=stub, sleep=lambda s: None)
+    out = p.fetch_digests("0xabc", TimeWindow(0, 2 * DAY_MS), DAY_MS, coin="BTC")
+    assert out == {("BTC", DAY_MS): BucketDigest(3, Decimal("1.5"), Decimal("15.000000"), 123)}
+    sql = stub.kw["Sql"]
+    assert "GROUP BY 1, 2" in sql and "STRTOL(LEFT(MD5(trade_id::varchar), 8), 16)" in sql
+    assert "AND coin = :coin" in sql
+    assert {"name": "bucket_ms", "value": {"longValue": DAY_MS}} in stub.kw["Parameters"]
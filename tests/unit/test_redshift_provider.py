@@ -0,0 +1,160 @@
+# tests/unit/test_redshift_provider.py
+import time
+from decimal import Decimal
+from hl_verify_wallet.adapters.redshift_data_api_provider import RedshiftDataApiProvider
+from hl_verify_wallet.domain.time_window import TimeWindow
+
+COLUMNS = [
+    {"name": "wallet", "typeName": "varchar"}, {"name": "coin", "typeName": "varchar"},
+    {"name": "side", "typeName": "varchar"}, {"name": "px", "typeName": "numeric"},
+    {"name": "sz", "typeName": "numeric"}, {"name": "ts_ms", "typeName": "int8"},
+    {"name": "hash", "typeName": "varchar"}, {"name": "base_tid", "typeName": "int8"},
+    {"name": "trade_id", "typeName": "int8"}, {"name": "role", "typeName": "varchar"},
+    {"name": "counterparty", "typeName": "varchar"}, {"name": "notional_usd", "typeName": "numeric"},
+]
+
+def _record(i):
+    return [
+        {"stringValue": "0xabc"}, {"stringValue": "BTC"}, {"stringValue": "B"},
+        {"stringValue": "100.5"}, {"stringValue": "0.25"}, {"longValue": 1000 + i},
+        {"stringValue": f"0x{i}"}, {"longValue": 77 + i}, {"longValue": (77 + i) * 10 + 1},
+        {"stringValue": "maker"}, {"isNull": True}, {"stringValue": "25.125000"},
+    ]
+
+class StubRedshiftData:
+    """מדמה את לקוח redshift-data: סטטוסים, ועמודי תוצאה עם NextToken."""
+    def __init__(self, n_pages, per_page, latency=0.0, running_polls=3):
+        self.pages = [[_record(p * per_page + j) for j in range(per_page)] for p in range(n_pages)]
+        self.latency = latency
+        self.running_polls = running_polls
+        self.describes = 0
+    def execute_statement(self, **kw):
+        self.sql = kw["Sql"]
+        return {"Id": "sid-1"}
+    def describe_statement(self, Id):
+        self.describes += 1
+        return {"Status": "STARTED" if self.describes <= self.running_polls else "FINISHED"}
+    def get_statement_result(self, Id, NextToken=None):
+        time.sleep(self.latency)
+        i = int(NextToken) if NextToken else 0
+        out = {"Records": self.pages[i], "ColumnMetadata": COLUMNS}
+        if i + 1 < len(self.pages):
+            out["NextToken"] = str(i + 1)
+        return out
+
+def _provider(stub, slept=None):
+    return RedshiftDataApiProvider("wg", "db", "arn", "public", "trades", client=stub,
+                                   sleep=(slept.append if slept is not None else time.sleep))
+
+def test_fetch_fills_follows_next_token_and_decodes():
+    slept = []
+    stub = StubRedshiftData(n_pages=3, per_page=2)
+    fills = list(_provider(stub, slept).fetch_fills("0xabc", TimeWindow(0, 10 ** 13)))
+    assert len(fills) == 6
+    assert slept == [0.05, 0.1, 0.2]
+    f = fills[5]
+    assert (f.ts_ms, f.base_tid, f.trade_id) == (1005, 82, 821)
+    assert f.px == Decimal("100.5") and f.notional_usd == Decimal("25.125000")
+    assert f.counterparty is None and f.role == "maker"
+
+def test_next_page_is_prefetched_while_consuming():
+    n_pages, latency = 6, 0.05
+    stub = StubRedshiftData(n_pages=n_pages, per_page=10, latency=latency, running_polls=0)
+    t0 = time.perf_counter()
+    for i, _ in enumerate(_provider(stub).fetch_fills("0xabc", TimeWindow(0, 10 ** 13))):
+        if i % 10 == 9:
+            time.sleep(latency)   # צרכן איטי: עיבוד עמוד
+    elapsed = time.perf_counter() - t0
+    # סדרתי: 2 * 6 * 0.05 = 0.6s; עם prefetch: ~0.35s
+    assert elapsed < 0.5
+
+def _csv_line(rec):
+    vals = []
+    for cell in rec:
+        if cell.get("isNull"):
+            vals.append("")   # NULL = שדה ריק בלי מרכאות
+            continue
+        v = str(next(iter(cell.values())))
+        vals.append('"' + v.replace('"', '""') + '"' if v == "" or "," in v or '"' in v else v)
+    return ",".join(vals) + "\n"
+
+class StubRedshiftDataCsv(StubRedshiftData):
+    """מוסיף ResultFormat=CSV (get_statement_result_v2) ו-COUNT(*) לבחירה אוטומטית."""
+    def execute_statement(self, **kw):
+        self.formats = getattr(self, "formats", []) + [kw.get("ResultFormat", "JSON")]
+        if kw["Sql"].lstrip().startswith("SELECT COUNT(*)"):
+            return {"Id": "count"}
+        return super().execute_statement(**kw)
+    def get_statement_result(self, Id, NextToken=None):
+        if Id == "count":
+            return {"Records": [[{"longValue": sum(len(p) for p in self.pages)}]],
+                    "ColumnMetadata": [{"name": "n", "typeName": "int8"}]}
+        return super().get_statement_result(Id, NextToken)
+    def get_statement_result_v2(self, Id, NextToken=None):
+        i = int(NextToken) if NextToken else 0
+        header = ",".join(c["name"] for c in COLUMNS) + "\n" if i == 0 else ""
+        out = {"Records": [{"CSVRecords": header + "".join(_csv_line(r) for r in self.pages[i])}],
+               "ColumnMetadata": COLUMNS, "ResultFormat": "CSV"}
+        if i + 1 < len(self.pages):
+            out["NextToken"] = str(i + 1)
+        return out
+
+def test_auto_mode_switches_to_csv_with_identical_output():
+    window = TimeWindow(0, 10 ** 13)
+    json_fills = list(_provider(StubRedshiftData(3, 4, running_polls=0)).fetch_fills("0xabc", window))
+
+    stub = StubRedshiftDataCsv(3, 4, running_polls=0)
+    p = RedshiftDataApiProvider("wg", "db", "arn", "public", "trades", client=stub,
+                                result_format="auto", csv_row_threshold=10)
+    csv_fills = list(p.fetch_fills("0xabc", window))
+    assert stub.formats == ["JSON", "CSV"]
+    assert csv_fills == json_fills
+
+    small = StubRedshiftDataCsv(1, 4, running_polls=0)
+    p = RedshiftDataApiProvider("wg", "db", "arn", "public", "trades", client=small,
+                                result_format="auto", csv_row_threshold=10)
+    list(p.fetch_fills("0xabc", window))
+    assert small.formats == ["JSON", "JSON"]
+
+def test_csv_keeps_empty_string_distinct_from_null():
+    window = TimeWindow(0, 10 ** 13)
+    stubs = (StubRedshiftData(2, 3, running_polls=0), StubRedshiftDataCsv(2, 3, running_polls=0))
+    for stub in stubs:
+        stub.pages[1][0][9] = {"stringValue": ""}          # role = '' (לא NULL)
+        stub.pages[1][1][6] = {"stringValue": 'a"b,c'}    # מרכאות ופסיק בתוך ערך
+    json_fills = list(_provider(stubs[0]).fetch_fills("0xabc", window))
+    p = RedshiftDataApiProvider("wg", "db", "arn", "public", "trades", client=stubs[1], result_format="csv")
+    csv_fills = list(p.fetch_fills("0xabc", window))
+    assert csv_fills == json_fills
+    assert csv_fills[3].role == "" and csv_fills[3].counterparty is None
+    assert csv_fills[0].counterparty is None and csv_fills[4].hash == 'a"b,c'
+
+class StubRedshiftMany(StubRedshiftData):
+    """תוצאה של wallet IN (...): השורות ממוינות לפי (wallet, ts), רק לארנקים שב-statement."""
+    def __init__(self, rows_by_wallet):
+        super().__init__(0, 0, running_polls=0)
+        self.rows_by_wallet = rows_by_wallet
+        self.statements = []
+    def execute_statement(self, **kw):
+        self.statements.append(kw)
+        asked = [p["value"]["stringValue"] for p in kw["Parameters"] if p["name"].startswith("w")]
+        recs = []
+        for w in sorted(asked):
+            for i in range(self.rows_by_wallet.get(w, 0)):
+                r = _record(i)
+                r[0] = {"stringValue": w}
+                recs.append(r)
+        self.pages = [recs[i:i + 3] for i in range(0, len(recs), 3)] or [[]]
+        return {"Id": f"sid-{len(self.statements)}"}
+
+def test_fetch_fills_many_batches_wallets_and_splits_stream():
+    stub = StubRedshiftMany({"0xa": 4, "0xc": 2, "0xd": 1})
+    p = RedshiftDataApiProvider("wg", "db", "arn", "public", "trades", client=stub,
+                                sleep=lambda s: None, batch_wallets=3)
+    out = [(w, [f.ts_ms for f in it]) for w, it in
+           p.fetch_fills_many(["0xc", "0xa", "0xb", "0xd", "0xa"], TimeWindow(0, 10 ** 13))]
+    assert out == [("0xa", [1000, 1001, 1002, 1003]), ("0xc", [1000, 1001]), ("0xb", []),
+                   ("0xd", [1000])]
+    assert len(stub.statements) == 2
+    sql = stub.statements[0]["Sql"]
+    assert "wallet IN (:w0, :w1, :w2)" in sql and "ORDER BY wallet, ts" in sql
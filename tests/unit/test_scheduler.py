@@ -0,0 +1,66 @@
+# tests/unit/test_scheduler.py
+from hl_verify_wallet.adapters.sinks.memory_sink import MemorySink
+from hl_verify_wallet.adapters.state_repo.memory_state_repo import MemoryStateRepository
+from hl_verify_wallet.services.backfill.scheduler import BackfillScheduler
+from tests.unit.test_hl_backfill import FakeRangeClient, FakeResp
+
+class FleetClient(FakeRangeClient):
+    """כמו FakeRangeClient, אבל עם rows נפרדים לכל user; רושם את סדר הבקשות."""
+    def __init__(self, rows_by_user, log, page_cap=5):
+        self.rows_by_user = rows_by_user
+        self.log = log
+        self.page_cap = page_cap
+    def request_info(self, payload, timeout=None):
+        user = payload["user"]
+        self.log.append(user)
+        st, end = payload["startTime"], payload["endTime"]
+        rows = [r for r in self.rows_by_user[user] if st <= r["time"] <= end]
+        return FakeResp(200, rows[: self.page_cap])
+    def close(self):
+        pass
+
+def _rows(n, step):
+    return [{"coin": "BTC", "side": "A", "px": "100", "sz": "1", "time": i * step, "tid": i}
+            for i in range(n)]
+
+def _fleet():
+    rows = {"0xwhale": _rows(200, 10)}   # 20 chunks של 100ms
+    rows.update({f"0xsmall{i}": _rows(5, 10) for i in range(4)})
+    return rows
+
+def _scheduler(rows, log, sinks, workers, slice_chunks=1):
+    repo = MemoryStateRepository()
+    for i, w in enumerate(rows):
+        repo.register(i, w)
+    def sink_factory(idx):
+        sinks[idx] = MemorySink()
+        return sinks[idx]
+    sch = BackfillScheduler(lambda: FleetClient(rows, log), repo, sink_factory, workers=workers,
+                            start_ms=0, chunk_ms=100, ahead_safety_ms=0, max_empty_chunks=1,
+                            slice_chunks=slice_chunks, retries=1, page_cap=5, now_ms_provider=lambda: 10 ** 7)
+    return sch, repo
+
+def test_scheduler_finishes_all_wallets():
+    rows, log, sinks = _fleet(), [], {}
+    sch, repo = _scheduler(rows, log, sinks, workers=3)
+    stats = sch.run()
+    assert stats.wallets_finished == len(rows)
+    assert stats.fills == sum(len(r) for r in rows.values())
+    assert sum(len(s.rows) for s in sinks.values()) == stats.fills
+    assert not stats.errors
+    assert repo.pending() == []
+
+def test_whale_does_not_starve_small_wallets():
+    rows, log, sinks = _fleet(), [], {}
+    sch, _ = _scheduler(rows, log, sinks, workers=1)
+    sch.run()
+    last_small = max(i for i, u in enumerate(log) if u != "0xwhale")
+    # כל הארנקים הקטנים מסתיימים בתחילת הריצה, לא אחרי 20 ה-chunks של הלוויתן.
+    # נמדד בבקשות של הלוויתן ולא כחלק מכל ה-log: ה-probe וה-ms שנמשך מחדש בעמוד מלא
+    # מייקרים כל ארנק קטן, ולכן חלקם ב-log לבדו כבר קרוב לרבע.
+    before = log[:last_small]
+    assert before.count("0xwhale") < log.count("0xwhale") // 4
+    # ולכל היותר שני slices של הלוויתן (רצפים רציפים שלו ב-log) לפני שהאחרון מהם מסיים
+    runs = sum(1 for i, u in enumerate(before) if u == "0xwhale" and (i == 0 or before[i - 1] != "0xwhale"))
+    assert runs <= 2
+    assert log[-1] == "0xwhale"
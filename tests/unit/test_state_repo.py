@@ -0,0 +1,75 @@
+# tests/unit/test_state_repo.py
+import threading
+import pytest
+from hl_verify_wallet.adapters.sinks.memory_sink import MemorySink
+from hl_verify_wallet.adapters.state_repo.sqlite_state_repo import SqliteStateRepository
+from hl_verify_wallet.services.backfill.hl_backfill import HLBackfillService
+from tests.unit.test_hl_backfill import FakeRangeClient, _synthetic_rows
+
+class CrashingClient(FakeRangeClient):
+    def __init__(self, rows, page_cap, crash_after=None):
+        super().__init__(rows, page_cap)
+        self.calls = 0
+        self.crash_after = crash_after
+    def request_info(self, payload, timeout=None):
+        self.calls += 1
+        if self.crash_after is not None and self.calls > self.crash_after:
+            raise KeyboardInterrupt("simulated crash")
+        return super().request_info(payload, timeout)
+
+def _run(client, repo, sink):
+    return HLBackfillService(client, retries=1, page_cap=client.page_cap).process_wallet_chunked(
+        7, "0xabc", sink=sink, state_repo=repo, start_ms=1000, chunk_ms=10 ** 6,
+        ahead_safety_ms=0, max_empty_chunks=1, now_ms_provider=lambda: 10 ** 7)
+
+def test_resume_refetches_at_most_one_page(tmp_path):
+    rows = _synthetic_rows(100)
+    db = str(tmp_path / "state.db")
+    reference = CrashingClient(rows, page_cap=10)
+    _run(reference, SqliteStateRepository(str(tmp_path / "ref.db")), MemorySink())
+
+    first = MemorySink()
+    with SqliteStateRepository(db) as repo:
+        with pytest.raises(KeyboardInterrupt):
+            _run(CrashingClient(rows, page_cap=10, crash_after=5), repo, first)
+        st = repo.load(7)
+    assert st.page_cursor is not None and not st.finished
+
+    resumed = CrashingClient(rows, page_cap=10)
+    second = MemorySink()
+    with SqliteStateRepository(db) as repo:
+        _run(resumed, repo, second)
+        assert repo.load(7).finished
+    assert 5 + resumed.calls <= reference.calls + 1
+    assert [f.ts_ms for f in first.rows + second.rows] == [f.ts_ms for f in
+                                                          HLBackfillService(reference)._parse_page("0xabc", rows)]
+
+def test_concurrent_saves_are_group_committed(tmp_path):
+    repo = SqliteStateRepository(str(tmp_path / "s.db"), max_delay_sec=0.002)
+
+    def worker(wid):
+        for i in range(50):
+            repo.save_checkpoint(wid, 0, i)
+        repo.save(wid, 1000 + wid, True)
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert repo.writes == 8 * 51
+    assert repo.commits < repo.writes
+    st = repo.load(3)
+    assert (st.next_start_ms, st.finished, st.page_cursor) == (1003, True, None)
+    repo.close()
+
+def test_sqlite_watermarks_survive_reopen_next_to_wallet_state(tmp_path):
+    from hl_verify_wallet.adapters.state_repo.sqlite_watermark_repo import SqliteWatermarkRepository
+    path = str(tmp_path / "state.db")
+    with SqliteStateRepository(path) as state, SqliteWatermarkRepository(path) as wms:
+        state.save(1, 500, False)
+        assert wms.load("0xabc") is None
+        wms.save("0xabc", 1_000)
+        wms.save("0xabc", 2_000)
+        wms.save("0xabc|BTC", 1_500)
+    with SqliteWatermarkRepository(path) as wms, SqliteStateRepository(path) as state:
+        assert (wms.load("0xabc"), wms.load("0xabc|BTC")) == (2_000, 1_500)
+        assert state.load(1).next_start_ms == 500
@@ -0,0 +1,147 @@
+# tests/unit/test_verify_wallet_usecase.py
+from decimal import Decimal
+from hl_verify_wallet.domain.models import Fill
+from hl_verify_wallet.ports.fill_provider import FillProvider
+from hl_verify_wallet.adapters.state_repo.memory_watermark_repo import MemoryWatermarkRepository
+from hl_verify_wallet.orchestrators.verify_wallet_usecase import run_incremental
+from hl_verify_wallet.services.matching.default_matcher import DefaultMatchStrategy
+
+def _f(ts):
+    return Fill(wallet="0xabc", coin="BTC", side="B", px=Decimal("10"), sz=Decimal("1"), ts_ms=ts)
+
+class ListProvider(FillProvider):
+    def __init__(self, fills):
+        self.fills = fills
+        self.windows = []
+    def fetch_fills(self, wallet, window, coin=None):
+        self.windows.append((window.start_ms, window.end_ms))
+        return [f for f in self.fills if window.start_ms <= f.ts_ms < window.end_ms]
+
+def _matcher():
+    return DefaultMatchStrategy(Decimal("0"), Decimal("0"), 0)
+
+def test_incremental_fetches_only_delta_and_advances_on_clean():
+    us = ListProvider([_f(t) for t in range(0, 10_000, 100)])
+    hl = ListProvider([_f(t) for t in range(0, 10_000, 100)])
+    wms = MemoryWatermarkRepository()
+
+    r1 = run_incremental("0xABC", 5_000, us, hl, _matcher(), wms, overlap_ms=500)
+    assert r1["incremental"]["watermark_after"] == 5_000
+    r2 = run_incremental("0xabc", 9_000, us, hl, _matcher(), wms, overlap_ms=500)
+    assert us.windows[-1] == (4_500, 9_000) and hl.windows[-1] == (4_500, 9_000)
+    assert r2["summary"]["matched"] == 45
+    assert wms.load("0xabc") == 9_000
+
+def test_incremental_keeps_watermark_on_mismatch():
+    us = ListProvider([_f(100), _f(200)])
+    hl = ListProvider([_f(100)])
+    wms = MemoryWatermarkRepository()
+    wms.save("0xabc", 50)
+    res = run_incremental("0xabc", 1_000, us, hl, _matcher(), wms, overlap_ms=0)
+    assert res["incremental"]["clean"] is False
+    assert wms.load("0xabc") == 50
+
+class SlowProvider(ListProvider):
+    def __init__(self, fills, delay, fail=None):
+        super().__init__(fills)
+        self.delay = delay
+        self.fail = fail
+    def fetch_fills(self, wallet, window, coin=None):
+        import time
+        time.sleep(self.delay)
+        if self.fail:
+            raise self.fail
+        return super().fetch_fills(wallet, window, coin)
+
+def test_run_fetches_both_sides_concurrently():
+    import time
+    from hl_verify_wallet.domain.time_window import TimeWindow
+    from hl_verify_wallet.orchestrators.verify_wallet_usecase import run
+    fills = [_f(t) for t in range(0, 5_000, 10)]
+    t0 = time.perf_counter()
+    res = run("0xabc", TimeWindow(0, 5_000), SlowProvider(fills, 0.3), SlowProvider(fills, 0.3), _matcher())
+    elapsed = time.perf_counter() - t0
+    assert res["summary"]["matched"] == 500
+    assert elapsed < 0.55                     # לא 0.6 = סכום שני הצדדים
+    assert res["timings"]["us_ms"] >= 300 and res["timings"]["hl_ms"] >= 300
+
+def test_run_cancels_on_side_failure_and_deadline():
+    import time
+    import pytest
+    from hl_verify_wallet.domain.time_window import TimeWindow
+    from hl_verify_wallet.orchestrators.verify_wallet_usecase import run, VerificationTimeout
+    fills = [_f(t) for t in range(0, 1_000, 10)]
+    t0 = time.perf_counter()
+    with pytest.raises(RuntimeError, match="redshift down"):
+        run("0xabc", TimeWindow(0, 1_000), SlowProvider(fills, 0.05, RuntimeError("redshift down")),
+            SlowProvider(fills, 2.0), _matcher())
+    assert time.perf_counter() - t0 < 1.0      # לא מחכים ל-HL האיטי
+    with pytest.raises(VerificationTimeout):
+        run("0xabc", TimeWindow(0, 1_000), ListProvider(fills), SlowProvider(fills, 2.0), _matcher(),
+            deadline_sec=0.2)
+
+def test_run_cancellation_stops_hl_requests():
+    import time
+    import pytest
+    from hl_verify_wallet.adapters.hyperliquid_info_provider import HyperliquidInfoProvider
+    from hl_verify_wallet.domain.time_window import TimeWindow
+    from hl_verify_wallet.orchestrators.verify_wallet_usecase import run
+    from tests.unit.test_hl_backfill import FakeRangeClient
+
+    class SlowClient(FakeRangeClient):
+        calls = 0
+        def request_info(self, payload, timeout=None):
+            self.calls += 1
+            time.sleep(0.01)
+            return super().request_info(payload, timeout)
+
+    # ~250 עמודים של 10ms – הדפדוף המלא לוקח ~2.5s
+    rows = [{"coin": "BTC", "side": "B", "px": "10", "sz": "1", "time": t, "tid": t} for t in range(1_000)]
+    client = SlowClient(rows, page_cap=5)
+    hl = HyperliquidInfoProvider("http://unused", client=client, page_cap=5)
+    with pytest.raises(RuntimeError, match="redshift down"):
+        run("0xabc", TimeWindow(0, 1_000), SlowProvider([], 0.05, RuntimeError("redshift down")), hl, _matcher())
+    time.sleep(0.05)   # בקשה שכבר יצאה לפני הביטול מסתיימת
+    seen = client.calls
+    time.sleep(0.3)
+    assert client.calls == seen < 50
+
+class WalletsProvider(ListProvider):
+    """כמה ארנקים באותו ספק; fetch_fills_many רושם את ה-batches שהתבקשו."""
+    def __init__(self, fills):
+        super().__init__(fills)
+        self.batches = []
+    def fetch_fills(self, wallet, window, coin=None):
+        return [f for f in super().fetch_fills(wallet, window, coin) if f.wallet == wallet]
+    def fetch_fills_many(self, wallets, window, coin=None):
+        self.batches.append(list(wallets))
+        for w in wallets:
+            yield w, iter(self.fetch_fills(w, window, coin))
+
+def test_run_many_verifies_each_wallet_from_one_batched_fetch():
+    from hl_verify_wallet.domain.time_window import TimeWindow
+    from hl_verify_wallet.orchestrators.verify_wallet_usecase import run_many
+    fills = [Fill(wallet=w, coin="BTC", side="B", px=Decimal("10"), sz=Decimal("1"), ts_ms=t)
+             for t in range(0, 1000, 100) for w in ("0xa", "0xb")]
+    us = WalletsProvider(fills)
+    hl = WalletsProvider([f for f in fills if not (f.wallet == "0xb" and f.ts_ms == 500)])
+    res = run_many(["0xa", "0xb"], TimeWindow(0, 10_000), us, hl, _matcher())
+    assert us.batches == [["0xa", "0xb"]] and hl.batches == []
+    assert res["summary"]["wallets"] == 2 and res["summary"]["matched"] == 19
+    assert res["wallets"]["0xb"]["summary"]["missing_in_us"] == 0
+    assert res["wallets"]["0xb"]["summary"]["missing_in_hl"] == 1
+
+def test_run_many_with_diff_sink_keeps_only_summaries():
+    from hl_verify_wallet.domain.time_window import TimeWindow
+    from hl_verify_wallet.orchestrators.verify_wallet_usecase import run_many
+    fills = [Fill(wallet=w, coin="BTC", side="B", px=Decimal("10"), sz=Decimal("1"), ts_ms=t)
+             for t in range(0, 1000, 100) for w in ("0xa", "0xb")]
+    written = []
+    class Sink:
+        def write(self, kind, rec):
+            written.append((kind, rec["wallet"], rec["ts_ms"]))
+    res = run_many(["0xa", "0xb"], TimeWindow(0, 10_000), WalletsProvider(fills),
+                   WalletsProvider([f for f in fills if f.ts_ms != 500]), _matcher(), diff_sink=Sink())
+    assert written == [("missing_in_hl", "0xa", 500), ("missing_in_hl", "0xb", 500)]
+    assert set(res["wallets"]["0xa"]) == {"summary", "timings"}
+    assert res["summary"]["missing_in_hl"] == 2